@@ -14,89 +14,76 @@ from reversion.admin import VersionAdmin
 from .models import (
     KGVehicle, 
     KGVehicleImage, 
+    KGVehicleSlug, 
     VehicleCardSpec, 
     KGFeedback, 
     KGHeroSlide, 
-    IconTemplate
+    IconTemplate,
+    SpecTranslation
 )
 from .forms import VehicleCardSpecForm
+from .spec_translation import retranslate_specs
+from main.utils.admin_paginator import EstimatedCountAdminMixin
+from main.utils.roles import get_roles
 
 # ============================================
 # БАЗОВЫЕ МИКСИНЫ ДЛЯ ПРАВ ДОСТУПА
 # ============================================
 
 class ContentAdminMixin:
-    """Миксин для контент-админов KG"""
+    """Миксин для контент-админов KG (роли — main/utils/roles.py, один раз на запрос)"""
+    content_groups = ('Главные админы', 'Контент KG', 'Контент UZ+KG')
+    content_models = ('kgvehicle', 'kgheroslide', 'icontemplate', 'spectranslation')
+
     def has_module_permission(self, request):
-        if request.user.is_superuser:
-            return True
-        
-        # Проверяем группы
-        if request.user.groups.filter(
-            name__in=['Главные админы', 'Контент KG', 'Контент UZ+KG']
-        ).exists():
+        roles = get_roles(request)
+        if roles.in_groups(*self.content_groups):
             return True
         
         # ✅ ПРОВЕРЯЕМ ИНДИВИДУАЛЬНЫЕ ПРАВА (любое право на просмотр контента KG)
-        kg_models = ['kgvehicle', 'kgheroslide', 'icontemplate']
-        for model in kg_models:
-            if request.user.has_perm(f'kg.view_{model}'):
-                return True
-        
-        return False
+        return roles.has_any_perm(*(f'kg.view_{model}' for model in self.content_models))
     
     def has_change_permission(self, request, obj=None):
-        if request.user.is_superuser:
-            return True
-        
-        if request.user.groups.filter(
-            name__in=['Главные админы', 'Контент KG', 'Контент UZ+KG']
-        ).exists():
+        roles = get_roles(request)
+        if roles.in_groups(*self.content_groups):
             return True
         
         # ✅ ПРОВЕРЯЕМ ИНДИВИДУАЛЬНОЕ ПРАВО
         model_name = self.model._meta.model_name
-        return request.user.has_perm(f'kg.change_{model_name}')
+        return roles.has_perm(f'kg.change_{model_name}')
     
     def has_delete_permission(self, request, obj=None):
-        if request.user.is_superuser:
-            return True
-        
-        if request.user.groups.filter(name='Главные админы').exists():
+        roles = get_roles(request)
+        if roles.in_groups('Главные админы'):
             return True
         
         # ✅ ПРОВЕРЯЕМ ИНДИВИДУАЛЬНОЕ ПРАВО
         model_name = self.model._meta.model_name
-        return request.user.has_perm(f'kg.delete_{model_name}')
+        return roles.has_perm(f'kg.delete_{model_name}')
 
 
 class LeadManagerMixin:
     """Миксин для лид-менеджеров KG"""
+    lead_groups = ('Главные админы', 'Лиды KG', 'Лиды UZ+KG')
+
     def has_module_permission(self, request):
-        if request.user.is_superuser:
-            return True
-        
-        # Проверяем группы
-        if request.user.groups.filter(
-            name__in=['Главные админы', 'Лиды KG', 'Лиды UZ+KG']
-        ).exists():
+        roles = get_roles(request)
+        if roles.in_groups(*self.lead_groups):
             return True
         
         # ✅ ПРОВЕРЯЕМ ИНДИВИДУАЛЬНЫЕ ПРАВА
-        return request.user.has_perm('kg.view_kgfeedback')
+        return roles.has_perm('kg.view_kgfeedback')
     
     def has_add_permission(self, request):
         return False  # Заявки создаются только с фронта
     
     def has_delete_permission(self, request, obj=None):
-        if request.user.is_superuser:
-            return True
-        
-        if request.user.groups.filter(name='Главные админы').exists():
+        roles = get_roles(request)
+        if roles.in_groups('Главные админы'):
             return True
         
         # ✅ ПРОВЕРЯЕМ ИНДИВИДУАЛЬНОЕ ПРАВО
-        return request.user.has_perm('kg.delete_kgfeedback')
+        return roles.has_perm('kg.delete_kgfeedback')
 
 class CustomReversionMixin:
     """Миксин для кастомного шаблона восстановления"""
@@ -264,6 +251,23 @@ class KGVehicleImageInline(admin.TabularInline):
     image_preview.short_description = "Превью"
 
 
+# ============================================
+# INLINE: АДРЕСА МАШИНЫ (ведутся в KGVehicle.save)
+# ============================================
+
+class KGVehicleSlugInline(admin.TabularInline):
+    model = KGVehicleSlug
+    extra = 0
+    fields = ('slug', 'lang', 'is_current', 'created_at')
+    readonly_fields = fields
+    can_delete = True
+    verbose_name = "Адрес"
+    verbose_name_plural = "Адреса страницы (старые отдают 301 на действующий; удалите, чтобы отдавать 404)"
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 # ============================================
 # ADMIN: КАТАЛОГ МАШИН
 # ============================================
@@ -279,7 +283,7 @@ class KGVehicleAdmin(ContentAdminMixin, CustomReversionMixin, VersionAdmin, admi
     readonly_fields = ('created_at', 'updated_at', 'category')
     list_per_page = 20
     date_hierarchy = 'created_at'
-    inlines = [VehicleCardSpecInline, KGVehicleImageInline]
+    inlines = [VehicleCardSpecInline, KGVehicleImageInline, KGVehicleSlugInline]
 
     fieldsets = (
         ('Название техники', {
@@ -455,7 +459,7 @@ class KGHeroSlideAdmin(ContentAdminMixin, CustomReversionMixin, VersionAdmin, ad
 # ============================================
 
 @admin.register(KGFeedback)
-class KGFeedbackAdmin(LeadManagerMixin, admin.ModelAdmin):  
+class KGFeedbackAdmin(EstimatedCountAdminMixin, LeadManagerMixin, admin.ModelAdmin):  
     list_display = ['name', 'phone', 'region', 'vehicle_display', 'priority', 'status', 'manager', 'created_at', 'action_buttons']
     list_editable = ['priority', 'status', 'manager']
     list_filter = ['status', 'priority', 'region', 'created_at']
@@ -483,9 +487,7 @@ class KGFeedbackAdmin(LeadManagerMixin, admin.ModelAdmin):
         extra_context = extra_context or {}
         
 
-        if (request.user.is_superuser or 
-            request.user.groups.filter(name__in=['Главные админы', 'Лиды KG', 'Лиды UZ+KG']).exists() or
-            request.user.has_perm('kg.view_kgfeedback')): 
+        if self.has_module_permission(request):
             
             extra_context['stats_button_html'] = format_html(
                 '<div style="margin-bottom: 20px;">'
@@ -599,3 +601,21 @@ class IconTemplateAdmin(ContentAdminMixin, admin.ModelAdmin):
             )
         return "—"
     icon_preview.short_description = "Превью"
+
+
+# ============================================
+# ADMIN: СЛОВАРЬ АВТОПЕРЕВОДА ХАРАКТЕРИСТИК
+# ============================================
+
+@admin.register(SpecTranslation)
+class SpecTranslationAdmin(ContentAdminMixin, admin.ModelAdmin):
+    list_display = ('source', 'text_ky', 'text_en')
+    list_editable = ('text_ky', 'text_en')
+    search_fields = ('source', 'text_ky', 'text_en')
+    list_per_page = 100
+    actions = ['retranslate_all_specs']
+
+    @admin.action(description='🔄 Перевести все характеристики заново')
+    def retranslate_all_specs(self, request, queryset):
+        changed = retranslate_specs()
+        self.message_user(request, f'Обновлено характеристик: {changed}')
@@ -0,0 +1,128 @@
+"""Кеш публичного API KG (машины, hero-слайды) + ETag / Cache-Control.
+
+Каталог меняется редко, а фронт faw.kg (Next.js) и CDN дёргают его на
+каждый просмотр. Готовый JSON ответа лежит в кеше под ключом:
+версия контента + endpoint + action + lookup + параметры, которые view
+реально читает (lang, страница, сортировка, фильтры) + хост (в JSON
+абсолютные URL картинок; хост ограничен ALLOWED_HOSTS). Прочие параметры
+(utm, cache-buster'ы CDN) ключ не меняют — иначе каждый мусорный URL
+заводил бы свою запись и проходил мимо кеша.
+
+Ответ всегда JSON (renderer_classes): под одним URL и ETag не окажется
+то JSON, то browsable-HTML. Аутентификация публичному чтению не нужна —
+сессия из cookie не читается.
+
+Версия контента — случайный токен, меняется после коммита любой правки
+KGVehicle / VehicleCardSpec / KGVehicleImage / KGHeroSlide (kg/signals.py):
+старые записи просто перестают читаться и истекают по TTL. Версия общая
+для всех воркеров (main/utils/cache_versions.py).
+
+ETag — md5 тела ответа. If-None-Match с тем же ETag → 304 без тела:
+чтение кеша без сериализации. БД при этом — только перечитывание версий
+кешей раз в CHECK_INTERVAL секунд на процесс.
+"""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from main.utils.cache_versions import KG_API_CONTENT, bump_version, get_version
+
+RESPONSE_TTL = 60 * 60 * 24
+# Сколько CDN/браузер может не перепроверять ответ
+CLIENT_MAX_AGE = 60
+
+LANGS = ('ru', 'ky', 'en')
+DEFAULT_LANG = 'ru'
+
+
+def request_lang(request):
+    """?lang= → один из LANGS. Неизвестный язык отдаётся как русский."""
+    lang = request.query_params.get('lang')
+    return lang if lang in LANGS else DEFAULT_LANG
+
+
+def content_version():
+    return get_version(KG_API_CONTENT)
+
+
+def bump_content_version():
+    bump_version(KG_API_CONTENT)
+
+
+def _etag(data):
+    body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, sort_keys=True)
+    return '"kg-%s"' % hashlib.md5(body.encode()).hexdigest()
+
+
+class CachedPublicReadMixin:
+    """ReadOnlyModelViewSet: list/retrieve из кеша, ETag и Cache-Control.
+
+    Кешируются только ответы 200; 301 со старого slug, 404 и т.п. идут как есть.
+    """
+    client_max_age = CLIENT_MAX_AGE
+    renderer_classes = [JSONRenderer]
+    authentication_classes = []
+    # Параметры, от которых зависит ответ, кроме lang, страницы и фильтров
+    # (filterset_fields, search при search_fields) — их добавит _cache_query_params()
+    cache_query_params = ('ordering',)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['lang'] = request_lang(self.request)
+        return context
+
+    def _cache_query_params(self):
+        names = set(self.cache_query_params) | set(getattr(self, 'filterset_fields', None) or ())
+        if getattr(self, 'search_fields', None):
+            names.add('search')
+        if self.action == 'list' and isinstance(self.paginator, PageNumberPagination):
+            names.add(self.paginator.page_query_param)
+            if self.paginator.page_size_query_param:
+                names.add(self.paginator.page_size_query_param)
+        return sorted(names)
+
+    def _response_cache_key(self, request):
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, '')
+        params = [
+            f'{name}={value}'
+            for name in self._cache_query_params()
+            for value in request.query_params.getlist(name)
+        ]
+        raw = '|'.join([
+            content_version(), self.basename, self.action, str(lookup), request_lang(request),
+            '&'.join(params), f'{request.scheme}://{request.get_host()}',
+        ])
+        return 'kg_api_' + hashlib.md5(raw.encode()).hexdigest()
+
+    def cached_response(self, request, build, *args, **kwargs):
+        key = self._response_cache_key(request)
+        entry = cache.get(key)
+        if entry is None:
+            response = build(request, *args, **kwargs)
+            if not isinstance(response, Response) or response.status_code != 200:
+                return response
+            entry = {'data': response.data, 'etag': _etag(response.data)}
+            cache.set(key, entry, RESPONSE_TTL)
+
+        if entry['etag'] in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = Response(entry['data'])
+        response['ETag'] = entry['etag']
+        patch_cache_control(response, public=True, max_age=self.client_max_age)
+        return response
@@ -4,4 +4,14 @@ from django.apps import AppConfig
 class KgConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'kg'
-    verbose_name = 'FAW.KG'
\ No newline at end of file
+    verbose_name = 'FAW.KG'
+
+    def ready(self):
+        import kg.signals
+
+        # Очистка старых файлов + WebP-производные для картинок KG
+        from main.signals_cleanup import register_image_cleanup
+        from .models import KGVehicle, KGVehicleImage, VehicleCardSpec, IconTemplate
+
+        for model in (KGVehicle, KGVehicleImage, VehicleCardSpec, IconTemplate):
+            register_image_cleanup(model)
@@ -0,0 +1,40 @@
+# kg/management/commands/retranslate_specs.py
+
+from django.core.management.base import BaseCommand
+
+from kg.models import VehicleCardSpec
+from kg.spec_translation import retranslate_specs
+
+
+class Command(BaseCommand):
+    help = 'Перевести характеристики карточек KG (value_ky/value_en) заново по словарю SpecTranslation'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--vehicle',
+            type=int,
+            help='Только характеристики одной машины (id)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Размер пачки bulk_update (по умолчанию 500)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать, что изменится, без сохранения',
+        )
+
+    def handle(self, *args, **options):
+        queryset = VehicleCardSpec.objects.order_by('pk')
+        if options['vehicle']:
+            queryset = queryset.filter(vehicle_id=options['vehicle'])
+
+        changed = retranslate_specs(queryset, batch_size=options['batch_size'], dry_run=options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Будет обновлено характеристик: {changed} (dry-run)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Обновлено характеристик: {changed}'))
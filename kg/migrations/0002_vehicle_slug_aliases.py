@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_slug_aliases(apps, schema_editor):
+    """Действующие slug'и всех машин. При совпадении адрес получает более старая машина."""
+    KGVehicle = apps.get_model('kg', 'KGVehicle')
+    KGVehicleSlug = apps.get_model('kg', 'KGVehicleSlug')
+    rows = {}
+    vehicles = KGVehicle.objects.order_by('created_at', 'id').values_list('id', 'slug_ru', 'slug_ky', 'slug_en', 'slug')
+    for vehicle_id, *slugs in vehicles:
+        for lang, value in zip(('ru', 'ky', 'en', ''), slugs):
+            if value and value not in rows:
+                rows[value] = KGVehicleSlug(slug=value, vehicle_id=vehicle_id, lang=lang, is_current=True)
+    KGVehicleSlug.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kg', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KGVehicleSlug',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(max_length=255, unique=True, verbose_name='URL')),
+                ('lang', models.CharField(blank=True, choices=[('', 'Основной'), ('ru', 'RU'), ('ky', 'KY'), ('en', 'EN')], default='', max_length=2, verbose_name='Язык')),
+                ('is_current', models.BooleanField(default=True, help_text='Старые адреса отдают 301 на действующий', verbose_name='Действующий')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slug_aliases', to='kg.kgvehicle')),
+            ],
+            options={
+                'verbose_name': 'URL машины',
+                'verbose_name_plural': 'URL машин',
+            },
+        ),
+        migrations.RunPython(fill_slug_aliases, migrations.RunPython.noop),
+    ]
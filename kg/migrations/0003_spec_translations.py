@@ -0,0 +1,63 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:00
+
+from django.db import migrations, models
+
+# Словарь, который раньше был зашит в VehicleCardSpec.auto_translate
+INITIAL_TRANSLATIONS = [
+    ('Дизель', 'Дизель', 'Diesel'),
+    ('Бензин', 'Бензин', 'Gasoline'),
+    ('ГАЗ + Бензин', 'Газ + Бензин', 'GAS + Gasoline'),
+    ('ГАЗ  Бензин', 'Газ  Бензин', 'GAS  Gasoline'),
+    ('Бензин + Газ', 'Бензин + Газ', 'Gasoline + GAS'),
+    ('Бензин  Газ', 'Бензин  Газ', 'Gasoline  GAS'),
+    ('кг', 'кг', 'kg'),
+    ('л.с.', 'а.к.', 'hp'),
+    ('л.с', 'а.к.', 'hp'),
+    ('л. с.', 'а.к.', 'hp'),
+    ('а.к.', 'а.к.', 'hp'),
+    ('м²', 'м²', 'm²'),
+    ('м³', 'м³', 'm³'),
+    ('л', 'л', 'L'),
+    ('Климат-контроль', 'Климат-башкаргыч', 'Climate-control'),
+    ('климат-контроль', 'Климат-башкаргыч', 'Climate-control'),
+    ('Климат-Контроль', 'Климат-башкаргыч', 'Climate-control'),
+    ('Климат Контроль', 'Климат-башкаргыч', 'Climate-control'),
+    ('Кондиционер', 'Кондиционер', 'Air conditioning'),
+    ('4x2', '4x2', '4x2'),
+    ('4×2', '4×2', '4×2'),
+    ('4х2', '4х2', '4×2'),
+]
+
+
+def fill_translations(apps, schema_editor):
+    SpecTranslation = apps.get_model('kg', 'SpecTranslation')
+    SpecTranslation.objects.bulk_create(
+        [SpecTranslation(source=source, text_ky=text_ky, text_en=text_en)
+         for source, text_ky, text_en in INITIAL_TRANSLATIONS],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kg', '0002_vehicle_slug_aliases'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpecTranslation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=100, unique=True, verbose_name='Текст (RU)')),
+                ('text_ky', models.CharField(max_length=100, verbose_name='Перевод (KY)')),
+                ('text_en', models.CharField(max_length=100, verbose_name='Перевод (EN)')),
+            ],
+            options={
+                'verbose_name': 'Перевод характеристики',
+                'verbose_name_plural': 'Словарь характеристик',
+                'ordering': ['source'],
+            },
+        ),
+        migrations.RunPython(fill_translations, migrations.RunPython.noop),
+    ]
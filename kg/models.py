@@ -166,6 +166,46 @@ class KGVehicle(models.Model):
             
             super().save(*args, **kwargs)
 
+            # 3. ТАБЛИЦА SLUG'ОВ (поиск детальной страницы + 301 со старых адресов)
+            self.sync_slug_aliases()
+
+    def current_slugs(self):
+        """{slug: язык} для всех действующих адресов машины ('' — основной slug)."""
+        slugs = {}
+        for lang, value in (('ru', self.slug_ru), ('ky', self.slug_ky), ('en', self.slug_en), ('', self.slug)):
+            if value:
+                slugs.setdefault(value, lang)
+        return slugs
+
+    def sync_slug_aliases(self):
+        """Действующие slug'и → KGVehicleSlug(is_current=True), прежние остаются
+        алиасами (is_current=False) и отдают 301 на актуальный адрес.
+
+        slug_ky/slug_en не уникальны: если адрес уже действующий у другой машины —
+        он остаётся за ней (как раньше .first() в OR-поиске). Чужой старый алиас
+        забираем себе.
+        """
+        current = self.current_slugs()
+        KGVehicleSlug.objects.filter(vehicle=self, is_current=True).exclude(slug__in=current).update(is_current=False)
+
+        taken = {
+            row.slug: row
+            for row in KGVehicleSlug.objects.filter(slug__in=current)
+        }
+        to_create, to_update = [], []
+        for slug, lang in current.items():
+            row = taken.get(slug)
+            if row is None:
+                to_create.append(KGVehicleSlug(slug=slug, vehicle=self, lang=lang, is_current=True))
+            elif row.vehicle_id == self.pk or not row.is_current:
+                if (row.vehicle_id, row.lang, row.is_current) != (self.pk, lang, True):
+                    row.vehicle, row.lang, row.is_current = self, lang, True
+                    to_update.append(row)
+        if to_create:
+            KGVehicleSlug.objects.bulk_create(to_create)
+        if to_update:
+            KGVehicleSlug.objects.bulk_update(to_update, ['vehicle', 'lang', 'is_current'])
+
     def __str__(self):
         return self.title_ru or self.slug
         
@@ -203,6 +243,34 @@ class KGVehicle(models.Model):
         return features
 
 
+class KGVehicleSlug(models.Model):
+    """Все адреса машины: действующие slug'и (slug/slug_ru/slug_ky/slug_en) и прежние.
+
+    Детальная страница ищет машину одной пробой по уникальному индексу вместо
+    OR по четырём колонкам. Ведётся в KGVehicle.save() — руками не правится.
+    """
+    LANG_CHOICES = [
+        ('', 'Основной'),
+        ('ru', 'RU'),
+        ('ky', 'KY'),
+        ('en', 'EN'),
+    ]
+
+    slug = models.SlugField(max_length=255, unique=True, verbose_name='URL')
+    vehicle = models.ForeignKey(KGVehicle, related_name='slug_aliases', on_delete=models.CASCADE)
+    lang = models.CharField(max_length=2, choices=LANG_CHOICES, blank=True, default='', verbose_name='Язык')
+    is_current = models.BooleanField(default=True, verbose_name='Действующий',
+                                     help_text='Старые адреса отдают 301 на действующий')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'URL машины'
+        verbose_name_plural = 'URL машин'
+
+    def __str__(self):
+        return self.slug
+
+
 class KGVehicleImage(models.Model):
     """Дополнительные изображения"""
     vehicle = models.ForeignKey(KGVehicle, related_name='mini_images', on_delete=models.CASCADE)
@@ -239,51 +307,9 @@ class VehicleCardSpec(models.Model):
     
     
     def auto_translate(self, text, lang):
-        """Автоперевод с очисткой битых символов"""
-        
-        text = text.strip()
-        text = text.replace('L', 'л')
-        text = text.replace('кLимат', 'Климат')
-        text = text.replace(',', '')
-        
-        translations = {
-            'Дизель': {'ky': 'Дизель', 'en': 'Diesel'},
-            'Бензин': {'ky': 'Бензин', 'en': 'Gasoline'},
-            'ГАЗ + Бензин': {'ky': 'Газ + Бензин', 'en': 'GAS + Gasoline'},
-            'ГАЗ  Бензин': {'ky': 'Газ  Бензин', 'en': 'GAS  Gasoline'},
-            'Бензин + Газ': {'ky': 'Бензин + Газ', 'en': 'Gasoline + GAS '},
-            'Бензин  Газ': {'ky': 'Бензин  Газ', 'en': 'Gasoline  GAS '},
-            
-            'кг': {'ky': 'кг', 'en': 'kg'},
-            'л.с.': {'ky': 'а.к.', 'en': 'hp'},
-            'л.с': {'ky': 'а.к.', 'en': 'hp'},
-            'л. с.': {'ky': 'а.к.', 'en': 'hp'},
-            'а.к.': {'ky': 'а.к.', 'en': 'hp'},
-            
-            'м²': {'ky': 'м²', 'en': 'm²'},
-            'м³': {'ky': 'м³', 'en': 'm³'},
-            'л': {'ky': 'л', 'en': 'L'},
-            
-            'Климат-контроль': {'ky': 'Климат-башкаргыч', 'en': 'Сlimate-control'},
-            'климат-контроль': {'ky': 'Климат-башкаргыч', 'en': 'Сlimate-control'},
-            'Климат-Контроль': {'ky': 'Климат-башкаргыч', 'en': 'Сlimate-control'},
-            'Климат Контроль': {'ky': 'Климат-башкаргыч', 'en': 'Сlimate-control'},
-            'Кондиционер': {'ky': 'Кондиционер', 'en': 'Air conditioning'},
-            
-            '4x2': {'ky': '4x2', 'en': '4x2'},
-            '4×2': {'ky': '4×2', 'en': '4×2'},
-            '4х2': {'ky': '4х2', 'en': '4×2'},
-        }
-        
-        if text in translations:
-            return translations[text].get(lang, text)
-        
-        result = text
-        for ru_term, trans in translations.items():
-            if ru_term in result:
-                result = result.replace(ru_term, trans.get(lang, ru_term))
-        
-        return result
+        """Автоперевод по словарю SpecTranslation (kg/spec_translation.py)"""
+        from .spec_translation import translate
+        return translate(text, lang)
     
     def save(self, *args, **kwargs):
         if self.value_ru:
@@ -292,6 +318,21 @@ class VehicleCardSpec(models.Model):
         
         super().save(*args, **kwargs)
 
+class SpecTranslation(models.Model):
+    """Словарь автоперевода характеристик карточки (RU → KY/EN)"""
+    source = models.CharField(max_length=100, unique=True, verbose_name='Текст (RU)')
+    text_ky = models.CharField(max_length=100, verbose_name='Перевод (KY)')
+    text_en = models.CharField(max_length=100, verbose_name='Перевод (EN)')
+
+    class Meta:
+        ordering = ['source']
+        verbose_name = 'Перевод характеристики'
+        verbose_name_plural = 'Словарь характеристик'
+
+    def __str__(self):
+        return self.source
+
+
 class IconTemplate(models.Model):
     """Шаблонные иконки для выбора"""
     name = models.CharField(max_length=50, verbose_name='Название', unique=True)
@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from main.serializers_base import ResponsiveImageField
 from .models import KGVehicle, KGVehicleImage, VehicleCardSpec, KGFeedback, KGHeroSlide
+from .specs import project_specs
 
 # ============================================
 # ОБЩИЕ ФУНКЦИИ
@@ -22,9 +24,11 @@ def validate_kg_phone(value):
 
 class KGVehicleImageSerializer(serializers.ModelSerializer):
     """Сериализатор для дополнительных фото"""
+    image_responsive = ResponsiveImageField(source='image')
+
     class Meta:
         model = KGVehicleImage
-        fields = ['id', 'image', 'alt', 'order']
+        fields = ['id', 'image', 'image_responsive', 'alt', 'order']
 
 
 # ============================================
@@ -65,174 +69,14 @@ class VehicleCardSpecSerializer(serializers.ModelSerializer):
 # ============================================
 
 class DetailedSpecsSerializer(serializers.Serializer):
-    """Детальные характеристики для страницы детализации"""
-    
-    # Основные
-    general = serializers.SerializerMethodField()
-    # Весовые
-    weight = serializers.SerializerMethodField()
-    # Кузов
-    body = serializers.SerializerMethodField()
-    # Двигатель
-    engine = serializers.SerializerMethodField()
-    # Трансмиссия
-    transmission = serializers.SerializerMethodField()
-    # Шины
-    tires = serializers.SerializerMethodField()
-    # Кабина
-    cabin = serializers.SerializerMethodField()
-    
-    def get_general(self, obj):
-        lang = self.context.get('lang', 'ru')
-        data = {}
-        
-        if obj.wheel_formula:
-            data['wheelFormula'] = obj.wheel_formula
-        
-        if lang == 'en' and obj.dimensions_en:
-            data['dimensions'] = obj.dimensions_en
-        elif lang == 'ky' and obj.dimensions_ky:
-            data['dimensions'] = obj.dimensions_ky
-        elif obj.dimensions_ru:
-            data['dimensions'] = obj.dimensions_ru
-        
-        if obj.wheelbase:
-            data['wheelbase'] = obj.wheelbase
-        
-        if lang == 'en' and obj.fuel_type_en:
-            data['fuelType'] = obj.fuel_type_en
-        elif lang == 'ky' and obj.fuel_type_ky:
-            data['fuelType'] = obj.fuel_type_ky
-        elif obj.fuel_type_ru:
-            data['fuelType'] = obj.fuel_type_ru
-        
-        if obj.tank_volume:
-            data['tankVolume'] = obj.tank_volume
-        
-        return data if data else None
-    
-    def get_weight(self, obj):
-        data = {}
-        
-        if obj.curb_weight:
-            data['curbWeight'] = obj.curb_weight
-        if obj.payload:
-            data['payload'] = obj.payload
-        if obj.gross_weight:
-            data['grossWeight'] = obj.gross_weight
-        
-        return data if data else None
-    
-    def get_body(self, obj):
-        lang = self.context.get('lang', 'ru')
-        data = {}
-        
-        if lang == 'en' and obj.body_type_en:
-            data['type'] = obj.body_type_en
-        elif lang == 'ky' and obj.body_type_ky:
-            data['type'] = obj.body_type_ky
-        elif obj.body_type_ru:
-            data['type'] = obj.body_type_ru
-        
-        if lang == 'en' and obj.body_dimensions_en:
-            data['dimensions'] = obj.body_dimensions_en
-        elif lang == 'ky' and obj.body_dimensions_ky:
-            data['dimensions'] = obj.body_dimensions_ky
-        elif obj.body_dimensions_ru:
-            data['dimensions'] = obj.body_dimensions_ru
-        
-        if obj.body_volume:
-            data['volume'] = obj.body_volume
-        
-        if lang == 'en' and obj.body_material_en:
-            data['material'] = obj.body_material_en
-        elif lang == 'ky' and obj.body_material_ky:
-            data['material'] = obj.body_material_ky
-        elif obj.body_material_ru:
-            data['material'] = obj.body_material_ru
-        
-        if lang == 'en' and obj.loading_type_en:
-            data['loadingType'] = obj.loading_type_en
-        elif lang == 'ky' and obj.loading_type_ky:
-            data['loadingType'] = obj.loading_type_ky
-        elif obj.loading_type_ru:
-            data['loadingType'] = obj.loading_type_ru
-        
-        return data if data else None
-    
-    def get_engine(self, obj):
-        data = {}
-        
-        if obj.engine_model:
-            data['model'] = obj.engine_model
-        if obj.engine_volume:
-            data['volume'] = obj.engine_volume
-        if obj.engine_power:
-            data['power'] = obj.engine_power
-        
-        return data if data else None
-    
-    def get_transmission(self, obj):
-        lang = self.context.get('lang', 'ru')
-        data = {}
-        
-        if obj.transmission_model:
-            data['model'] = obj.transmission_model
-        
-        if lang == 'en' and obj.transmission_type_en:
-            data['type'] = obj.transmission_type_en
-        elif lang == 'ky' and obj.transmission_type_ky:
-            data['type'] = obj.transmission_type_ky
-        elif obj.transmission_type_ru:
-            data['type'] = obj.transmission_type_ru
-        
-        if obj.gears:
-            data['gears'] = obj.gears
-        
-        return data if data else None
-    
-    def get_tires(self, obj):
-        lang = self.context.get('lang', 'ru')
-        data = {}
-        
-        if obj.tire_type:
-            data['type'] = obj.tire_type
-        
-        if lang == 'en' and obj.suspension_en:
-            data['suspension'] = obj.suspension_en
-        elif lang == 'ky' and obj.suspension_ky:
-            data['suspension'] = obj.suspension_ky
-        elif obj.suspension_ru:
-            data['suspension'] = obj.suspension_ru
-        
-        if lang == 'en' and obj.brakes_en:
-            data['brakes'] = obj.brakes_en
-        elif lang == 'ky' and obj.brakes_ky:
-            data['brakes'] = obj.brakes_ky
-        elif obj.brakes_ru:
-            data['brakes'] = obj.brakes_ru
-        
-        return data if data else None
-    
-    def get_cabin(self, obj):
-        lang = self.context.get('lang', 'ru')
-        data = {}
-        
-        if lang == 'en' and obj.cabin_category_en:
-            data['category'] = obj.cabin_category_en
-        elif lang == 'ky' and obj.cabin_category_ky:
-            data['category'] = obj.cabin_category_ky
-        elif obj.cabin_category_ru:
-            data['category'] = obj.cabin_category_ru
-        
-        if lang == 'en' and obj.cabin_equipment_en:
-            data['equipment'] = obj.cabin_equipment_en
-        elif lang == 'ky' and obj.cabin_equipment_ky:
-            data['equipment'] = obj.cabin_equipment_ky
-        elif obj.cabin_equipment_ru:
-            data['equipment'] = obj.cabin_equipment_ru
-        
-        return data if data else None
+    """Детальные характеристики для страницы детализации.
+
+    Секции general/weight/body/engine/transmission/tires/cabin собираются
+    по скомпилированной карте полей языка — kg/specs.py.
+    """
+
+    def to_representation(self, obj):
+        return project_specs(obj, self.context.get('lang', 'ru'))
 
 
 # ============================================
@@ -245,6 +89,7 @@ class KGVehicleListSerializer(serializers.ModelSerializer):
     slug = serializers.SerializerMethodField()
     card_specs = VehicleCardSpecSerializer(many=True, read_only=True)
     category_display = serializers.SerializerMethodField()
+    preview_image_responsive = ResponsiveImageField(source='preview_image')
     
     def get_title(self, obj):
         lang = self.context.get('lang', 'ru')
@@ -261,7 +106,7 @@ class KGVehicleListSerializer(serializers.ModelSerializer):
         model = KGVehicle
         fields = [
             'id', 'slug', 'title', 'category', 'category_display',
-            'preview_image', 'card_specs', 'is_active'
+            'preview_image', 'preview_image_responsive', 'card_specs', 'is_active'
         ]
 
 
@@ -277,6 +122,8 @@ class KGVehicleDetailSerializer(serializers.ModelSerializer):
     gallery_images = KGVehicleImageSerializer(many=True, source='mini_images', read_only=True)
     features = serializers.SerializerMethodField()
     detailed_specs = serializers.SerializerMethodField()
+    preview_image_responsive = ResponsiveImageField(source='preview_image')
+    main_image_responsive = ResponsiveImageField(source='main_image')
     
     def get_title(self, obj):
         lang = self.context.get('lang', 'ru')
@@ -291,15 +138,14 @@ class KGVehicleDetailSerializer(serializers.ModelSerializer):
         return obj.get_features()
     
     def get_detailed_specs(self, obj):
-        lang = self.context.get('lang', 'ru')
-        serializer = DetailedSpecsSerializer(obj, context={'lang': lang})
-        return serializer.data
+        return project_specs(obj, self.context.get('lang', 'ru'))
     
     class Meta:
         model = KGVehicle
         fields = [
             'id', 'slug', 'title', 'category',
             'preview_image', 'main_image',
+            'preview_image_responsive', 'main_image_responsive',
             'card_specs', 'gallery_images',
             'features', 'detailed_specs',
             'is_active'
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from main.services.media.derivatives import derivatives_generated
+
+from .models import KGHeroSlide, KGVehicle, KGVehicleImage, SpecTranslation, VehicleCardSpec
+
+
+# Словарь автоперевода — скомпилированная регулярка в каждом процессе
+# пересобирается по общей версии (main/utils/cache_versions.py). Версию
+# меняем после коммита: иначе другой воркер успеет собрать словарь без
+# правки под новой версией.
+@receiver(post_save, sender=SpecTranslation)
+@receiver(post_delete, sender=SpecTranslation)
+def bump_spec_translation_version(sender, instance, **kwargs):
+    from .spec_translation import bump_dictionary_version
+    transaction.on_commit(bump_dictionary_version)
+
+
+# Публичный API машин/слайдов отдаётся из кеша по версии контента
+# (kg/api_cache.py). Версию меняем после коммита — иначе параллельный
+# запрос успеет закешировать старые данные под новой версией.
+@receiver(post_save, sender=KGVehicle)
+@receiver(post_delete, sender=KGVehicle)
+@receiver(post_save, sender=VehicleCardSpec)
+@receiver(post_delete, sender=VehicleCardSpec)
+@receiver(post_save, sender=KGVehicleImage)
+@receiver(post_delete, sender=KGVehicleImage)
+@receiver(post_save, sender=KGHeroSlide)
+@receiver(post_delete, sender=KGHeroSlide)
+def bump_api_content_version(sender, instance, **kwargs):
+    from .api_cache import bump_content_version
+    transaction.on_commit(bump_content_version)
+
+
+# Производные картинок генерируются в фоне уже после коммита. JSON,
+# собранный до их появления, хранит пустой srcset — по окончании генерации
+# меняем версию API.
+@receiver(derivatives_generated, sender=KGVehicle)
+@receiver(derivatives_generated, sender=KGVehicleImage)
+def refresh_api_after_derivatives(sender, instance, **kwargs):
+    from .api_cache import bump_content_version
+    bump_content_version()
@@ -0,0 +1,127 @@
+"""Автоперевод характеристик карточки KG (VehicleCardSpec.value_ru → ky/en).
+
+Словарь — таблица SpecTranslation (редактируется в админке). Раньше
+auto_translate на каждый вызов собирал dict-литерал и прогонял str.replace
+по всем терминам, а save() вызывал его дважды. Теперь словарь один раз
+компилируется в регулярку-альтернацию (длинные термины первыми, чтобы
+«л.с.» не превращалось в «л» + «.с.») и переводит строку за один проход.
+
+Скомпилированный словарь живёт в процессе и пересобирается, когда меняется
+версия словаря (правка SpecTranslation → kg/signals.py, после коммита).
+Версия общая для всех воркеров (main/utils/cache_versions.py): правка из
+другого воркера доходит не позже чем через CHECK_INTERVAL секунд, своя
+применяется сразу.
+
+Перевести все сохранённые характеристики заново:
+    python manage.py retranslate_specs
+"""
+
+import re
+
+from django.db import transaction
+from django.utils import timezone
+
+from main.utils.cache_versions import KG_SPEC_DICTIONARY, bump_version, get_version
+
+from .api_cache import bump_content_version
+
+LANGS = ('ky', 'en')
+
+# Граница термина — соседняя буква: «л» в «150л» переводим, в «Полный» — нет
+_NOT_LETTER_BEFORE = r'(?<![^\W\d_])'
+_NOT_LETTER_AFTER = r'(?![^\W\d_])'
+
+_compiled = {'version': None, 'translator': None}
+
+
+def dictionary_version():
+    return get_version(KG_SPEC_DICTIONARY)
+
+
+def bump_dictionary_version():
+    bump_version(KG_SPEC_DICTIONARY)
+
+
+def clean_text(text):
+    """Очистка битых символов из старых импортов (латинская L вместо «л», запятые)."""
+    return text.strip().replace('L', 'л').replace(',', '')
+
+
+def _term_pattern(term):
+    pattern = re.escape(term)
+    if term[0].isalpha():
+        pattern = _NOT_LETTER_BEFORE + pattern
+    if term[-1].isalpha():
+        pattern += _NOT_LETTER_AFTER
+    return pattern
+
+
+class SpecTranslator:
+    """Словарь, скомпилированный в одну регулярку на все термины."""
+
+    def __init__(self, entries):
+        # entries: [(source, text_ky, text_en), ...]
+        self.tables = {lang: {} for lang in LANGS}
+        for source, text_ky, text_en in entries:
+            self.tables['ky'][source] = text_ky
+            self.tables['en'][source] = text_en
+        terms = sorted(self.tables['ky'], key=len, reverse=True)
+        self.pattern = re.compile('|'.join(map(_term_pattern, terms))) if terms else None
+
+    def translate(self, text, lang):
+        text = clean_text(text)
+        table = self.tables.get(lang)
+        if table is None:
+            return text
+        if text in table:
+            return table[text]
+        if self.pattern is None:
+            return text
+        return self.pattern.sub(lambda match: table[match.group(0)], text)
+
+
+def get_translator():
+    version = dictionary_version()
+    if _compiled['version'] != version:
+        from .models import SpecTranslation
+        entries = SpecTranslation.objects.order_by().values_list('source', 'text_ky', 'text_en')
+        _compiled['translator'] = SpecTranslator(list(entries))
+        _compiled['version'] = version
+    return _compiled['translator']
+
+
+def translate(text, lang):
+    return get_translator().translate(text, lang)
+
+
+def retranslate_specs(queryset=None, batch_size=500, dry_run=False):
+    """Перевести value_ky/value_en заново по текущему словарю.
+
+    Сохраняются только изменившиеся строки — bulk_update пачками. Машинам
+    с изменёнными характеристиками сдвигается updated_at (bulk_update
+    не шлёт сигналов, а по нему устаревает кеш JSON машины), и меняется
+    версия контента публичного API.
+    Возвращает число изменённых характеристик.
+    """
+    from .models import KGVehicle, VehicleCardSpec
+
+    if queryset is None:
+        queryset = VehicleCardSpec.objects.all()
+    translator = get_translator()
+
+    changed, vehicle_ids = [], set()
+    for spec in queryset.only('id', 'vehicle_id', 'value_ru', 'value_ky', 'value_en').iterator(chunk_size=batch_size):
+        if not spec.value_ru:
+            continue
+        value_ky = translator.translate(spec.value_ru, 'ky')
+        value_en = translator.translate(spec.value_ru, 'en')
+        if (value_ky, value_en) != (spec.value_ky, spec.value_en):
+            spec.value_ky, spec.value_en = value_ky, value_en
+            changed.append(spec)
+            vehicle_ids.add(spec.vehicle_id)
+
+    if changed and not dry_run:
+        VehicleCardSpec.objects.bulk_update(changed, ['value_ky', 'value_en'], batch_size=batch_size)
+        KGVehicle.objects.filter(pk__in=vehicle_ids).update(updated_at=timezone.now())
+        transaction.on_commit(bump_content_version)
+    return len(changed)
@@ -0,0 +1,87 @@
+"""Детальные характеристики KG-машины: табличная проекция вместо if/elif.
+
+SPEC_SECTIONS описывает секции один раз; spec_map(lang) компилирует её в
+кортежи имён атрибутов для языка (переводимое поле: сначала <поле>_<lang>,
+потом <поле>_ru) и кеширует на процесс. project_specs() только читает
+атрибуты по готовой карте.
+"""
+
+from functools import lru_cache
+
+TRANSLATED_LANGS = ('ky', 'en')
+
+# (секция, ((ключ в JSON, поле модели, переводимое), ...)) — порядок ключей как в API
+SPEC_SECTIONS = (
+    ('general', (
+        ('wheelFormula', 'wheel_formula', False),
+        ('dimensions', 'dimensions', True),
+        ('wheelbase', 'wheelbase', False),
+        ('fuelType', 'fuel_type', True),
+        ('tankVolume', 'tank_volume', False),
+    )),
+    ('weight', (
+        ('curbWeight', 'curb_weight', False),
+        ('payload', 'payload', False),
+        ('grossWeight', 'gross_weight', False),
+    )),
+    ('body', (
+        ('type', 'body_type', True),
+        ('dimensions', 'body_dimensions', True),
+        ('volume', 'body_volume', False),
+        ('material', 'body_material', True),
+        ('loadingType', 'loading_type', True),
+    )),
+    ('engine', (
+        ('model', 'engine_model', False),
+        ('volume', 'engine_volume', False),
+        ('power', 'engine_power', False),
+    )),
+    ('transmission', (
+        ('model', 'transmission_model', False),
+        ('type', 'transmission_type', True),
+        ('gears', 'gears', False),
+    )),
+    ('tires', (
+        ('type', 'tire_type', False),
+        ('suspension', 'suspension', True),
+        ('brakes', 'brakes', True),
+    )),
+    ('cabin', (
+        ('category', 'cabin_category', True),
+        ('equipment', 'cabin_equipment', True),
+    )),
+)
+
+
+@lru_cache(maxsize=None)
+def spec_map(lang):
+    """((секция, ((ключ, (атрибут, запасной атрибут...)), ...)), ...) для языка."""
+    lang = lang if lang in TRANSLATED_LANGS else 'ru'
+    compiled = []
+    for section, fields in SPEC_SECTIONS:
+        entries = []
+        for key, field, translated in fields:
+            if not translated:
+                attrs = (field,)
+            elif lang == 'ru':
+                attrs = (f'{field}_ru',)
+            else:
+                attrs = (f'{field}_{lang}', f'{field}_ru')
+            entries.append((key, attrs))
+        compiled.append((section, tuple(entries)))
+    return tuple(compiled)
+
+
+def project_specs(vehicle, lang='ru'):
+    """{'general': {...} | None, 'weight': ..., ...} — пустые значения пропускаются."""
+    result = {}
+    for section, entries in spec_map(lang):
+        data = {}
+        for key, attrs in entries:
+            for attr in attrs:
+                value = getattr(vehicle, attr)
+                if value:
+                    data[key] = value
+                    break
+        result[section] = data or None
+    return result
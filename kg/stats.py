@@ -0,0 +1,135 @@
+# kg/stats.py
+"""Статистика заявок faw.kg (KGFeedbackViewSet.statistics, kg_dashboard.html).
+
+Раньше каждый вызов = 6 отдельных COUNT (3 статуса + сегодня/неделя/месяц),
+4 GROUP BY и выборка 100 строк. Теперь:
+  - статусы и периоды — ОДИН запрос с условной агрегацией Count(filter=Q(...));
+  - разбивки (регионы, машины, менеджеры, приоритеты) — кеш на минуту
+    по набору фильтров: дашборд перерисовывается часто, а цифры там «примерные»;
+  - fields= — какие секции считать вообще (дашборд берёт только четыре).
+
+    build_statistics(queryset, filters, fields={'by_status', 'time_periods'})
+"""
+
+import hashlib
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+BREAKDOWN_CACHE_TTL = 60
+
+COUNT_SECTIONS = ('by_status', 'time_periods')
+BREAKDOWN_SECTIONS = ('by_region', 'by_vehicle', 'by_manager', 'by_priority')
+SECTIONS = COUNT_SECTIONS + BREAKDOWN_SECTIONS + ('feedbacks_list',)
+
+FILTER_PARAMS = ('start_date', 'end_date', 'region')
+
+
+def parse_fields(raw):
+    """'by_status,time_periods' → set секций. Пусто → все. Неизвестная секция → ValueError."""
+    if not raw:
+        return set(SECTIONS)
+    fields = {f.strip() for f in raw.split(',') if f.strip()}
+    unknown = fields - set(SECTIONS)
+    if unknown:
+        raise ValueError(
+            f'Неизвестные секции: {", ".join(sorted(unknown))}. Доступны: {", ".join(SECTIONS)}'
+        )
+    return fields
+
+
+def filter_queryset(queryset, filters):
+    if filters.get('start_date'):
+        queryset = queryset.filter(created_at__gte=filters['start_date'])
+    if filters.get('end_date'):
+        queryset = queryset.filter(created_at__lte=filters['end_date'])
+    if filters.get('region'):
+        queryset = queryset.filter(region=filters['region'])
+    return queryset
+
+
+def _counts(queryset, fields):
+    """Статусы и периоды одним SELECT COUNT(*) FILTER (WHERE ...)."""
+    now = timezone.now()
+    today = timezone.localdate()
+    aggregates = {}
+    if 'by_status' in fields:
+        aggregates.update(
+            new=Count('id', filter=Q(status='new')),
+            in_process=Count('id', filter=Q(status='in_process')),
+            processed=Count('id', filter=Q(status='done')),
+        )
+    if 'time_periods' in fields:
+        aggregates.update(
+            today=Count('id', filter=Q(created_at__date=today)),
+            this_week=Count('id', filter=Q(created_at__gte=now - timedelta(days=7))),
+            this_month=Count('id', filter=Q(created_at__year=today.year, created_at__month=today.month)),
+        )
+    if not aggregates:
+        return {}
+
+    row = queryset.order_by().aggregate(**aggregates)
+    result = {}
+    if 'by_status' in fields:
+        result['by_status'] = {k: row[k] for k in ('new', 'in_process', 'processed')}
+    if 'time_periods' in fields:
+        result['time_periods'] = {k: row[k] for k in ('today', 'this_week', 'this_month')}
+    return result
+
+
+def _breakdown(queryset, section):
+    if section == 'by_region':
+        qs = queryset.values('region')
+    elif section == 'by_vehicle':
+        qs = queryset.filter(vehicle__isnull=False).values('vehicle__id', 'vehicle__title_ru')
+    elif section == 'by_manager':
+        qs = queryset.filter(manager__isnull=False).values('manager__id', 'manager__username')
+    else:
+        qs = queryset.values('priority')
+    qs = qs.annotate(count=Count('id')).order_by('-count')
+    if section == 'by_vehicle':
+        qs = qs[:5]
+    return list(qs)
+
+
+def _breakdown_cache_key(filters, section):
+    raw = '|'.join(str(filters.get(name) or '') for name in FILTER_PARAMS)
+    return f'kg_stats_{section}_{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def _breakdowns(queryset, filters, fields):
+    sections = [s for s in BREAKDOWN_SECTIONS if s in fields]
+    keys = {s: _breakdown_cache_key(filters, s) for s in sections}
+    cached = cache.get_many(keys.values()) if keys else {}
+
+    result, missed = {}, {}
+    for section in sections:
+        key = keys[section]
+        if key in cached:
+            result[section] = cached[key]
+        else:
+            result[section] = missed[key] = _breakdown(queryset, section)
+    if missed:
+        cache.set_many(missed, BREAKDOWN_CACHE_TTL)
+    return result
+
+
+def _feedbacks_list(queryset):
+    return list(
+        queryset.values(
+            'id', 'name', 'phone', 'region', 'vehicle__title_ru',
+            'status', 'priority', 'manager__username', 'created_at',
+        ).order_by('-created_at')[:100]
+    )
+
+
+def build_statistics(queryset, filters, fields=SECTIONS):
+    """Словарь секций статистики. filters — {start_date, end_date, region}."""
+    queryset = filter_queryset(queryset, filters)
+    stats = _counts(queryset, fields)
+    stats.update(_breakdowns(queryset, filters, fields))
+    if 'feedbacks_list' in fields:
+        stats['feedbacks_list'] = _feedbacks_list(queryset)
+    return stats
@@ -3,11 +3,15 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAdminUser, BasePermission
 from datetime import datetime
-from django.http import HttpResponse, Http404
+from django.http import HttpResponse, HttpResponsePermanentRedirect, Http404
 from django.db import models
 from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
 from django.contrib.admin.views.decorators import staff_member_required
 from .models import KGVehicle, KGFeedback, KGHeroSlide
+from .api_cache import CachedPublicReadMixin
+from .stats import FILTER_PARAMS, build_statistics, parse_fields
+from main.utils.roles import get_roles
 from .serializers import (
     KGVehicleListSerializer,
     KGVehicleDetailSerializer,
@@ -29,8 +33,8 @@ class IsSuperUser(BasePermission):
 # VIEWSET: МАШИНЫ (КАТАЛОГ)
 # ============================================
 
-class KGVehicleViewSet(viewsets.ReadOnlyModelViewSet):
-    """API для машин FAW.KG"""
+class KGVehicleViewSet(CachedPublicReadMixin, viewsets.ReadOnlyModelViewSet):
+    """API для машин FAW.KG (ответы из кеша + ETag — kg/api_cache.py)"""
     queryset = KGVehicle.objects.filter(is_active=True).select_related().prefetch_related(
         'mini_images',
         'card_specs'
@@ -40,16 +44,14 @@ class KGVehicleViewSet(viewsets.ReadOnlyModelViewSet):
     
     def get_object(self):
         """
-        Ищем машину по любому из slug (ru/ky/en)
+        Ищем машину по любому из slug (ru/ky/en) — одной пробой по уникальному
+        индексу KGVehicleSlug. Старый адрес → retrieve() отдаёт 301.
         """
         lookup_value = self.kwargs.get(self.lookup_field)
         
-        queryset = self.get_queryset()
-        obj = queryset.filter(
-            models.Q(slug=lookup_value) |
-            models.Q(slug_ru=lookup_value) |
-            models.Q(slug_ky=lookup_value) |
-            models.Q(slug_en=lookup_value)
+        obj = self.get_queryset().filter(slug_aliases__slug=lookup_value).annotate(
+            alias_is_current=models.F('slug_aliases__is_current'),
+            alias_lang=models.F('slug_aliases__lang'),
         ).first()
         
         if not obj:
@@ -57,15 +59,22 @@ class KGVehicleViewSet(viewsets.ReadOnlyModelViewSet):
         
         return obj
     
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, self._retrieve, *args, **kwargs)
+    
+    def _retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        if not instance.alias_is_current:
+            url = reverse('kg-vehicles-detail', kwargs={'slug': instance.get_slug(instance.alias_lang or 'ru')})
+            query = request.META.get('QUERY_STRING')
+            return HttpResponsePermanentRedirect(f'{url}?{query}' if query else url)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+    
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return KGVehicleDetailSerializer
         return KGVehicleListSerializer
-    
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['lang'] = self.request.query_params.get('lang', 'ru')
-        return context
 
 
 # ============================================
@@ -103,109 +112,30 @@ class KGFeedbackViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
     def statistics(self, request):
-        """Статистика с фильтрами"""
-        from datetime import timedelta
-        from django.db.models import Count
-        from django.utils import timezone
-        
-        # ============ ФИЛЬТРЫ ============
-        queryset = self.queryset
-        
-        # Фильтр по датам
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        
-        if start_date:
-            queryset = queryset.filter(created_at__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(created_at__lte=end_date)
-        
-        # Фильтр по региону
-        region = request.query_params.get('region')
-        if region:
-            queryset = queryset.filter(region=region)
-        
-        # ============ СТАТИСТИКА ============
-        # По статусам
-        new = queryset.filter(status='new').count()
-        in_process = queryset.filter(status='in_process').count()
-        processed = queryset.filter(status='done').count()
-        
-        # Временные периоды
-        now = timezone.now()
-        today = queryset.filter(created_at__date=now.date()).count()
-        this_week = queryset.filter(created_at__gte=now - timedelta(days=7)).count()
-        this_month = queryset.filter(
-            created_at__month=now.month,
-            created_at__year=now.year
-        ).count()
-        
-        # По регионам
-        by_region = queryset.values('region').annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        # По машинам
-        by_vehicle = queryset.filter(vehicle__isnull=False).values(
-            'vehicle__id', 'vehicle__title_ru'
-        ).annotate(count=Count('id')).order_by('-count')[:5]
-        
-        # По менеджерам
-        by_manager = queryset.filter(manager__isnull=False).values(
-            'manager__id', 'manager__username'
-        ).annotate(count=Count('id')).order_by('-count')
-        
-        # По приоритетам
-        by_priority = queryset.values('priority').annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        # Список заявок для таблицы
-        feedbacks_list = queryset.select_related('vehicle', 'manager').values(
-            'id',
-            'name',
-            'phone',
-            'region',
-            'vehicle__title_ru',
-            'status',
-            'priority',
-            'manager__username',
-            'created_at'
-        ).order_by('-created_at')[:100]
-        
-        return Response({
-            'by_status': {
-                'new': new,
-                'in_process': in_process,
-                'processed': processed
-            },
-            'time_periods': {
-                'today': today,
-                'this_week': this_week,
-                'this_month': this_month
-            },
-            'by_region': list(by_region),
-            'by_vehicle': list(by_vehicle),
-            'by_manager': list(by_manager),
-            'by_priority': list(by_priority),
-            'feedbacks_list': list(feedbacks_list)
-        })
+        """Статистика с фильтрами.
+
+        ?start_date=&end_date=&region= — фильтры,
+        ?fields=by_status,time_periods — только нужные секции (по умолчанию все).
+        Расчёт — kg/stats.py.
+        """
+        try:
+            fields = parse_fields(request.query_params.get('fields'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        filters = {name: request.query_params.get(name) for name in FILTER_PARAMS}
+        return Response(build_statistics(KGFeedback.objects.all(), filters, fields))
 
 
 # ============================================
 # VIEWSET: HERO-СЛАЙДЫ
 # ============================================
 
-class KGHeroSlideViewSet(viewsets.ReadOnlyModelViewSet):
-    """API для Hero-слайдов"""
+class KGHeroSlideViewSet(CachedPublicReadMixin, viewsets.ReadOnlyModelViewSet):
+    """API для Hero-слайдов (ответы из кеша + ETag — kg/api_cache.py)"""
     queryset = KGHeroSlide.objects.filter(is_active=True).select_related('vehicle')
     serializer_class = KGHeroSlideSerializer
     permission_classes = [AllowAny]
-    
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['lang'] = self.request.query_params.get('lang', 'ru')
-        return context
 
 
 # ============================================
@@ -265,9 +195,9 @@ class KGFeedbackQuickUpdateViewSet(viewsets.ViewSet):
 @staff_member_required
 def kg_stats_dashboard(request):
     # ✅ ДОСТУП: суперюзеры + группы + право просмотра заявок
-    if not (request.user.is_superuser or 
-            request.user.groups.filter(name__in=['Главные админы', 'Лиды KG', 'Лиды UZ+KG']).exists() or
-            request.user.has_perm('kg.view_kgfeedback')):  # 👈 Используем встроенное право
+    roles = get_roles(request)
+    if not (roles.in_groups('Главные админы', 'Лиды KG', 'Лиды UZ+KG') or
+            roles.has_perm('kg.view_kgfeedback')):  # 👈 Используем встроенное право
         
         from django.http import HttpResponseForbidden
         return HttpResponseForbidden(
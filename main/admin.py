@@ -4,6 +4,7 @@ import json
 import logging
 import openpyxl
 import os
+import re
 from datetime import datetime, timedelta
 from urllib.parse import unquote
 
@@ -56,8 +57,8 @@ from .models import (
     ProductWishlist, ProductViewHistory, BotContacts,
     TeamDepartment, TeamMember, TeamMemberLink, NavItem, SocialLink,
     DealerProfile,
-    SparePart, SparePartImage, SparePartType,
-    Invoice, InvoiceItem,
+    SparePart, SparePartImage, SparePartType, normalize_phone,
+    Invoice, InvoiceItem, StockMovement,
 )
 from .forms import PageMetaAdminForm, DealerProfileAdminForm, SparePartAdminForm
 from main.services.amocrm.token_manager import TokenManager
@@ -65,6 +66,9 @@ from main.services.amocrm.lead_sender import LeadSender
 from main.services.dashboard.analytics import calculate_kpi
 from main.services.dashboard.charts import get_chart_data
 from main.services.dashboard.insights import generate_insights
+from main.services.dashboard.products import product_labels
+from main.utils.admin_paginator import EstimatedCountAdminMixin
+from main.utils.roles import get_roles
 
 logger = logging.getLogger('bot')
 
@@ -74,67 +78,58 @@ admin.site.index_title = "Управление сайтами FAW"
 
 
 class ContentAdminMixin:
+    # Группы/права — из get_roles(): один запрос на весь рендер админки, а не на каждую модель
+    content_groups = ('Главные админы', 'Контент-админы', 'Контент UZ', 'Контент UZ+KG')
+    content_models = (
+        'news', 'product', 'vacancy', 'dealer', 'dealerservice',
+        'featureicon', 'becomeadealerpage',
+    )
 
     def has_module_permission(self, request):
-        if request.user.is_superuser:
-            return True
-        if request.user.groups.filter(
-            name__in=['Главные админы', 'Контент-админы', 'Контент UZ', 'Контент UZ+KG']
-        ).exists():
+        roles = get_roles(request)
+        if roles.in_groups(*self.content_groups):
             return True
-        content_models = [
-            'news', 'product', 'vacancy', 'dealer', 'dealerservice',
-            'featureicon', 'becomeadealerpage',
-        ]
-        return any(request.user.has_perm(f'main.view_{m}') for m in content_models)
+        return roles.has_any_perm(*(f'main.view_{m}' for m in self.content_models))
 
     def has_change_permission(self, request, obj=None):
-        if request.user.is_superuser:
-            return True
-        if request.user.groups.filter(
-            name__in=['Главные админы', 'Контент-админы', 'Контент UZ', 'Контент UZ+KG']
-        ).exists():
+        roles = get_roles(request)
+        if roles.in_groups(*self.content_groups):
             return True
         model_name = self.model._meta.model_name
-        return request.user.has_perm(f'main.change_{model_name}')
+        return roles.has_perm(f'main.change_{model_name}')
 
     def has_delete_permission(self, request, obj=None):
-        if request.user.is_superuser:
-            return True
-        if request.user.groups.filter(name='Главные админы').exists():
+        roles = get_roles(request)
+        if roles.in_groups('Главные админы'):
             return True
         model_name = self.model._meta.model_name
-        return request.user.has_perm(f'main.delete_{model_name}')
+        return roles.has_perm(f'main.delete_{model_name}')
 
 
 class LeadManagerMixin:
+    lead_groups = ('Главные админы', 'Лид-менеджеры', 'Лиды UZ', 'Лиды UZ+KG')
+    lead_models = ('contactform', 'jobapplication', 'becomeadealerapplication')
+
     def has_module_permission(self, request):
-        if request.user.is_superuser:
+        roles = get_roles(request)
+        if roles.in_groups(*self.lead_groups):
             return True
-        if request.user.groups.filter(
-            name__in=['Главные админы', 'Лид-менеджеры', 'Лиды UZ', 'Лиды UZ+KG']
-        ).exists():
-            return True
-        lead_models = ['contactform', 'jobapplication', 'becomeadealerapplication']
-        return any(request.user.has_perm(f'main.view_{m}') for m in lead_models)
+        return roles.has_any_perm(*(f'main.view_{m}' for m in self.lead_models))
 
     def has_add_permission(self, request):
         return False
 
     def has_delete_permission(self, request, obj=None):
-        if request.user.is_superuser:
-            return True
-        if request.user.groups.filter(name='Главные админы').exists():
+        roles = get_roles(request)
+        if roles.in_groups('Главные админы'):
             return True
         model_name = self.model._meta.model_name
-        return request.user.has_perm(f'main.delete_{model_name}')
+        return roles.has_perm(f'main.delete_{model_name}')
 
 
 class AmoCRMAdminMixin:
     def has_module_permission(self, request):
-        if request.user.is_superuser:
-            return True
-        return request.user.groups.filter(name='Главные админы').exists()
+        return get_roles(request).in_groups('Главные админы')
 
     def has_view_permission(self, request, obj=None):
         return self.has_module_permission(request)
@@ -311,7 +306,7 @@ class NewsAdmin(ContentAdminMixin, CustomReversionMixin, VersionAdmin, TabbedTra
 
 
 @admin.register(ContactForm)
-class ContactFormAdmin(LeadManagerMixin, admin.ModelAdmin):
+class ContactFormAdmin(EstimatedCountAdminMixin, LeadManagerMixin, admin.ModelAdmin):
     change_list_template = 'main/contactform/change_list.html'
     preserve_filters = True
     list_select_related = ['manager']
@@ -518,14 +513,33 @@ class ContactFormAdmin(LeadManagerMixin, admin.ModelAdmin):
                 setattr(formfield.widget, attr, False)
         return formfield
 
+    # Похоже на телефон: цифры, пробелы, +, -, скобки
+    _PHONE_QUERY_RE = re.compile(r'^[\d\s+\-()]+$')
+
+    def _is_phone_query(self, search_query):
+        return bool(self._PHONE_QUERY_RE.match(search_query)) and len(normalize_phone(search_query)) >= 3
+
+    def _search_q(self, search_query):
+        """Имя и ID amoCRM — icontains (trigram-индексы). Телефон — одним OR:
+        префикс по phone_normalized (btree; '90 123' находит и '998901234567')
+        и цифры в любом месте номера (trigram; '555 55 55' находит '998935555555')."""
+        condition = Q(name__icontains=search_query) | Q(amocrm_lead_id__icontains=search_query)
+        if self._is_phone_query(search_query):
+            digits = normalize_phone(search_query)
+            condition |= Q(phone_normalized__startswith=digits) | Q(phone_normalized__contains=digits)
+            if not digits.startswith('998'):
+                condition |= Q(phone_normalized__startswith='998' + digits)
+        return condition
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск уже применён в get_queryset() (_search_q); search_fields — только ради поля поиска.
+        # Стандартный поиск добавил бы phone__icontains по каждому слову — полный скан
+        return queryset, False
+
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         if search_query := request.GET.get('q', '').strip():
-            qs = qs.filter(
-                Q(name__icontains=search_query) |
-                Q(phone__icontains=search_query) |
-                Q(amocrm_lead_id__icontains=search_query)
-            )
+            qs = qs.filter(self._search_q(search_query))
         for field in ('status', 'amocrm_status', 'priority', 'region'):
             if val := request.GET.get(field, '').strip():
                 qs = qs.filter(**{field: val})
@@ -562,10 +576,7 @@ class ContactFormAdmin(LeadManagerMixin, admin.ModelAdmin):
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
         extra_context['regions'] = REGION_CHOICES
-        extra_context['products'] = list(
-            ContactForm.objects.exclude(product__isnull=True).exclude(product='')
-            .values_list('product', flat=True).distinct().order_by('product')
-        )
+        extra_context['products'] = product_labels()
         return super().changelist_view(request, extra_context)
 
     def get_urls(self):
@@ -917,9 +928,7 @@ class ProductCategoryFilter(admin.SimpleListFilter):
 
     def queryset(self, request, queryset):
         if self.value():
-            return queryset.filter(
-                Q(category=self.value()) | Q(categories__contains=self.value())
-            )
+            return queryset.filter(category_links__category=self.value())
         return queryset
 
 
@@ -1150,6 +1159,26 @@ class InvoiceAdmin(admin.ModelAdmin):
         )
 
 
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    """Журнал движений склада — только просмотр."""
+    list_display    = ('created_at', 'part', 'kind', 'delta', 'quantity_after', 'author', 'comment')
+    list_filter     = ('kind',)
+    search_fields   = ('part__part_number', 'comment')
+    date_hierarchy  = 'created_at'
+    list_select_related = ('part', 'author')
+    readonly_fields = ('part', 'kind', 'delta', 'quantity_after', 'author', 'comment', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(SparePart)
 class SparePartAdmin(TabbedTranslationAdmin):
     form            = SparePartAdminForm
@@ -1178,6 +1207,28 @@ class SparePartAdmin(TabbedTranslationAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        # Новая запчасть — начальный остаток пишет сигнал
+        if not change:
+            super().save_model(request, obj, form, change)
+            return
+        # quantity обычным save не пишем: форма могла открыться до продажи/импорта,
+        # и её значение затёрло бы их. Остаток ставит adjust_stock — под
+        # блокировкой строки, с дельтой от текущего значения в БД.
+        quantity = obj.quantity
+        obj.save(update_fields=[
+            f.name for f in obj._meta.concrete_fields if not f.primary_key and f.name != 'quantity'
+        ])
+        if 'quantity' in form.changed_data:
+            from main.services.shop.stock import adjust_stock
+            result, = adjust_stock(
+                [{'part_id': obj.pk, 'quantity': quantity}], comment=f'Админка: {request.user.username}',
+            )
+            if result['ok']:
+                obj.quantity = result['quantity']
+            else:
+                self.message_user(request, f'{obj.part_number}: {result["error"]}', level=messages.ERROR)
+
 
 @admin.register(Product)
 class ProductAdmin(ContentAdminMixin, CustomReversionMixin, VersionAdmin, TabbedTranslationAdmin):
@@ -1414,11 +1465,8 @@ class DashboardAdmin(admin.ModelAdmin):
         return self.has_module_permission(request)
 
     def has_module_permission(self, request):
-        if request.user.is_superuser:
-            return True
-        if request.user.groups.filter(name__in=['Главные админы', 'Лид-менеджеры']).exists():
-            return True
-        return request.user.has_perm('main.view_dashboard')
+        roles = get_roles(request)
+        return roles.in_groups('Главные админы', 'Лид-менеджеры') or roles.has_perm('main.view_dashboard')
 
     def get_urls(self):
         return [
@@ -1428,11 +1476,7 @@ class DashboardAdmin(admin.ModelAdmin):
         ] + super().get_urls()
 
     def get_products_api(self, request):
-        products = (
-            ContactForm.objects.exclude(Q(product__isnull=True) | Q(product=''))
-            .values_list('product', flat=True).distinct().order_by('product')
-        )
-        return JsonResponse({'success': True, 'products': list(products)})
+        return JsonResponse({'success': True, 'products': product_labels()})
 
     @method_decorator(never_cache)
     def changelist_view(self, request, extra_context=None):
@@ -1783,7 +1827,7 @@ class FAQItemAdmin(TabbedTranslationAdmin):
 # ========== TELEGRAM BOT ADMIN ==========
 
 @admin.register(TelegramUser)
-class TelegramUserAdmin(admin.ModelAdmin):
+class TelegramUserAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = ['telegram_id', 'full_name', 'phone', 'region', 'language', 'status', 'total_requests', 'is_blocked', 'last_active']
     list_filter = ['language', 'status', 'region', 'is_blocked', 'notifications_enabled']
     search_fields = ['telegram_id', 'username', 'first_name', 'last_name', 'phone']
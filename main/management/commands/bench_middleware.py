@@ -0,0 +1,108 @@
+# main/management/commands/bench_middleware.py
+"""Микробенчмарк наших middleware (myproject/middleware.py).
+
+Гоняет WWWRedirect / AutoLanguage / ForceRussian — по отдельности и цепочкой —
+на типовом наборе запросов (страницы сайта с cookie и без, Accept-Language,
+боты, API, админка, статика) с заглушкой вместо view. Печатает накладные
+расходы в микросекундах на запрос (лучший из --repeat прогонов).
+
+    python manage.py bench_middleware
+    python manage.py bench_middleware --iterations 20000 --repeat 7
+"""
+
+import timeit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils import translation
+
+from myproject.middleware import AutoLanguageMiddleware, ForceRussianMiddleware, WWWRedirectMiddleware
+
+BROWSER_UA = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+)
+BOT_UA = 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
+
+# (путь, Accept-Language, User-Agent, cookie языка)
+SCENARIOS = [
+    ('/', 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7', BROWSER_UA, None),
+    ('/', 'uz-UZ,uz;q=0.9', BROWSER_UA, 'uz'),
+    ('/products/', 'ru-RU,ru;q=0.9', BROWSER_UA, 'uz'),
+    ('/ru/products/tiger-vh/', 'ru-RU,ru;q=0.9', BROWSER_UA, 'ru'),
+    ('/en/about/', 'en-US,en;q=0.9', BROWSER_UA, 'ru'),
+    ('/', 'ru-RU,ru;q=0.9', BOT_UA, None),
+    ('/api/products/', 'ru-RU,ru;q=0.9', BROWSER_UA, 'ru'),
+    ('/api/ru/news/', 'ru-RU,ru;q=0.9', BROWSER_UA, 'ru'),
+    ('/api/kg/vehicles/', 'ky-KG,ky;q=0.9', BROWSER_UA, 'ky'),
+    ('/admin/main/contactform/', 'ru-RU,ru;q=0.9', BROWSER_UA, 'ru'),
+    ('/static/css/style.css', 'ru-RU,ru;q=0.9', BROWSER_UA, 'ru'),
+]
+
+
+def _requests():
+    factory = RequestFactory()
+    result = []
+    for path, accept, ua, cookie in SCENARIOS:
+        request = factory.get(path, HTTP_ACCEPT_LANGUAGE=accept, HTTP_USER_AGENT=ua, HTTP_HOST='faw.uz')
+        if cookie:
+            request.COOKIES[settings.LANGUAGE_COOKIE_NAME] = cookie
+        request.session = {}
+        result.append(request)
+    return result
+
+
+def _view(request):
+    return HttpResponse()
+
+
+def _chain(*middleware_classes):
+    handler = _view
+    for middleware in reversed(middleware_classes):
+        handler = middleware(handler)
+    return handler
+
+
+class Command(BaseCommand):
+    help = 'Микробенчмарк language/redirect middleware: мкс на запрос'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000,
+                            help='Проходов по набору запросов в одном прогоне (по умолчанию 5000)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Число прогонов, берётся лучший (по умолчанию 5)')
+
+    def handle(self, *args, **options):
+        requests = _requests()
+        iterations, repeat = options['iterations'], options['repeat']
+        total = iterations * len(requests)
+
+        cases = [
+            ('заглушка view', _view),
+            ('WWWRedirectMiddleware', _chain(WWWRedirectMiddleware)),
+            ('AutoLanguageMiddleware', _chain(AutoLanguageMiddleware)),
+            ('ForceRussianMiddleware', _chain(ForceRussianMiddleware)),
+            ('цепочка', _chain(WWWRedirectMiddleware, AutoLanguageMiddleware, ForceRussianMiddleware)),
+        ]
+        self.stdout.write(f'Запросов в наборе: {len(requests)}, всего на прогон: {total}')
+
+        baseline = None
+        try:
+            for name, handler in cases:
+                def run():
+                    for request in requests:
+                        handler(request)
+
+                best = min(timeit.repeat(run, number=iterations, repeat=repeat))
+                per_request = best / total * 1_000_000
+                if baseline is None:
+                    baseline = per_request
+                    self.stdout.write(f'  {name}: {per_request:.2f} мкс/запрос')
+                else:
+                    self.stdout.write(f'  {name}: +{per_request - baseline:.2f} мкс/запрос')
+        finally:
+            translation.deactivate()
+
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,192 @@
+# main/management/commands/cleanup_orphan_media.py
+"""Поиск и удаление orphan-файлов в MEDIA_ROOT.
+
+signals_cleanup убирает файлы только с момента своего появления — всё, что
+накопилось раньше, лежит мёртвым грузом и раздувает бэкапы/rsync.
+
+Алгоритм:
+  1. По всем FileField/ImageField моделей main и kg собираем множество
+     путей, на которые есть ссылки в БД (values_list + iterator чанками).
+  2. Потоково обходим MEDIA_ROOT через os.scandir — список файлов целиком
+     в память не грузится.
+  3. Всё, чего нет в множестве, — orphan. WebP-производные считаются живыми,
+     если жив их оригинал.
+
+По умолчанию пропускаем CKEDITOR_UPLOAD_PATH: на эти файлы ссылаются из HTML
+в RichText-полях, а не из FileField.
+"""
+
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import FileField
+
+from main.services.media import derivatives
+
+
+def _human_size(num):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num < 1024:
+            return f"{num:.1f} {unit}"
+        num /= 1024
+    return f"{num:.1f} TB"
+
+
+def iter_media_files(root):
+    """Генератор (relative_path, size, mtime) по всему дереву, без рекурсии Python-стека."""
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        rel = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                        yield rel, st.st_size, st.st_mtime
+        except (FileNotFoundError, PermissionError):
+            continue
+
+
+class Command(BaseCommand):
+    help = 'Найти и удалить файлы в MEDIA_ROOT, на которые нет ссылок в БД (main + kg)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только отчёт, ничего не удалять',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько файлов удалять за один проход (по умолчанию 500)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Размер чанка при чтении путей из БД (по умолчанию 2000)',
+        )
+        parser.add_argument(
+            '--min-age-hours',
+            type=int,
+            default=24,
+            help='Не трогать файлы моложе N часов — они могут быть в процессе загрузки',
+        )
+        parser.add_argument(
+            '--exclude',
+            action='append',
+            default=[],
+            help='Префикс пути внутри MEDIA_ROOT, который не трогаем (можно несколько раз)',
+        )
+        parser.add_argument(
+            '--verbose-list',
+            action='store_true',
+            help='Печатать каждый orphan-файл',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = max(1, options['batch_size'])
+        root = str(settings.MEDIA_ROOT)
+
+        if not os.path.isdir(root):
+            self.stdout.write(self.style.WARNING(f"MEDIA_ROOT не найден: {root}"))
+            return
+
+        excludes = [p.strip('/') + '/' for p in options['exclude'] if p.strip('/')]
+        ckeditor_path = getattr(settings, 'CKEDITOR_UPLOAD_PATH', '')
+        if ckeditor_path:
+            excludes.append(ckeditor_path.strip('/') + '/')
+
+        self.stdout.write("📦 Собираем ссылки на файлы из БД...")
+        referenced = self.collect_referenced(options['chunk_size'])
+        self.stdout.write(f"   путей в БД: {len(referenced)}")
+
+        # Для производных: derivatives/<base>_w640.webp → жив, если жив <base>.*
+        referenced_bases = {os.path.splitext(p)[0] for p in referenced}
+
+        cutoff = time.time() - options['min_age_hours'] * 3600
+        scanned = kept = 0
+        orphan_count = orphan_size = deleted = 0
+        batch = []
+
+        self.stdout.write(f"🔍 Сканируем {root}...")
+        for rel, size, mtime in iter_media_files(root):
+            scanned += 1
+            if rel in referenced or any(rel.startswith(p) for p in excludes):
+                kept += 1
+                continue
+            if derivatives.is_derivative(rel) and self._derivative_base(rel) in referenced_bases:
+                kept += 1
+                continue
+            if mtime > cutoff:
+                kept += 1
+                continue
+
+            orphan_count += 1
+            orphan_size += size
+            if options['verbose_list']:
+                self.stdout.write(f"   {rel} ({_human_size(size)})")
+            if not dry_run:
+                batch.append(rel)
+                if len(batch) >= batch_size:
+                    deleted += self._delete_batch(root, batch)
+                    batch = []
+
+        if batch and not dry_run:
+            deleted += self._delete_batch(root, batch)
+
+        self.stdout.write(f"   просканировано: {scanned}, оставлено: {kept}")
+        summary = f"orphan-файлов: {orphan_count}, объём: {_human_size(orphan_size)}"
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"DRY RUN — {summary}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {summary}, удалено: {deleted}"))
+
+    def collect_referenced(self, chunk_size):
+        referenced = set()
+        for app_label in ('main', 'kg'):
+            for model in apps.get_app_config(app_label).get_models():
+                if not model._meta.managed or model._meta.proxy:
+                    continue
+                # ImageField — наследник FileField, ловим оба
+                fields = [
+                    f.attname for f in model._meta.concrete_fields
+                    if isinstance(f, FileField)
+                ]
+                if not fields:
+                    continue
+                qs = model._base_manager.values_list(*fields).order_by()
+                for row in qs.iterator(chunk_size=chunk_size):
+                    for name in row:
+                        if name:
+                            referenced.add(name.replace('\\', '/').lstrip('/'))
+        return referenced
+
+    @staticmethod
+    def _derivative_base(rel):
+        # derivatives/products/main/x_w640.webp → products/main/x
+        stem = os.path.splitext(rel[len(derivatives.DERIVATIVES_DIR) + 1:])[0]
+        base, sep, width = stem.rpartition('_w')
+        return base if sep and width.isdigit() else None
+
+    def _delete_batch(self, root, batch):
+        deleted = 0
+        for rel in batch:
+            try:
+                os.remove(os.path.join(root, rel))
+                deleted += 1
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                self.stderr.write(f"   ⚠️ не удалось удалить {rel}: {e}")
+        self.stdout.write(f"   удалено пачкой: {deleted}")
+        return deleted
@@ -0,0 +1,166 @@
+# main/management/commands/explain_leads.py
+"""Проверка планов запросов списка заявок (ContactFormAdmin).
+
+Для типовых открытий списка — без фильтров, по статусу/региону/дате, поиск
+по имени и телефону, фильтр по модели — строит queryset тем же
+ContactFormAdmin.get_queryset() и гоняет EXPLAIN (ANALYZE, BUFFERS) для
+страницы (LIMIT 50) и для COUNT(*) пагинатора.
+
+    python manage.py explain_leads
+    python manage.py explain_leads --save-baseline leads_plans.json
+    python manage.py explain_leads --baseline leads_plans.json --strict
+
+Регрессия:
+  - Seq Scan по main_contactform, когда в таблице больше --min-rows строк;
+  - запрос дольше --budget-ms;
+  - с --baseline: дольше, чем в базовом прогоне × --tolerance, или
+    индекс из базового плана больше не используется.
+--strict — код возврата ≠ 0 при регрессиях (для CI).
+"""
+
+import json
+from datetime import timedelta
+
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+
+from main.models import REGION_CHOICES, ContactForm, ContactFormProduct
+
+PAGE_SIZE = 50
+
+
+def _scenarios():
+    """(название, GET-параметры списка заявок)."""
+    week_ago = (timezone.localdate() - timedelta(days=7)).isoformat()
+    today = timezone.localdate().isoformat()
+    product = (
+        ContactFormProduct.objects.filter(lead_count__gt=0)
+        .order_by('-lead_count').values_list('label', flat=True).first()
+    ) or 'FAW'
+    region = REGION_CHOICES[0][0]
+    return [
+        ('Без фильтров', {}),
+        ('Статус «новая»', {'status': 'new'}),
+        ('amoCRM: ошибка', {'amocrm_status': 'failed'}),
+        ('Приоритет высокий', {'priority': 'high'}),
+        ('Регион', {'region': region}),
+        ('Модель техники', {'product': product[:10]}),
+        ('Период 7 дней', {'date_from': week_ago, 'date_to': today}),
+        ('Статус + регион + период', {'status': 'new', 'region': region, 'date_from': week_ago, 'date_to': today}),
+        ('Поиск по имени', {'q': 'Иван'}),
+        ('Поиск по телефону', {'q': '90 123'}),
+        ('Поиск по середине телефона', {'q': '45 67'}),
+    ]
+
+
+def _walk(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from _walk(child)
+
+
+def explain(queryset_sql):
+    """EXPLAIN (ANALYZE, BUFFERS) → {'ms', 'buffers', 'seq_scans', 'indexes'}."""
+    sql, params = queryset_sql
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}', params)
+        raw = cursor.fetchone()[0]
+    root = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+    nodes = list(_walk(root['Plan']))
+    table = ContactForm._meta.db_table
+    return {
+        'ms': round(root['Planning Time'] + root['Execution Time'], 2),
+        'buffers': root['Plan'].get('Shared Hit Blocks', 0) + root['Plan'].get('Shared Read Blocks', 0),
+        'seq_scans': sorted({
+            n['Relation Name'] for n in nodes
+            if n['Node Type'] == 'Seq Scan' and n.get('Relation Name') == table
+        }),
+        'indexes': sorted({n['Index Name'] for n in nodes if n.get('Index Name')}),
+    }
+
+
+def lead_list_queries(params):
+    """SQL страницы и COUNT(*) списка заявок — так, как их строит админка."""
+    request = RequestFactory().get('/admin/main/contactform/', params)
+    model_admin = admin.site._registry[ContactForm]
+    qs = model_admin.get_queryset(request)
+    page = qs.select_related('manager').order_by('-created_at', '-pk')[:PAGE_SIZE]
+    ids_sql, ids_params = qs.order_by().values('pk').query.sql_with_params()
+    return {
+        'page': page.query.sql_with_params(),
+        'count': (f'SELECT COUNT(*) FROM ({ids_sql}) AS leads', ids_params),
+    }
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN ANALYZE типовых запросов списка заявок и поиск регрессий планов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=float, default=100,
+                            help='Допустимое время одного запроса, мс (по умолчанию 100)')
+        parser.add_argument('--min-rows', type=int, default=10000,
+                            help='Seq Scan — регрессия, только если заявок больше (по умолчанию 10000)')
+        parser.add_argument('--baseline', help='JSON прошлого прогона для сравнения')
+        parser.add_argument('--tolerance', type=float, default=1.5,
+                            help='Во сколько раз можно стать медленнее базового прогона (по умолчанию 1.5)')
+        parser.add_argument('--save-baseline', help='Сохранить результаты в JSON')
+        parser.add_argument('--strict', action='store_true',
+                            help='Завершиться с ошибкой, если есть регрессии')
+
+    def handle(self, *args, **options):
+        baseline = {}
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Не удалось прочитать {options["baseline"]}: {e}')
+
+        rows = ContactForm.objects.count()
+        self.stdout.write(f'Заявок в таблице: {rows}')
+
+        results, regressions = {}, []
+        for name, params in _scenarios():
+            for kind, query in lead_list_queries(params).items():
+                key = f'{name} [{kind}]'
+                plan = explain(query)
+                results[key] = plan
+
+                problems = []
+                if plan['seq_scans'] and rows > options['min_rows']:
+                    problems.append('Seq Scan по заявкам')
+                if plan['ms'] > options['budget_ms']:
+                    problems.append(f'дольше {options["budget_ms"]:g} мс')
+                before = baseline.get(key)
+                if before:
+                    if plan['ms'] > before['ms'] * options['tolerance']:
+                        problems.append(f'медленнее базового ({before["ms"]} мс)')
+                    lost = set(before['indexes']) - set(plan['indexes'])
+                    if lost:
+                        problems.append(f'не используется {", ".join(sorted(lost))}')
+
+                line = (
+                    f'  {key}: {plan["ms"]} мс, буферов {plan["buffers"]}, '
+                    f'индексы: {", ".join(plan["indexes"]) or "—"}'
+                )
+                if problems:
+                    regressions.append(key)
+                    self.stdout.write(self.style.ERROR(f'{line} — {"; ".join(problems)}'))
+                else:
+                    self.stdout.write(line)
+
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Результаты сохранены: {options["save_baseline"]}')
+
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f'Запросов: {len(results)}, регрессий нет'))
+            return
+        summary = f'Запросов: {len(results)}, регрессий: {len(regressions)}'
+        if options['strict']:
+            raise CommandError(summary)
+        self.stdout.write(self.style.WARNING(summary))
@@ -0,0 +1,57 @@
+# main/management/commands/generate_image_derivatives.py
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import ImageField
+
+from main.services.media import derivatives
+
+
+class Command(BaseCommand):
+    help = 'Сгенерировать WebP-производные для уже загруженных картинок (main + kg)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            help='Только одна модель, например main.Product или kg.KGVehicle',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать файлы, без генерации',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        if options['model']:
+            models = [apps.get_model(options['model'])]
+        else:
+            models = [
+                m for app_label in ('main', 'kg')
+                for m in apps.get_app_config(app_label).get_models()
+            ]
+
+        total_files = 0
+        total_variants = 0
+        for model in models:
+            fields = [f.name for f in model._meta.get_fields() if isinstance(f, ImageField)]
+            if not fields:
+                continue
+            qs = model.objects.only('pk', *fields).order_by('pk')
+            for obj in qs.iterator(chunk_size=500):
+                for fname in fields:
+                    field_file = getattr(obj, fname)
+                    if not field_file or not derivatives.is_supported(field_file.name):
+                        continue
+                    total_files += 1
+                    if dry_run:
+                        continue
+                    total_variants += len(derivatives.generate(field_file.storage, field_file.name))
+            self.stdout.write(f"  {model._meta.label}: готово")
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"DRY RUN — файлов к обработке: {total_files}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Обработано файлов: {total_files}, создано производных: {total_variants}"
+            ))
@@ -0,0 +1,95 @@
+# main/management/commands/import_spare_parts.py
+"""Импорт каталога запчастей из XLSX/CSV (выгрузка склада 1С).
+
+    python manage.py import_spare_parts stock.xlsx --dry-run
+    python manage.py import_spare_parts stock.csv --errors-csv errors.csv
+
+Колонки (заголовок первой строкой, порядок любой): Артикул, Наименование,
+Тип, Цена, Количество, В продаже. Обязателен только «Артикул» — у
+существующих запчастей обновляются лишь заполненные колонки.
+Логика — main/services/shop/catalog_import.py.
+"""
+
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.services.shop.catalog_import import (
+    DEFAULT_BATCH_SIZE, ImportFormatError, import_parts, read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = 'Импорт/обновление запчастей из XLSX или CSV (upsert по артикулу)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к .xlsx или .csv')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только отчёт об изменениях, ничего не записывать',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Строк в одной пачке upsert (по умолчанию {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--errors-csv',
+            help='Сохранить ошибки по строкам в CSV (строка; артикул; ошибка)',
+        )
+        parser.add_argument(
+            '--show-diff',
+            type=int,
+            default=50,
+            help='Сколько изменений вывести в отчёте (по умолчанию 50, 0 — не выводить)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        dry_run = options['dry_run']
+
+        try:
+            with open(path, 'rb') as f:
+                report = import_parts(read_rows(f, path), dry_run=dry_run,
+                                      batch_size=options['batch_size'])
+        except FileNotFoundError:
+            raise CommandError(f'Файл не найден: {path}')
+        except ImportFormatError as e:
+            raise CommandError(str(e))
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN — в БД ничего не записано'))
+
+        limit = options['show_diff']
+        for part_number, diff in report.changes[:limit]:
+            fields = ', '.join(
+                f'{name}: {old} → {new}' if old is not None else f'{name}: {new}'
+                for name, (old, new) in diff.items()
+            )
+            self.stdout.write(f'  {part_number}: {fields}')
+        if limit and len(report.changes) > limit:
+            self.stdout.write(f'  … и ещё {len(report.changes) - limit}')
+
+        for row_no, part_number, message in report.errors[:20]:
+            self.stdout.write(self.style.ERROR(f'  строка {row_no} [{part_number}]: {message}'))
+        if len(report.errors) > 20:
+            self.stdout.write(self.style.ERROR(f'  … и ещё {len(report.errors) - 20} ошибок'))
+
+        if options['errors_csv'] and report.errors:
+            with open(options['errors_csv'], 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f, delimiter=';')
+                writer.writerow(['Строка', 'Артикул', 'Ошибка'])
+                writer.writerows(report.errors)
+            self.stdout.write(f'Ошибки сохранены: {options["errors_csv"]}')
+
+        if report.types_created:
+            self.stdout.write(f'Новые типы: {", ".join(report.types_created)}')
+
+        summary = (
+            f'Строк: {report.total}, новых: {report.created}, обновлено: {report.updated}, '
+            f'без изменений: {report.unchanged}, ошибок: {len(report.errors)}'
+        )
+        style = self.style.WARNING if report.errors else self.style.SUCCESS
+        self.stdout.write(style(summary))
@@ -0,0 +1,58 @@
+# main/management/commands/reconcile_stock.py
+"""Сверка остатков запчастей с журналом движений (StockMovement).
+
+    python manage.py reconcile_stock          # только отчёт
+    python manage.py reconcile_stock --fix    # дописать корректирующие движения
+
+Расхождение = SparePart.quantity ≠ сумме движений. Появляется, если остаток
+поменяли в обход сервисов (queryset.update(), ручной SQL). --fix журнал не
+переписывает — добавляет по одной корректировке на запчасть.
+Логика — main/services/shop/stock.py.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main.services.shop.stock import find_discrepancies, fix_discrepancies
+
+
+class Command(BaseCommand):
+    help = 'Сверка остатков запчастей с журналом движений склада'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Дописать корректирующие движения, чтобы журнал сошёлся с остатками',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=50,
+            help='Сколько расхождений вывести (по умолчанию 50)',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows = find_discrepancies()
+            if not rows:
+                self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+                return
+
+            limit = options['limit']
+            for row in rows[:limit]:
+                self.stdout.write(
+                    f'  {row["part_number"]}: остаток {row["quantity"]}, по журналу {row["ledger"]} '
+                    f'({row["quantity"] - row["ledger"]:+d})'
+                )
+            if len(rows) > limit:
+                self.stdout.write(f'  … и ещё {len(rows) - limit}')
+
+            if not options['fix']:
+                self.stdout.write(self.style.WARNING(
+                    f'Расхождений: {len(rows)}. Запустите с --fix, чтобы дописать корректировки'
+                ))
+                return
+
+            fix_discrepancies(rows)
+        self.stdout.write(self.style.SUCCESS(f'Исправлено расхождений: {len(rows)}'))
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:08
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+
+def backfill_search_columns(apps, schema_editor):
+    """Заполняем part_number_normalized и search_vector для уже существующих запчастей."""
+    from main.models import normalize_part_number
+
+    SparePart = apps.get_model('main', 'SparePart')
+    batch = []
+    for part in SparePart.objects.only('id', 'part_number').iterator(chunk_size=1000):
+        part.part_number_normalized = normalize_part_number(part.part_number)
+        batch.append(part)
+        if len(batch) >= 1000:
+            SparePart.objects.bulk_update(batch, ['part_number_normalized'])
+            batch = []
+    if batch:
+        SparePart.objects.bulk_update(batch, ['part_number_normalized'])
+
+    SparePart.objects.update(search_vector=(
+        SearchVector('part_number', weight='A', config='simple')
+        + SearchVector('part_number_normalized', weight='A', config='simple')
+        + SearchVector('name_ru', 'name_uz', 'name_en', weight='B', config='simple')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0029_dealerprofile_role'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='sparepart',
+            name='part_number_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='Артикул (для поиска)'),
+        ),
+        migrations.AddField(
+            model_name='sparepart',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_search_columns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='sparepart',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['part_number_normalized'], name='sparepart_pn_norm_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='sparepart',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name_ru'), name='gin_trgm_ops'), name='sparepart_name_ru_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='sparepart',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name_uz'), name='gin_trgm_ops'), name='sparepart_name_uz_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='sparepart',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name_en'), name='gin_trgm_ops'), name='sparepart_name_en_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='sparepart',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='sparepart_search_vector'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0030_sparepart_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['-confirmed_at', '-id'], name='invoice_confirmed_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='sparepart',
+            index=models.Index(fields=['-updated_at', 'id'], name='sparepart_updated_keyset'),
+        ),
+    ]
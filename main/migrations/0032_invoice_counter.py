@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:25
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def fill_counters(apps, schema_editor):
+    """Счётчик продолжает уже выданную нумерацию: last_number = max(number) за год."""
+    Invoice = apps.get_model('main', 'Invoice')
+    InvoiceCounter = apps.get_model('main', 'InvoiceCounter')
+    rows = (
+        Invoice.objects
+        .filter(year__isnull=False, number__isnull=False)
+        .values('year')
+        .annotate(last=Max('number'))
+    )
+    InvoiceCounter.objects.bulk_create([
+        InvoiceCounter(year=r['year'], last_number=r['last']) for r in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0031_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceCounter',
+            fields=[
+                ('year', models.PositiveIntegerField(primary_key=True, serialize=False, verbose_name='Год')),
+                ('last_number', models.PositiveIntegerField(default=0, verbose_name='Последний номер')),
+            ],
+            options={
+                'verbose_name': 'Магазин — Счётчик счетов',
+                'verbose_name_plural': 'Магазин — Счётчики счетов',
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
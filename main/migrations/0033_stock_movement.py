@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0032_invoice_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('adjustment', 'Корректировка')], default='adjustment', max_length=20, verbose_name='Тип')),
+                ('delta', models.IntegerField(verbose_name='Изменение')),
+                ('quantity_after', models.PositiveIntegerField(verbose_name='Остаток после')),
+                ('comment', models.CharField(blank=True, max_length=255, verbose_name='Комментарий')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Когда')),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='main.dealerprofile', verbose_name='Кто')),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='main.sparepart', verbose_name='Запчасть')),
+            ],
+            options={
+                'verbose_name': 'Магазин — Движение склада',
+                'verbose_name_plural': 'Магазин — Движения склада',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['part', 'created_at'], name='stockmove_part_created')],
+            },
+        ),
+    ]
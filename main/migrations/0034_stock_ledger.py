@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_opening_balances(apps, schema_editor):
+    """Начальный остаток в журнал — чтобы сумма движений сошлась с quantity.
+
+    Уже записанные корректировки учитываем: opening = quantity − их сумма,
+    датой — не позже первого движения запчасти. Один INSERT ... SELECT.
+    """
+    SparePart = apps.get_model('main', 'SparePart')
+    StockMovement = apps.get_model('main', 'StockMovement')
+    parts, moves = SparePart._meta.db_table, StockMovement._meta.db_table
+    schema_editor.execute(f'''
+        INSERT INTO {moves} (part_id, kind, delta, quantity_after, comment, created_at)
+        SELECT p.id, 'opening',
+               p.quantity - COALESCE(m.total, 0),
+               GREATEST(p.quantity - COALESCE(m.total, 0), 0),
+               'Остаток на момент запуска журнала',
+               LEAST(p.created_at, COALESCE(m.first_at, p.created_at))
+        FROM {parts} p
+        LEFT JOIN (
+            SELECT part_id, SUM(delta) AS total, MIN(created_at) AS first_at
+            FROM {moves} GROUP BY part_id
+        ) m ON m.part_id = p.id
+        WHERE p.quantity - COALESCE(m.total, 0) <> 0
+    ''')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0033_stock_movement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='invoice',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='main.invoice', verbose_name='Счёт'),
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='kind',
+            field=models.CharField(choices=[('opening', 'Начальный остаток'), ('receipt', 'Поступление'), ('sale', 'Продажа (счёт)'), ('cancel', 'Возврат (отмена счёта)'), ('adjustment', 'Корректировка')], default='adjustment', max_length=20, verbose_name='Тип'),
+        ),
+        migrations.RunPython(create_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:48
+
+from django.db import migrations, models
+
+
+def fill_products(apps, schema_editor):
+    """Справочник из существующих заявок — один INSERT ... SELECT ... GROUP BY."""
+    ContactForm = apps.get_model('main', 'ContactForm')
+    ContactFormProduct = apps.get_model('main', 'ContactFormProduct')
+    schema_editor.execute(f'''
+        INSERT INTO {ContactFormProduct._meta.db_table} (label, lead_count)
+        SELECT product, COUNT(*) FROM {ContactForm._meta.db_table}
+        WHERE product IS NOT NULL AND product <> ''
+        GROUP BY product
+    ''')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0034_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactFormProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=200, unique=True, verbose_name='Модель техники')),
+                ('lead_count', models.PositiveIntegerField(default=0, verbose_name='Заявок')),
+            ],
+            options={
+                'verbose_name': 'Заявки - Модель техники',
+                'verbose_name_plural': 'Заявки - Модели техники',
+                'ordering': ['label'],
+            },
+        ),
+        migrations.RunPython(fill_products, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:51
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+from django.db.models import Max
+
+BACKFILL_BATCH = 10000
+
+
+def backfill_phone_normalized(apps, schema_editor):
+    """То же, что normalize_phone(): только цифры. Пачками по id — каждая
+    пачка коммитится сама (миграция не атомарная), и таблица заявок не
+    блокируется на запись на всё время UPDATE."""
+    ContactForm = apps.get_model('main', 'ContactForm')
+    table = ContactForm._meta.db_table
+    start = 0
+    # max(id) перечитываем: заявки, пришедшие во время миграции, тоже попадут
+    while start < (ContactForm.objects.aggregate(last=Max('id'))['last'] or 0):
+        schema_editor.execute(
+            f"UPDATE {table} SET phone_normalized = regexp_replace(phone, '[^0-9]', '', 'g') "
+            f"WHERE id > %s AND id <= %s",
+            (start, start + BACKFILL_BATCH),
+        )
+        start += BACKFILL_BATCH
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся CONCURRENTLY (вне транзакции) — заявки с сайта
+    # продолжают писаться, пока идёт миграция
+    atomic = False
+
+    dependencies = [
+        ('main', '0035_contactform_product'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactform',
+            name='phone_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50, verbose_name='Телефон (для поиска)'),
+        ),
+        migrations.RunPython(backfill_phone_normalized, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='contactform',
+            index=models.Index(fields=['-created_at', '-id'], name='contactform_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='contactform',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='contactform_status_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='contactform',
+            index=models.Index(fields=['amocrm_status', '-created_at', '-id'], name='contactform_amocrm_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='contactform',
+            index=models.Index(fields=['priority', '-created_at', '-id'], name='contactform_priority_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='contactform',
+            index=models.Index(fields=['region', '-created_at', '-id'], name='contactform_region_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='contactform',
+            index=models.Index(fields=['phone_normalized'], name='contactform_phone_norm', opclasses=['varchar_pattern_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='contactform',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='contactform_name_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='contactform',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('product'), name='gin_trgm_ops'), name='contactform_product_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='contactform',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('amocrm_lead_id'), name='gin_trgm_ops'), name='contactform_amocrm_id_trgm'),
+        ),
+    ]
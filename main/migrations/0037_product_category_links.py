@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_category_links(apps, schema_editor):
+    """category + categories (через запятую) → по строке на категорию."""
+    Product = apps.get_model('main', 'Product')
+    ProductCategoryLink = apps.get_model('main', 'ProductCategoryLink')
+    links = []
+    for product_id, category, categories in Product.objects.values_list('id', 'category', 'categories'):
+        extra = [c.strip() for c in (categories or '').split(',') if c.strip()]
+        for value in dict.fromkeys([category, *extra]):
+            links.append(ProductCategoryLink(product_id=product_id, category=value))
+    ProductCategoryLink.objects.bulk_create(links, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0036_contactform_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCategoryLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('samosval', 'Samosvallar'), ('maxsus', 'Maxsus texnika'), ('furgon', 'Avtofurgonlar'), ('shassi', 'Shassilar'), ('tiger_v', 'Tiger V'), ('tiger_vh', 'Tiger VH'), ('tiger_vr', 'Tiger VR')], max_length=50, verbose_name='Категория')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_links', to='main.product')),
+            ],
+            options={
+                'verbose_name': 'Категория грузовика',
+                'verbose_name_plural': 'Категории грузовиков',
+                'indexes': [models.Index(fields=['category', 'product'], name='product_category_link_cat')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'category'), name='product_category_link_unique')],
+            },
+        ),
+        migrations.RunPython(fill_category_links, migrations.RunPython.noop),
+    ]
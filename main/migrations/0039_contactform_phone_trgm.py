@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:38
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY не работает внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('main', '0038_cacheversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='contactform',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['phone_normalized'], name='contactform_phone_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
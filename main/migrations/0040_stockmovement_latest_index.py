@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:54
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY не работает внутри транзакции. Новый индекс строится раньше,
+    # чем снимается старый, — журнал склада ни минуты не остаётся без индекса
+    atomic = False
+
+    dependencies = [
+        ('main', '0039_contactform_phone_trgm'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='stockmovement',
+            index=models.Index(fields=['part', '-created_at', '-id'], name='stockmove_part_latest'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='stockmovement',
+            name='stockmove_part_created',
+        ),
+    ]
@@ -9,6 +9,9 @@ from django.dispatch import receiver
 from django.db.models.signals import post_save, post_delete
 from datetime import timedelta, time as datetime_time
 from django.core.cache import cache
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Upper
 from .validators import validate_image_size
 # ========== ОБЩИЕ CHOICES ==========
 
@@ -291,6 +294,40 @@ class Product(models.Model):
                     break
         return category_names
 
+    def sync_category_links(self):
+        """ProductCategoryLink ← get_all_categories() (вызывается из post_save)."""
+        categories = self.get_all_categories()
+        ProductCategoryLink.objects.filter(product=self).exclude(category__in=categories).delete()
+        ProductCategoryLink.objects.bulk_create(
+            [ProductCategoryLink(product=self, category=category) for category in categories],
+            ignore_conflicts=True,
+        )
+
+
+class ProductCategoryLink(models.Model):
+    """Категории грузовика одной строкой на категорию: category + categories.
+
+    Фильтр каталога по категории шёл через categories__icontains по строке
+    через запятую — без индекса и с ложными совпадениями (tiger_v ⊂ tiger_vh).
+    Ведётся сигналом Product (main/signals.py).
+    """
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='category_links')
+    category = models.CharField("Категория", max_length=50, choices=Product.CATEGORY_CHOICES)
+
+    class Meta:
+        verbose_name = "Категория грузовика"
+        verbose_name_plural = "Категории грузовиков"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'category'], name='product_category_link_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'product'], name='product_category_link_cat'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} → {self.category}"
+
 class ProductParameter(models.Model):
     CATEGORY_CHOICES = [
         ('main', _('Основные параметры')),
@@ -487,10 +524,19 @@ class Dealer(models.Model):
 
 # ========== 04. ЗАЯВКИ ==========
 
+def normalize_phone(value):
+    """Телефон для поиска: только цифры. '+998 (90) 123-45-67' → '998901234567'."""
+    if not value:
+        return ''
+    return ''.join(ch for ch in str(value) if ch.isdigit())
+
+
 class ContactForm(models.Model):
     name = models.CharField("Имя", max_length=255)
     region = models.CharField("Регион", max_length=100, choices=REGION_CHOICES)
     phone = models.CharField("Телефон", max_length=50)
+    # Только цифры — точный и префиксный поиск в админке по индексу
+    phone_normalized = models.CharField("Телефон (для поиска)", max_length=50, blank=True, default='', editable=False)
     
     product = models.CharField(
         "Модель техники", 
@@ -575,10 +621,55 @@ class ContactForm(models.Model):
         verbose_name = "Заявки - Общая заявка"
         verbose_name_plural = "Заявки - Общие заявки"
         ordering = ['-created_at']
+        # Под фильтры и поиск ContactFormAdmin (проверка планов — manage.py explain_leads)
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='contactform_created'),
+            models.Index(fields=['status', '-created_at', '-id'], name='contactform_status_created'),
+            models.Index(fields=['amocrm_status', '-created_at', '-id'], name='contactform_amocrm_created'),
+            models.Index(fields=['priority', '-created_at', '-id'], name='contactform_priority_created'),
+            models.Index(fields=['region', '-created_at', '-id'], name='contactform_region_created'),
+            # varchar_pattern_ops — LIKE 'prefix%' по индексу при любой локали БД
+            models.Index(fields=['phone_normalized'], opclasses=['varchar_pattern_ops'],
+                         name='contactform_phone_norm'),
+            # Цифры из середины номера — LIKE '%...%' (запасной поиск по телефону)
+            GinIndex(fields=['phone_normalized'], opclasses=['gin_trgm_ops'], name='contactform_phone_trgm'),
+            # UPPER(...) — под icontains (UPPER(col) LIKE UPPER('%...%'))
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='contactform_name_trgm'),
+            GinIndex(OpClass(Upper('product'), name='gin_trgm_ops'), name='contactform_product_trgm'),
+            GinIndex(OpClass(Upper('amocrm_lead_id'), name='gin_trgm_ops'), name='contactform_amocrm_id_trgm'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.phone} ({self.created_at.strftime('%d.%m.%Y')})"
 
+    def save(self, *args, **kwargs):
+        self.phone_normalized = normalize_phone(self.phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'phone_normalized'}
+        super().save(*args, **kwargs)
+
+
+class ContactFormProduct(models.Model):
+    """Справочник моделей техники из заявок: метка → число заявок.
+
+    Ведётся сигналами ContactForm (main/signals.py) — +1/−1 на каждую заявку,
+    без пересчёта. Фильтры админки и дашборда берут список отсюда
+    (main/services/dashboard/products.py) вместо SELECT DISTINCT по всем заявкам.
+    """
+
+    label = models.CharField("Модель техники", max_length=200, unique=True)
+    lead_count = models.PositiveIntegerField("Заявок", default=0)
+
+    class Meta:
+        verbose_name = "Заявки - Модель техники"
+        verbose_name_plural = "Заявки - Модели техники"
+        ordering = ['label']
+
+    def __str__(self):
+        return f"{self.label} ({self.lead_count})"
+
+
 class BecomeADealerApplication(models.Model):
     name = models.CharField("ФИО", max_length=255)
     region = models.CharField("Регион", max_length=100, choices=REGION_CHOICES)
@@ -2071,6 +2162,18 @@ def normalize_type_name(value):
     return ' '.join(str(value).split())
 
 
+_PART_NUMBER_NOISE = str.maketrans('', '', ' -_./\\')
+
+
+def normalize_part_number(value):
+    """Артикул для поиска: верхний регистр, без пробелов/дефисов/точек/слешей.
+    '1001-akb faw' → '1001AKBFAW'. Дилеры вбивают артикул как попало.
+    """
+    if not value:
+        return ''
+    return str(value).upper().translate(_PART_NUMBER_NOISE)
+
+
 class SparePartType(models.Model):
     """Справочник типов запчастей (двигатель / тормоза / фильтр и т.п.).
     Дедуп case-insensitive по name_ru — выполняется в get_or_create_normalized().
@@ -2123,6 +2226,14 @@ class SparePart(models.Model):
         db_index=True,
         help_text='Уникальный номер запчасти. Например: 1001-AKB-FAW',
     )
+    # Заполняется в save() — по нему идёт поиск (trigram-индекс)
+    part_number_normalized = models.CharField(
+        'Артикул (для поиска)',
+        max_length=100,
+        blank=True,
+        default='',
+        editable=False,
+    )
     # blank=True — иначе modeltranslation делает name_uz обязательным в форме,
     # даже при required_languages=('ru',) (нюанс modeltranslation + default-язык 'uz').
     name = models.CharField(
@@ -2166,15 +2277,38 @@ class SparePart(models.Model):
     is_active = models.BooleanField('В продаже', default=True)
     created_at = models.DateTimeField('Создано', auto_now_add=True)
     updated_at = models.DateTimeField('Обновлено', auto_now=True)
+    # tsvector по артикулу и названиям — обновляет main/services/shop/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name        = 'Магазин — Запчасть'
         verbose_name_plural = 'Магазин — Запчасти'
         ordering            = ['-created_at']
+        indexes = [
+            GinIndex(
+                fields=['part_number_normalized'],
+                opclasses=['gin_trgm_ops'],
+                name='sparepart_pn_norm_trgm',
+            ),
+            # UPPER(...) — под icontains и trigram_word_similar по Upper()
+            GinIndex(OpClass(Upper('name_ru'), name='gin_trgm_ops'), name='sparepart_name_ru_trgm'),
+            GinIndex(OpClass(Upper('name_uz'), name='gin_trgm_ops'), name='sparepart_name_uz_trgm'),
+            GinIndex(OpClass(Upper('name_en'), name='gin_trgm_ops'), name='sparepart_name_en_trgm'),
+            GinIndex(fields=['search_vector'], name='sparepart_search_vector'),
+            # keyset-пагинация магазина: ORDER BY updated_at DESC, id
+            models.Index(fields=['-updated_at', 'id'], name='sparepart_updated_keyset'),
+        ]
 
     def __str__(self):
         return f'{self.part_number} — {self.name}'
 
+    def save(self, *args, **kwargs):
+        self.part_number_normalized = normalize_part_number(self.part_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'part_number' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'part_number_normalized'}
+        super().save(*args, **kwargs)
+
 
 class SparePartImage(models.Model):
     """Фото запчасти. Несколько фото на одну запчасть, ограничение 5 МБ."""
@@ -2201,6 +2335,69 @@ class SparePartImage(models.Model):
         return f'Фото {self.order + 1} для {self.part.part_number}'
 
 
+class StockMovement(models.Model):
+    """Движение остатка запчасти — журнал, только добавление.
+
+    SparePart.quantity — материализованный итог журнала: меняется в той же
+    транзакции, что и пишется движение, так что сумма delta по запчасти
+    всегда равна её quantity (проверка — manage.py reconcile_stock).
+    quantity_after — остаток после движения: остаток на любую дату берётся
+    из последнего движения до неё (индекс part + created_at).
+    """
+
+    KIND_OPENING    = 'opening'
+    KIND_RECEIPT    = 'receipt'
+    KIND_SALE       = 'sale'
+    KIND_CANCEL     = 'cancel'
+    KIND_ADJUSTMENT = 'adjustment'
+    KIND_CHOICES = [
+        (KIND_OPENING,    'Начальный остаток'),
+        (KIND_RECEIPT,    'Поступление'),
+        (KIND_SALE,       'Продажа (счёт)'),
+        (KIND_CANCEL,     'Возврат (отмена счёта)'),
+        (KIND_ADJUSTMENT, 'Корректировка'),
+    ]
+
+    part = models.ForeignKey(
+        SparePart,
+        verbose_name='Запчасть',
+        on_delete=models.CASCADE,
+        related_name='stock_movements',
+    )
+    kind = models.CharField('Тип', max_length=20, choices=KIND_CHOICES, default=KIND_ADJUSTMENT)
+    delta = models.IntegerField('Изменение')
+    quantity_after = models.PositiveIntegerField('Остаток после')
+    invoice = models.ForeignKey(
+        'Invoice',
+        verbose_name='Счёт',
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='stock_movements',
+    )
+    author = models.ForeignKey(
+        'DealerProfile',
+        verbose_name='Кто',
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='stock_movements',
+    )
+    comment = models.CharField('Комментарий', max_length=255, blank=True)
+    created_at = models.DateTimeField('Когда', auto_now_add=True)
+
+    class Meta:
+        verbose_name        = 'Магазин — Движение склада'
+        verbose_name_plural = 'Магазин — Движения склада'
+        ordering            = ['-created_at', '-id']
+        indexes = [
+            # История запчасти и balances_at(): DISTINCT ON (part_id) ... ORDER BY
+            # part_id, created_at DESC, id DESC читает индекс по порядку, без сортировки
+            models.Index(fields=['part', '-created_at', '-id'], name='stockmove_part_latest'),
+        ]
+
+    def __str__(self):
+        return f'{self.part_id}: {self.delta:+d} → {self.quantity_after}'
+
+
 # ========== СЧЕТА ДИЛЕРАМ ==========
 
 class Invoice(models.Model):
@@ -2222,7 +2419,7 @@ class Invoice(models.Model):
     )
 
     # year/number = NULL → счёт ещё не подтверждён (черновик).
-    # Присваиваются в dealer_invoice_confirm атомарно.
+    # Присваиваются в dealer_invoice_confirm атомарно (номер — из InvoiceCounter).
     year = models.PositiveIntegerField(
         'Год',
         db_index=True,
@@ -2278,6 +2475,10 @@ class Invoice(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['year', 'number'], name='invoice_year_number_unique'),
         ]
+        indexes = [
+            # keyset-пагинация списка заказов сотрудников
+            models.Index(fields=['-confirmed_at', '-id'], name='invoice_confirmed_keyset'),
+        ]
 
     def __str__(self):
         if self.number is None:
@@ -2290,6 +2491,26 @@ class Invoice(models.Model):
         return self.number is None
 
 
+class InvoiceCounter(models.Model):
+    """Счётчик номеров счетов по году — одна строка на год.
+
+    Номер выдаётся атомарным UPDATE ... RETURNING (main/services/shop/checkout.py)
+    в самом конце транзакции подтверждения: блокируется только эта маленькая
+    строка и ненадолго, а не последний счёт года. Откат транзакции откатывает
+    и счётчик — нумерация остаётся без дыр.
+    """
+
+    year = models.PositiveIntegerField('Год', primary_key=True)
+    last_number = models.PositiveIntegerField('Последний номер', default=0)
+
+    class Meta:
+        verbose_name        = 'Магазин — Счётчик счетов'
+        verbose_name_plural = 'Магазин — Счётчики счетов'
+
+    def __str__(self):
+        return f'{self.year}: {self.last_number}'
+
+
 class InvoiceItem(models.Model):
     """Позиция счёта — снапшот товара на момент создания."""
 
@@ -2314,4 +2535,24 @@ class InvoiceItem(models.Model):
         ordering            = ['id']
 
     def __str__(self):
-        return f'{self.name} × {self.quantity}'
\ No newline at end of file
+        return f'{self.name} × {self.quantity}'
+
+# ========== СЛУЖЕБНОЕ: ВЕРСИИ КЕШЕЙ ==========
+
+class CacheVersion(models.Model):
+    """Версия группы кешей — одна строка на группу (права, API KG, карточки...).
+
+    Кеш у каждого воркера свой (LocMemCache), а версия — общая строка в БД.
+    Правка меняет её после коммита, и записи со старой версией перестают
+    читаться во всех процессах (main/utils/cache_versions.py).
+    """
+
+    key     = models.CharField('Группа', max_length=64, primary_key=True)
+    version = models.CharField('Версия', max_length=32)
+
+    class Meta:
+        verbose_name        = 'Служебное — Версия кеша'
+        verbose_name_plural = 'Служебное — Версии кешей'
+
+    def __str__(self):
+        return f'{self.key}: {self.version}'
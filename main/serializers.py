@@ -4,7 +4,9 @@ from rest_framework import serializers
 import logging
 
 logger = logging.getLogger('django')
-from main.serializers_base import LanguageSerializerMixin
+from main.serializers_base import (
+    LanguageSerializerMixin, ResponsiveImageField, prefetch_root_images, responsive_image_data,
+)
 
 from .models import (
     News, NewsBlock, ContactForm, JobApplication, 
@@ -186,6 +188,7 @@ class ProductCardSpecSerializer(serializers.ModelSerializer):
 class ProductCardSerializer(LanguageSerializerMixin, serializers.ModelSerializer):  
     card_specs = ProductCardSpecSerializer(many=True, read_only=True)
     image_url = serializers.SerializerMethodField()
+    image = serializers.SerializerMethodField()
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     all_categories = serializers.SerializerMethodField()
     
@@ -196,7 +199,7 @@ class ProductCardSerializer(LanguageSerializerMixin, serializers.ModelSerializer
         fields = [
             'id', 'title', 'slug', 'category', 'category_display',
             'all_categories',
-            'image_url', 'card_specs', 'is_featured', 'order', 'price', 'price_is_from'
+            'image_url', 'image', 'card_specs', 'is_featured', 'order', 'price', 'price_is_from'
         ]
     def get_title(self, obj):
         lang = self.get_current_language()
@@ -228,6 +231,11 @@ class ProductCardSerializer(LanguageSerializerMixin, serializers.ModelSerializer
                 return request.build_absolute_uri(image.url)
             return image.url
         return None
+    
+    def get_image(self, obj):
+        prefetch_root_images(self)
+        image = obj.card_image if obj.card_image else obj.main_image
+        return responsive_image_data(image, self.context.get('request'))
 
 
 class ProductFeatureSerializer(LanguageSerializerMixin, serializers.ModelSerializer):
@@ -245,10 +253,11 @@ class ProductFeatureSerializer(LanguageSerializerMixin, serializers.ModelSeriali
 
 class ProductGallerySerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image = ResponsiveImageField()
     
     class Meta:
         model = ProductGallery
-        fields = ['id', 'image_url', 'order']
+        fields = ['id', 'image_url', 'image', 'order']
     
     def get_image_url(self, obj):
         if obj.image:
@@ -266,6 +275,8 @@ class ProductDetailSerializer(LanguageSerializerMixin, serializers.ModelSerializ
     gallery = ProductGallerySerializer(many=True, read_only=True)
     main_image_url = serializers.SerializerMethodField()
     card_image_url = serializers.SerializerMethodField()
+    main_image = ResponsiveImageField()
+    card_image = ResponsiveImageField()
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     title = serializers.SerializerMethodField()
     
@@ -278,6 +289,7 @@ class ProductDetailSerializer(LanguageSerializerMixin, serializers.ModelSerializ
             'id', 'title', 'slug', 'category', 'category_display',
             'all_categories', 
             'main_image_url', 'card_image_url',
+            'main_image', 'card_image',
             'card_specs', 'spec_groups', 'features', 'gallery',
             'is_active', 'is_featured', 'order', 'price', 'price_is_from'
         ]
@@ -563,11 +575,12 @@ class PromotionSerializer(LanguageSerializerMixin, serializers.ModelSerializer):
     description = serializers.SerializerMethodField()
     button_text = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()
+    image = ResponsiveImageField()
     
     class Meta:
         model = Promotion
         fields = [
-            'id', 'title', 'description', 'image_url', 
+            'id', 'title', 'description', 'image_url', 'image',
             'link', 'button_text', 'priority', 'start_date', 'end_date'
         ]
     
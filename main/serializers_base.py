@@ -1,8 +1,61 @@
 # main/serializers_base.py
 
+from django.db import models
 from django.utils.translation import get_language
+from rest_framework import serializers
+
+from main.services.media import derivatives
 
 
 class LanguageSerializerMixin:
     def get_current_language(self):
-        return get_language() or 'uz'
\ No newline at end of file
+        return get_language() or 'uz'
+
+
+def prefetch_root_images(field):
+    """Первая картинка в сериализации: сведения о производных всех картинок
+    корневого объекта/списка (и их загруженных связей) — одним cache.get_many,
+    а не cache.get на каждую. field — поле или сериализатор внутри дерева."""
+    root = field.root
+    if getattr(root, '_derivatives_prefetched', False):
+        return
+    root._derivatives_prefetched = True
+    instances = root.instance
+    if isinstance(instances, models.Model):
+        instances = [instances]
+    elif isinstance(instances, models.QuerySet):
+        if instances._result_cache is None:
+            return  # ещё не выполнен — лишний запрос ради кеша не нужен
+    elif instances is None or isinstance(instances, models.Manager):
+        return
+    derivatives.prefetch(derivatives.loaded_image_files(instances))
+
+
+def responsive_image_data(field_file, request=None):
+    """{'url', 'srcset', 'variants'} для картинки — общий формат для API."""
+    if not field_file or not field_file.name:
+        return None
+    build_url = request.build_absolute_uri if request else (lambda url: url)
+    return {
+        'url': build_url(field_file.url),
+        'srcset': derivatives.build_srcset(field_file, build_url),
+        'variants': [
+            {'width': w, 'url': build_url(url)}
+            for w, url in derivatives.variants(field_file)
+        ],
+    }
+
+
+class ResponsiveImageField(serializers.Field):
+    """Read-only поле: оригинал + WebP-производные разных ширин.
+
+    Пример: main_image_responsive = ResponsiveImageField(source='main_image')
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        prefetch_root_images(self)
+        return responsive_image_data(value, self.context.get('request'))
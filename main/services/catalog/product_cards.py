@@ -0,0 +1,58 @@
+# main/services/catalog/product_cards.py
+"""Карточки грузовиков для /api/products/?category=... — готовый JSON из кеша.
+
+Страница «Продукция» запрашивает список на каждый визит, а он собирается
+из prefetch'а характеристик и сериализатора. В кеше лежат ВСЕ карточки
+категории по ключу: версия каталога + язык + категория + хост (в JSON
+абсолютные URL картинок). Страницу view вырезает из этого списка —
+первая и вторая страницы одной категории собираются одним проходом, а
+прочие параметры (utm и т.п.) ключ не меняют. Неизвестная категория —
+пустой список без запроса и без записи в кеш.
+
+Версия — случайный токен, меняется после коммита правки Product,
+ProductCardSpec или FeatureIcon (main/signals.py); общая для всех воркеров
+(main/utils/cache_versions.py).
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from django.utils.translation import get_language
+from main.models import Product
+from main.utils.cache_versions import PRODUCT_CARDS, bump_version, get_version
+
+CARDS_CACHE_TTL = 60 * 60 * 24
+
+
+def cards_version():
+    return get_version(PRODUCT_CARDS)
+
+
+def bump_cards_version():
+    bump_version(PRODUCT_CARDS)
+
+
+_CATEGORIES = {slug for slug, _ in Product.CATEGORY_CHOICES}
+
+
+def _cache_key(request, category):
+    raw = '|'.join([
+        cards_version(),
+        get_language() or '',
+        category,
+        f'{request.scheme}://{request.get_host()}',
+    ])
+    return 'product_cards_' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def cached_category_cards(request, build):
+    """Все карточки категории из ?category= (без пагинации): из кеша или build()."""
+    category = request.query_params.get('category') or ''
+    if category and category not in _CATEGORIES:
+        return []
+    key = _cache_key(request, category)
+    cards = cache.get(key)
+    if cards is None:
+        cards = list(build())
+        cache.set(key, cards, CARDS_CACHE_TTL)
+    return cards
@@ -0,0 +1,70 @@
+# main/services/dashboard/products.py
+"""Список моделей техники для фильтров заявок (админка ContactForm, дашборд).
+
+Раньше каждая загрузка страницы = SELECT DISTINCT product по всей таблице
+заявок. Теперь справочник ContactFormProduct (метка → число заявок) ведётся
+сигналами ContactForm: +1 новой метке, −1 старой — одним UPSERT/UPDATE.
+Сам список меток кешируется и сбрасывается, только когда он меняется:
+появилась новая метка или у метки не осталось заявок.
+"""
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from main.models import ContactFormProduct
+
+PRODUCTS_CACHE_KEY = 'contactform_product_labels'
+PRODUCTS_CACHE_TTL = 60 * 60
+
+
+def invalidate_products_cache():
+    cache.delete(PRODUCTS_CACHE_KEY)
+
+
+def product_labels():
+    """Метки, по которым есть заявки, по алфавиту."""
+    labels = cache.get(PRODUCTS_CACHE_KEY)
+    if labels is None:
+        labels = list(
+            ContactFormProduct.objects.filter(lead_count__gt=0).values_list('label', flat=True)
+        )
+        cache.set(PRODUCTS_CACHE_KEY, labels, PRODUCTS_CACHE_TTL)
+    return labels
+
+
+def _increment(label):
+    table = ContactFormProduct._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'''
+            INSERT INTO {table} (label, lead_count) VALUES (%s, 1)
+            ON CONFLICT (label) DO UPDATE SET lead_count = {table}.lead_count + 1
+            RETURNING lead_count
+        ''', [label])
+        return cursor.fetchone()[0]
+
+
+def _decrement(label):
+    table = ContactFormProduct._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'''
+            UPDATE {table} SET lead_count = lead_count - 1
+            WHERE label = %s AND lead_count > 0
+            RETURNING lead_count
+        ''', [label])
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+
+def track_product_change(old, new):
+    """Заявка сменила модель old → new (None/'' — нет модели). Вызывать из сигналов."""
+    old, new = old or '', new or ''
+    if old == new:
+        return
+    labels_changed = False
+    if old:
+        labels_changed |= _decrement(old) == 0
+    if new:
+        labels_changed |= _increment(new) == 1
+    if labels_changed:
+        # После коммита — иначе параллельный запрос успеет закешировать старый список
+        transaction.on_commit(invalidate_products_cache)
@@ -0,0 +1,3 @@
+from . import derivatives
+
+__all__ = ['derivatives']
@@ -0,0 +1,281 @@
+# main/services/media/derivatives.py
+"""Адаптивные производные картинок (WebP нескольких ширин).
+
+Оригинал products/main/x.jpg → derivatives/products/main/x_w640.webp и т.д.
+Генерируем только ширины МЕНЬШЕ оригинала — апскейл смысла не имеет.
+
+Генерация запускается после коммита транзакции в фоновом пуле потоков,
+чтобы загрузка в админке не ждала Pillow. Список реально созданных ширин
+кешируется — шаблонам и API не нужно лезть в storage на каждый рендер.
+
+Когда генерация для объекта закончилась, шлётся сигнал derivatives_generated
+(sender — класс модели): кеши готового JSON с srcset (kg/signals.py,
+main/signals.py) по нему устаревают — иначе в них остался бы ответ,
+собранный до появления производных.
+"""
+
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models import ImageField
+from django.dispatch import Signal
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger('django')
+
+DERIVATIVES_DIR = 'derivatives'
+DEFAULT_WIDTHS = (320, 640, 960, 1440)
+DEFAULT_QUALITY = 80
+
+# Векторные/анимированные форматы не трогаем
+_SKIP_EXTENSIONS = {'.svg', '.gif', '.ico'}
+
+_CACHE_PREFIX = 'img_deriv'
+_CACHE_TTL = 60 * 60 * 24
+# Производных в storage нет — скорее всего, фоновая генерация ещё идёт.
+# Такой ответ держим недолго, иначе картинка на сутки осталась бы без srcset.
+_PENDING_TTL = 30
+
+_executor = None
+
+# kwargs: instance, fields — имена ImageField, для которых шла генерация
+derivatives_generated = Signal()
+
+
+def get_widths():
+    return tuple(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', DEFAULT_WIDTHS))
+
+
+def _is_async():
+    return getattr(settings, 'IMAGE_DERIVATIVES_ASYNC', True)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='img-deriv')
+    return _executor
+
+
+def is_supported(name):
+    if not name:
+        return False
+    return os.path.splitext(name)[1].lower() not in _SKIP_EXTENSIONS
+
+
+def derivative_name(name, width):
+    """Путь производной в storage для оригинала `name` и ширины `width`."""
+    base, _ = os.path.splitext(name)
+    return f'{DERIVATIVES_DIR}/{base}_w{width}.webp'
+
+
+def is_derivative(name):
+    return name.replace('\\', '/').startswith(f'{DERIVATIVES_DIR}/')
+
+
+def _cache_key(name):
+    return f'{_CACHE_PREFIX}:{name}'
+
+
+def generate(storage, name, widths=None):
+    """Создаёт WebP-производные для одного файла. Возвращает список ширин."""
+    if not is_supported(name):
+        return []
+    widths = widths or get_widths()
+
+    try:
+        with storage.open(name, 'rb') as fh:
+            img = Image.open(fh)
+            img.load()
+    except (FileNotFoundError, UnidentifiedImageError, OSError) as e:
+        logger.warning(f"Derivatives: не удалось открыть {name}: {e}")
+        return []
+
+    # EXIF-поворот с телефонов, иначе превью будут лежать на боку
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ('RGB', 'RGBA'):
+        # Прозрачность палитровых PNG/GIF — не канал, а img.info['transparency']
+        has_alpha = 'A' in img.getbands() or 'transparency' in img.info
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+
+    created = []
+    for width in sorted(widths):
+        if width >= img.width:
+            break
+        height = round(img.height * width / img.width)
+        resized = img.resize((width, height), Image.LANCZOS)
+        buf = io.BytesIO()
+        resized.save(buf, 'WEBP', quality=DEFAULT_QUALITY, method=4)
+
+        target = derivative_name(name, width)
+        if storage.exists(target):
+            storage.delete(target)
+        storage.save(target, ContentFile(buf.getvalue()))
+        created.append(width)
+
+    cache.set(_cache_key(name), {'widths': created, 'width': img.width}, _CACHE_TTL)
+    return created
+
+
+def delete(storage, name):
+    """Удаляет все производные оригинала `name` (включая ширины из старых настроек)."""
+    if not name or not is_supported(name):
+        return
+    base = os.path.basename(os.path.splitext(name)[0])
+    dir_name = os.path.dirname(derivative_name(name, 0))
+    prefix = f'{base}_w'
+    try:
+        _, files = storage.listdir(dir_name)
+    except (FileNotFoundError, NotImplementedError, OSError):
+        files = [os.path.basename(derivative_name(name, w)) for w in get_widths()]
+    for fname in files:
+        if fname.startswith(prefix) and fname.endswith('.webp') and fname[len(prefix):-5].isdigit():
+            storage.delete(f'{dir_name}/{fname}')
+    cache.delete(_cache_key(name))
+
+
+def _store(key, info):
+    cache.set(key, info, _CACHE_TTL if info['widths'] else _PENDING_TTL)
+
+
+def prefetch(field_files):
+    """Сведения о производных для пачки файлов — одним cache.get_many.
+
+    Результат (и промах — None) запоминается на самом FieldFile
+    (_derivative_info): списки и srcset по пачке картинок не ходят в кеш
+    по разу на каждую. Память
+    живёт, пока живёт объект модели, — вызывать на время одного запроса.
+    """
+    pending = {}
+    for field_file in field_files:
+        if (field_file and field_file.name and is_supported(field_file.name)
+                and not hasattr(field_file, '_derivative_info')):
+            pending.setdefault(_cache_key(field_file.name), []).append(field_file)
+    if not pending:
+        return
+    found = cache.get_many(list(pending))
+    for key, field_files in pending.items():
+        for field_file in field_files:
+            field_file._derivative_info = found.get(key)
+
+
+def loaded_image_files(instances):
+    """FieldFile всех ImageField объектов и их уже загруженных связей
+    (select_related / prefetch_related) — для prefetch(), без запросов в БД.
+    Отложенные (.only/.defer) поля не трогаем."""
+    seen, stack = set(), list(instances)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        for field in obj._meta.concrete_fields:
+            if isinstance(field, ImageField) and field.attname in obj.__dict__:
+                yield getattr(obj, field.attname)
+        stack.extend(related for related in obj._state.fields_cache.values() if related is not None)
+        for related in getattr(obj, '_prefetched_objects_cache', {}).values():
+            stack.extend(related)
+
+
+def _info(field_file, with_width=False):
+    """{'widths': [...], 'width': ширина оригинала}. Кешируется по имени файла.
+
+    Пустой список ширин кешируется на _PENDING_TTL: рендер мог успеть до
+    конца генерации (и даже перетереть её запись в кеше). Ширину оригинала
+    (открыть файл) при промахе кеша читаем, только если она нужна (srcset).
+    """
+    key = _cache_key(field_file.name)
+    if hasattr(field_file, '_derivative_info'):
+        info = field_file._derivative_info  # prefetch() уже сходил в кеш
+    else:
+        info = cache.get(key)
+    if info is None:
+        storage = field_file.storage
+        info = {'widths': [w for w in get_widths() if storage.exists(derivative_name(field_file.name, w))]}
+        _store(key, info)
+    if with_width and 'width' not in info:
+        width = None
+        if info['widths']:
+            try:
+                width = field_file.width
+            except (FileNotFoundError, OSError, ValueError, AttributeError):
+                width = None
+        info = {**info, 'width': width}
+        _store(key, info)
+    if hasattr(field_file, '_derivative_info'):
+        field_file._derivative_info = info
+    return info
+
+
+def available_widths(field_file):
+    """Ширины, для которых производные уже есть."""
+    if not field_file or not field_file.name or not is_supported(field_file.name):
+        return []
+    return _info(field_file)['widths']
+
+
+def variants(field_file):
+    """[(width, url), ...] по возрастанию ширины — для srcset и API."""
+    storage = field_file.storage
+    return [
+        (w, storage.url(derivative_name(field_file.name, w)))
+        for w in available_widths(field_file)
+    ]
+
+
+def build_srcset(field_file, build_url=None):
+    """srcset для <img>; оригинал идёт последним кандидатом с собственной шириной."""
+    build_url = build_url or (lambda url: url)
+    items = variants(field_file)
+    if not items:
+        return ''
+    parts = [f'{build_url(url)} {w}w' for w, url in items]
+    width = _info(field_file, with_width=True)['width']
+    if width:
+        parts.append(f'{build_url(field_file.url)} {width}w')
+    return ', '.join(parts)
+
+
+def schedule(instance, field_names):
+    """Ставит генерацию в фоновый пул после коммита транзакции."""
+    jobs = []
+    for fname in field_names:
+        field_file = getattr(instance, fname, None)
+        if field_file and field_file.name and is_supported(field_file.name):
+            jobs.append((field_file.storage, field_file.name))
+    if not jobs:
+        return
+
+    fields = [fname for fname in field_names if getattr(instance, fname, None)]
+
+    def _run():
+        for storage, name in jobs:
+            try:
+                generate(storage, name)
+            except Exception as e:
+                logger.error(f"Derivatives: ошибка генерации {name}: {e}", exc_info=True)
+        try:
+            derivatives_generated.send(sender=type(instance), instance=instance, fields=fields)
+        except Exception as e:
+            logger.error(f"Derivatives: ошибка обработчика после генерации: {e}", exc_info=True)
+
+    def _run_in_thread():
+        try:
+            _run()
+        finally:
+            # Соединения с БД у потоков пула свои — не оставляем их висеть
+            connections.close_all()
+
+    def _submit():
+        if _is_async():
+            _get_executor().submit(_run_in_thread)
+        else:
+            _run()
+
+    transaction.on_commit(_submit)
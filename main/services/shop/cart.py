@@ -0,0 +1,137 @@
+# main/services/shop/cart.py
+"""Данные корзины дилера: цена, остаток и главное фото по списку id.
+
+Фиксированное число запросов независимо от размера корзины:
+  1) cart_version() — агрегат по строкам корзины (для ETag / 304);
+  2) price_lines()  — сами строки, главное фото подзапросом.
+
+Раньше фото бралось через p.images.first() в цикле — это обходит
+prefetch_related и даёт запрос на каждую строку.
+
+Версия корзины — max(updated_at) её запчастей в микросекундах и отпечаток
+набора id ('<мкс>.<отпечаток>'). Клиент может прислать её обратно (?since=)
+и получить только изменившиеся строки + id, которые пропали (сняты с продажи /
+удалены). Если набор id с тех пор поменялся, дельты нет — новая строка могла
+измениться раньше since, и клиент её бы не получил: отдаём все строки.
+
+Превью фото — самая маленькая webp-производная; сведения о производных всех
+строк читаются из кеша одним get_many (derivatives.prefetch).
+"""
+
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+
+from main.models import SparePart, SparePartImage
+from main.services.media import derivatives
+
+MAX_CART_LINES = 100
+
+
+def parse_ids(raw):
+    """'1,2,x,3' → [1, 2, 3] (без дублей, не больше MAX_CART_LINES)."""
+    ids = []
+    for token in (raw or '').split(','):
+        token = token.strip()
+        if token.isdigit() and int(token) not in ids:
+            ids.append(int(token))
+    return ids[:MAX_CART_LINES]
+
+
+def _ids_digest(ids):
+    return hashlib.md5(','.join(map(str, sorted(ids))).encode()).hexdigest()[:8]
+
+
+def _to_version(dt, ids):
+    return '%d.%s' % (int(dt.timestamp() * 1_000_000) if dt else 0, _ids_digest(ids))
+
+
+def _from_version(version, ids):
+    """since → момент, после которого нужны изменения. None — отдать все строки:
+    версия битая или выдана для другого набора id."""
+    micros, _, digest = str(version or '').partition('.')
+    if digest != _ids_digest(ids):
+        return None
+    try:
+        value = int(micros)
+    except ValueError:
+        return None
+    if value <= 0:
+        return None
+    return datetime.fromtimestamp(value / 1_000_000, tz=dt_timezone.utc)
+
+
+def cart_version(ids):
+    """(version, etag) одним агрегатным запросом.
+
+    Фото у запчасти своего updated_at нет — поэтому в ETag идут ещё
+    max(id) и количество фото: добавили/удалили фото → ETag поменялся.
+    """
+    if not ids:
+        return 0, '"cart-empty"'
+    agg = SparePart.objects.filter(id__in=ids).aggregate(
+        ts=Max('updated_at'),
+        active=Count('id', filter=Q(is_active=True), distinct=True),
+        img_max=Max('images__id'),
+        img_count=Count('images', distinct=True),
+    )
+    version = _to_version(agg['ts'], ids)
+    raw = f"{version}|{agg['active']}|{agg['img_max']}|{agg['img_count']}"
+    return version, '"cart-%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def _thumb_url(field_file):
+    # Самая маленькая готовая webp-производная, иначе оригинал
+    items = derivatives.variants(field_file)
+    return items[0][1] if items else field_file.url
+
+
+def price_lines(ids, since=None):
+    """Строки корзины одним запросом.
+
+    since — версия от предыдущего ответа: вернутся только строки,
+    изменившиеся после неё, и 'removed' — id, которых больше нет в продаже.
+    Версия от другого набора id — вернутся все строки.
+    """
+    primary_image = (
+        SparePartImage.objects
+        .filter(part=OuterRef('pk'))
+        .order_by('order', 'id')
+        .values('image')[:1]
+    )
+    parts = (
+        SparePart.objects
+        .filter(id__in=ids, is_active=True)
+        .select_related('type')
+        .annotate(primary_image=Subquery(primary_image))
+    )
+    since_dt = _from_version(since, ids)
+    image_field = SparePartImage._meta.get_field('image')
+
+    rows, found = [], set()
+    for p in parts:
+        found.add(p.id)
+        if since_dt and p.updated_at <= since_dt:
+            continue
+        image = image_field.attr_class(None, image_field, p.primary_image) if p.primary_image else None
+        rows.append((p, image))
+    derivatives.prefetch(image for _, image in rows)
+
+    items = []
+    for p, image in rows:
+        items.append({
+            'id': p.id,
+            'part_number': p.part_number,
+            'name': p.name_ru or p.name,
+            'type': (p.type.name_ru or p.type.name) if p.type_id else None,
+            'price': float(p.price),
+            'quantity_available': p.quantity,
+            'image_url': image.url if image else None,
+            'thumb_url': _thumb_url(image) if image else None,
+        })
+
+    result = {'items': items}
+    if since:
+        result['removed'] = [i for i in ids if i not in found]
+    return result
@@ -0,0 +1,374 @@
+# main/services/shop/catalog_import.py
+"""Импорт каталога запчастей из XLSX/CSV (выгрузка склада 1С).
+
+Поток:
+  1) read_rows() — строки файла потоком: openpyxl в read_only, CSV через
+     csv.reader. Весь файл в память не грузится.
+  2) import_parts() — пачками по batch_size:
+       - типы сопоставляются по одной карте в памяти (name_ru без регистра),
+         новые типы создаются один раз на весь импорт;
+       - существующие запчасти пачки — одним запросом (для diff);
+       - изменившиеся/новые — одним bulk_create(update_conflicts=True)
+         по part_number; неизменные строки не пишутся вовсе.
+  3) Сигналы при bulk_create не срабатывают — поэтому search_vector, кеш
+     фасетов и журнал остатков (StockMovement) обновляются здесь же, явно.
+
+Каждая пачка — своя короткая транзакция: блокировки строк склада держатся
+на время одной пачки, а не всего файла, и оформление заказа (reserve_stock)
+ждёт не дольше неё. Упавший посреди файла импорт оставляет записанными
+прошлые пачки — повторный запуск того же файла их пропустит как неизменные.
+
+dry_run=True — тот же разбор и diff, но ничего не пишется и строки не
+блокируются. Ошибки — построчно в report.errors, импорт не прерывают.
+
+    with open(path, 'rb') as f:
+        report = import_parts(read_rows(f, path), dry_run=True)
+"""
+
+import csv
+import io
+import os
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+import openpyxl
+from django.db import transaction
+from django.utils import translation
+
+from main.models import SparePart, SparePartType, StockMovement, normalize_part_number, normalize_type_name
+from main.services.shop.facets import invalidate_facets_cache
+from main.services.shop.search import refresh_search_vector
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_DIFF_ENTRIES = 500
+
+# Заголовок файла → поле. Регистр и пробелы по краям не важны.
+COLUMN_ALIASES = {
+    'part_number': ('part_number', 'артикул', 'код', 'номер детали'),
+    'name_ru':     ('name', 'name_ru', 'наименование', 'название', 'номенклатура'),
+    'type':        ('type', 'тип', 'тип запчасти', 'группа'),
+    'price':       ('price', 'цена'),
+    'quantity':    ('quantity', 'qty', 'количество', 'остаток'),
+    'is_active':   ('is_active', 'active', 'в продаже', 'активна'),
+}
+# Без этих полей новую запчасть не создать (у существующей можно не указывать)
+REQUIRED_FOR_NEW = ('name_ru', 'type', 'price')
+
+_TRUE = {'1', 'да', 'yes', 'true', 'y', '+', 'ha'}
+_FALSE = {'0', 'нет', 'no', 'false', 'n', '-', "yo'q"}
+
+
+class ImportFormatError(Exception):
+    """Файл не читается или нет обязательной колонки."""
+
+
+@dataclass
+class ImportReport:
+    dry_run: bool = False
+    total: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    types_created: list = field(default_factory=list)
+    # (номер строки, артикул, сообщение)
+    errors: list = field(default_factory=list)
+    # (артикул, {поле: (было, стало)}) — для новых «было» = None
+    changes: list = field(default_factory=list)
+
+    def add_change(self, part_number, diff):
+        if len(self.changes) < MAX_DIFF_ENTRIES:
+            self.changes.append((part_number, diff))
+
+
+# ---------- чтение файла ----------
+
+def _map_header(header):
+    mapping = {}
+    for index, title in enumerate(header):
+        title = str(title or '').strip().lower()
+        for name, aliases in COLUMN_ALIASES.items():
+            if title in aliases and name not in mapping.values():
+                mapping[index] = name
+                break
+    if 'part_number' not in mapping.values():
+        raise ImportFormatError('В файле нет колонки «Артикул» (part_number)')
+    return mapping
+
+
+def _iter_xlsx(fileobj):
+    try:
+        wb = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError(f'Не удалось открыть XLSX: {e}')
+    try:
+        yield from wb.active.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _iter_csv(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=';,\t')
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(text, dialect)
+
+
+def read_rows(fileobj, filename):
+    """Генератор (номер строки в файле, {поле: сырое значение}).
+
+    fileobj — бинарный файл. Формат — по расширению filename.
+    Пустые строки пропускаются; номер строки считается с заголовком (= 1).
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in ('.xlsx', '.xlsm'):
+        rows = _iter_xlsx(fileobj)
+    elif ext in ('.csv', '.txt'):
+        rows = _iter_csv(fileobj)
+    else:
+        raise ImportFormatError(f'Неподдерживаемый формат: {ext or filename}')
+
+    header = next(rows, None)
+    if not header:
+        raise ImportFormatError('Файл пустой')
+    mapping = _map_header(header)
+
+    for row_no, row in enumerate(rows, start=2):
+        if not row or all(v is None or str(v).strip() == '' for v in row):
+            continue
+        yield row_no, {
+            name: row[index] if index < len(row) else None
+            for index, name in mapping.items()
+        }
+
+
+# ---------- разбор значений ----------
+
+def _parse_price(value):
+    if isinstance(value, (int, float, Decimal)):
+        price = Decimal(str(value))
+    else:
+        raw = str(value).replace('\xa0', '').replace(' ', '').replace(',', '.')
+        price = Decimal(raw)
+    if price < 0:
+        raise InvalidOperation
+    return price.quantize(Decimal('0.01'))
+
+
+def _parse_quantity(value):
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError
+        value = int(value)
+    quantity = int(str(value).strip().replace(' ', ''))
+    if quantity < 0:
+        raise ValueError
+    return quantity
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    raw = str(value).strip().lower()
+    if raw in _TRUE:
+        return True
+    if raw in _FALSE:
+        return False
+    raise ValueError
+
+
+def _is_empty(value):
+    return value is None or str(value).strip() == ''
+
+
+def _clean_row(raw):
+    """Сырые значения → {поле: значение} только по заполненным ячейкам.
+    Ошибка формата → ValueError с понятным текстом.
+    """
+    data = {}
+    part_number = '' if _is_empty(raw.get('part_number')) else str(raw['part_number']).strip()
+    if isinstance(raw.get('part_number'), float) and raw['part_number'].is_integer():
+        part_number = str(int(raw['part_number']))  # Excel превращает '1001' в 1001.0
+    if not part_number:
+        raise ValueError('пустой артикул')
+    if len(part_number) > 100:
+        raise ValueError('артикул длиннее 100 символов')
+    data['part_number'] = part_number
+
+    if not _is_empty(raw.get('name_ru')):
+        data['name_ru'] = ' '.join(str(raw['name_ru']).split())[:255]
+    if not _is_empty(raw.get('type')):
+        data['type'] = normalize_type_name(raw['type'])[:100]
+    if not _is_empty(raw.get('price')):
+        try:
+            data['price'] = _parse_price(raw['price'])
+        except (InvalidOperation, ValueError):
+            raise ValueError(f'некорректная цена: {raw["price"]!r}')
+    if not _is_empty(raw.get('quantity')):
+        try:
+            data['quantity'] = _parse_quantity(raw['quantity'])
+        except ValueError:
+            raise ValueError(f'некорректное количество: {raw["quantity"]!r}')
+    if not _is_empty(raw.get('is_active')):
+        try:
+            data['is_active'] = _parse_bool(raw['is_active'])
+        except ValueError:
+            raise ValueError(f'некорректное значение «В продаже»: {raw["is_active"]!r}')
+    return data
+
+
+# ---------- импорт ----------
+
+class _TypeMap:
+    """name_ru (lower) → id типа. Один запрос на старте, новые создаются по одному разу."""
+
+    def __init__(self, report):
+        self.report = report
+        self.ids = {}
+        for type_id, name in SparePartType.objects.values_list('id', 'name_ru'):
+            key = normalize_type_name(name).lower()
+            if key:
+                self.ids.setdefault(key, type_id)
+
+    def resolve(self, name):
+        key = name.lower()
+        if key not in self.ids:
+            if self.report.dry_run:
+                self.ids[key] = None  # в dry-run тип не создаём
+            else:
+                self.ids[key] = SparePartType.objects.create(name=name, name_ru=name).id
+            self.report.types_created.append(name)
+        return self.ids[key]
+
+
+_DIFF_FIELDS = ('name_ru', 'type_id', 'price', 'quantity', 'is_active')
+STOCK_COMMENT = 'Импорт остатков'
+
+
+def _apply_batch(batch, types, report):
+    """batch — [(row_no, data)]. Пишет новые/изменившиеся одним bulk_create."""
+    queryset = SparePart.objects.filter(part_number__in=[data['part_number'] for _, data in batch])
+    if not report.dry_run:
+        # Строки блокируются до расчёта дельт и до конца транзакции пачки:
+        # продажа или правка в админке между чтением и upsert иначе дала бы
+        # в журнале движение от устаревшего остатка. Порядок id — как в
+        # adjust_stock, а других блокировок транзакция пачки не держит.
+        queryset = queryset.select_for_update().order_by('id')
+    existing = {row['part_number']: row for row in queryset.values('id', 'part_number', *_DIFF_FIELDS)}
+
+    to_write = []
+    for row_no, data in batch:
+        current = existing.get(data['part_number'])
+        values = dict(data)
+        if 'type' in values:
+            values['type_id'] = types.resolve(values.pop('type'))
+
+        if current is None:
+            missing = [f for f in REQUIRED_FOR_NEW if f not in data]
+            if missing:
+                report.errors.append((row_no, data['part_number'],
+                                      'новая запчасть: не заполнено ' + ', '.join(missing)))
+                continue
+            report.created += 1
+            report.add_change(data['part_number'], {f: (None, values[f]) for f in _DIFF_FIELDS if f in values})
+            merged = {'quantity': 0, 'is_active': True, **values}
+        else:
+            diff = {f: (current[f], values[f]) for f in _DIFF_FIELDS
+                    if f in values and values[f] != current[f]}
+            if not diff:
+                report.unchanged += 1
+                continue
+            report.updated += 1
+            report.add_change(data['part_number'], diff)
+            merged = {f: current[f] for f in _DIFF_FIELDS}
+            merged.update(values)
+
+        to_write.append(SparePart(
+            part_number=data['part_number'],
+            part_number_normalized=normalize_part_number(data['part_number']),
+            name=merged['name_ru'],
+            **{f: merged[f] for f in _DIFF_FIELDS},
+        ))
+
+    if report.dry_run or not to_write:
+        return
+
+    written = SparePart.objects.bulk_create(
+        to_write,
+        update_conflicts=True,
+        unique_fields=['part_number'],
+        update_fields=['name_ru', 'type', 'price', 'quantity', 'is_active', 'updated_at'],
+    )
+    refresh_search_vector(SparePart.objects.filter(part_number__in=[p.part_number for p in to_write]))
+
+    # Журнал: новая запчасть — начальный остаток, изменение — приход/корректировка
+    movements = []
+    for part in written:
+        current = existing.get(part.part_number)
+        delta = part.quantity - (current['quantity'] if current else 0)
+        if not delta:
+            continue
+        if current is None:
+            kind = StockMovement.KIND_OPENING
+        elif delta > 0:
+            kind = StockMovement.KIND_RECEIPT
+        else:
+            kind = StockMovement.KIND_ADJUSTMENT
+        movements.append(StockMovement(
+            part_id=part.pk, kind=kind, delta=delta,
+            quantity_after=part.quantity, comment=STOCK_COMMENT,
+        ))
+    StockMovement.objects.bulk_create(movements)
+
+
+def _apply_batch_atomic(batch, types, report):
+    if report.dry_run:
+        _apply_batch(batch, types, report)
+        return
+    with transaction.atomic():
+        _apply_batch(batch, types, report)
+
+
+def import_parts(rows, dry_run=False, batch_size=DEFAULT_BATCH_SIZE):
+    """rows — итератор (row_no, сырые значения) из read_rows(). Возвращает ImportReport."""
+    report = ImportReport(dry_run=dry_run)
+    seen = {}
+
+    try:
+        # name=... при создании modeltranslation кладёт в поле текущего языка —
+        # импорт пишет только RU
+        with translation.override('ru'):
+            types = _TypeMap(report)
+            batch = []
+            for row_no, raw in rows:
+                report.total += 1
+                try:
+                    data = _clean_row(raw)
+                except ValueError as e:
+                    pn = '' if _is_empty(raw.get('part_number')) else str(raw['part_number']).strip()
+                    report.errors.append((row_no, pn, str(e)))
+                    continue
+                # Один артикул дважды в файле — ON CONFLICT не может обновить строку дважды
+                if data['part_number'] in seen:
+                    report.errors.append((row_no, data['part_number'],
+                                          f'артикул уже был в строке {seen[data["part_number"]]}'))
+                    continue
+                seen[data['part_number']] = row_no
+
+                batch.append((row_no, data))
+                if len(batch) >= batch_size:
+                    _apply_batch_atomic(batch, types, report)
+                    batch = []
+            if batch:
+                _apply_batch_atomic(batch, types, report)
+    finally:
+        # Прошлые пачки уже закоммичены, даже если импорт упал посреди файла
+        if not dry_run and (report.created or report.updated):
+            invalidate_facets_cache()
+
+    # Ошибки «новая без обязательных полей» ловятся на уровне пачки — упорядочим
+    report.errors.sort(key=lambda e: e[0])
+    return report
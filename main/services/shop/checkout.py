@@ -0,0 +1,135 @@
+# main/services/shop/checkout.py
+"""Оформление счёта: строки черновика и списание склада при подтверждении.
+
+Раньше каждая строка — отдельный INSERT, а списание — отдельный UPDATE на
+строку внутри транзакции с блокировками. На оптовых заказах (100+ строк)
+блокировки SparePart держались долго и тормозили других дилеров.
+
+Теперь:
+  - строки черновика — один bulk_create;
+  - списание — ОДИН запрос: блокируем нужные строки по возрастанию id
+    (одинаковый порядок у всех транзакций → нет взаимных блокировок) и
+    уменьшаем остаток через UPDATE ... FROM (VALUES ...) с проверкой
+    «хватает ли» прямо в WHERE. Что не списалось — откатываем всё;
+  - номер счёта — из InvoiceCounter одним upsert'ом в самом конце транзакции.
+"""
+
+from decimal import Decimal
+
+from django.db import connection
+from django.utils import timezone
+
+from main.models import InvoiceCounter, InvoiceItem, SparePart, StockMovement
+
+
+class StockError(Exception):
+    """Не хватило остатка / запчасть снята с продажи. Транзакцию надо откатить."""
+
+    def __init__(self, part_id, requested, available=None):
+        self.part_id = part_id
+        self.requested = requested
+        self.available = available  # None — запчасти нет или она неактивна
+        super().__init__(f'part {part_id}: requested {requested}, available {available}')
+
+
+def build_invoice_items(invoice, requested, parts_by_id):
+    """Строки черновика одним bulk_create.
+
+    requested — {part_id: qty}; количество обрезается по остатку,
+    отсутствующие позиции пропускаются. Возвращает сумму счёта.
+    """
+    lines = []
+    total = Decimal('0')
+    for pid, qty in requested.items():
+        part = parts_by_id.get(pid)
+        if not part:
+            continue
+        actual_qty = min(qty, part.quantity)
+        if actual_qty < 1:
+            continue
+        line_sum = (part.price * actual_qty).quantize(Decimal('0.01'))
+        lines.append(InvoiceItem(
+            invoice=invoice,
+            part=part,
+            name=part.name_ru or part.name,
+            quantity=actual_qty,
+            unit='шт',
+            price=part.price,
+            sum=line_sum,
+        ))
+        total += line_sum
+    InvoiceItem.objects.bulk_create(lines)
+    return total
+
+
+def reserve_stock(quantities, invoice=None):
+    """Списывает остатки одним запросом. Вызывать внутри transaction.atomic().
+
+    quantities — {part_id: qty}. При нехватке / неактивной запчасти
+    бросает StockError (с остатком первой проблемной позиции) — вызывающий
+    код должен откатить транзакцию, частичное списание не сохранится.
+    Движения «продажа» в журнал склада — одним bulk_create.
+    """
+    if not quantities:
+        return
+    rows = sorted(quantities.items())
+    table = SparePart._meta.db_table
+    values_sql = ', '.join(['(%s::bigint, %s::integer)'] * len(rows))
+    params = [v for row in rows for v in row]
+
+    # MATERIALIZED — чтобы блокировка гарантированно прошла в порядке id
+    # отдельным шагом до UPDATE (CTE с FOR UPDATE не инлайнится, но явно надёжнее)
+    sql = f'''
+        WITH req(id, qty) AS (VALUES {values_sql}),
+        locked AS MATERIALIZED (
+            SELECT p.id FROM {table} p
+            JOIN req ON req.id = p.id
+            ORDER BY p.id
+            FOR UPDATE OF p
+        )
+        UPDATE {table} p
+        SET quantity = p.quantity - req.qty, updated_at = %s
+        FROM req JOIN locked ON locked.id = req.id
+        WHERE p.id = req.id AND p.is_active AND p.quantity >= req.qty
+        RETURNING p.id, p.quantity
+    '''
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [timezone.now()])
+        updated = dict(cursor.fetchall())
+
+    failed = [pid for pid, _ in rows if pid not in updated]
+    if failed:
+        pid = failed[0]
+        # Строка уже заблокирована нами — остаток актуальный
+        part = SparePart.objects.filter(id=pid, is_active=True).values('quantity').first()
+        raise StockError(pid, quantities[pid], part['quantity'] if part else None)
+
+    StockMovement.objects.bulk_create([
+        StockMovement(
+            part_id=pid,
+            kind=StockMovement.KIND_SALE,
+            delta=-qty,
+            quantity_after=updated[pid],
+            invoice=invoice,
+        )
+        for pid, qty in rows
+    ])
+
+
+def allocate_invoice_number(year):
+    """Следующий номер счёта за год. Вызывать внутри transaction.atomic(),
+    последним шагом перед сохранением счёта.
+
+    INSERT ... ON CONFLICT DO UPDATE ... RETURNING — атомарно и без
+    select_for_update на счетах. Строка счётчика блокируется до коммита:
+    параллельные подтверждения ждут только друг друга на этом шаге, зато
+    при откате номер возвращается — нумерация без дыр и дублей.
+    """
+    table = InvoiceCounter._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'''
+            INSERT INTO {table} (year, last_number) VALUES (%s, 1)
+            ON CONFLICT (year) DO UPDATE SET last_number = {table}.last_number + 1
+            RETURNING last_number
+        ''', [year])
+        return cursor.fetchone()[0]
@@ -0,0 +1,190 @@
+# main/services/shop/documents.py
+"""Документ счёта: рендер один раз → файл, дальше отдаём готовый.
+
+Подтверждённый счёт не меняется (кроме статуса, которого в документе нет),
+а рендер дорогой: format_uzs на каждую строку + сумма прописью (num2words).
+Поэтому HTML документа (_invoice_document.html) сохраняется в
+INVOICE_DOCUMENTS_ROOT под ключом id + версия:
+
+    <id>/v<version>.html
+
+версия — хеш полей шапки + DOCUMENT_VERSION (поднять при правке шаблона).
+Изменилось что-то в шапке → другая версия → перерендер, старый файл удаляется.
+Черновики рендерятся каждый раз и не сохраняются.
+
+Файл пишется во временный и переименовывается (os.replace) на место:
+два воркера, отрендерившие счёт одновременно, пишут один и тот же путь,
+а читатель видит либо весь файл, либо никакого.
+
+build_archive() — ZIP всех счетов за период (не длиннее ARCHIVE_MAX_DAYS)
+для бухгалтера, во временном файле.
+"""
+
+import hashlib
+import os
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db.models import prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from main.utils.invoice_format import amount_in_words_uzs, format_date_ru, format_uzs
+
+DOCUMENT_VERSION = 1
+DOCUMENT_TEMPLATE = 'main/dealer/_invoice_document.html'
+STANDALONE_TEMPLATE = 'main/dealer/invoice_document.html'
+
+# Архив собирается целиком до отдачи — период ограничен
+ARCHIVE_MAX_DAYS = 92
+
+
+def _storage():
+    return FileSystemStorage(location=settings.INVOICE_DOCUMENTS_ROOT)
+
+
+def document_version(invoice):
+    # Decimal('5') и Decimal('5.00') из БД — одна и та же сумма, одна версия
+    raw = '|'.join(str(v) for v in (
+        DOCUMENT_VERSION, invoice.year, invoice.number, invoice.confirmed_at,
+        invoice.buyer_company_name, invoice.buyer_inn, invoice.buyer_contract_number,
+        f'{invoice.total_amount:.2f}',
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()[:12]
+
+
+def _document_path(invoice):
+    return f'{invoice.id}/v{document_version(invoice)}.html'
+
+
+def document_context(invoice):
+    """Контекст _invoice_document.html — всё форматирование здесь."""
+    is_draft = invoice.is_draft
+    # Для черновика дата = момент создания; для подтверждённого = confirmed_at
+    invoice_date = invoice.created_at if is_draft else (invoice.confirmed_at or invoice.created_at)
+    return {
+        'invoice': {
+            'is_draft': is_draft,
+            # str() — против USE_THOUSAND_SEPARATOR=True ('2026' вместо '2 026')
+            'number': str(invoice.number) if invoice.number is not None else '',
+            'year': str(invoice.year) if invoice.year is not None else '',
+            'date': format_date_ru(invoice_date),
+        },
+        'buyer': {
+            'name': invoice.buyer_company_name,
+            'inn': invoice.buyer_inn,
+            'contract_number': invoice.buyer_contract_number,
+        },
+        'items': [
+            {
+                'name': it.name,
+                'quantity': it.quantity,
+                'unit': it.unit,
+                'price_formatted': format_uzs(it.price),
+                'sum_formatted': format_uzs(it.sum),
+            }
+            for it in invoice.items.all()
+        ],
+        'totals': {
+            'amount_formatted': format_uzs(invoice.total_amount),
+            'currency': 'UZS',
+            'amount_in_words': amount_in_words_uzs(invoice.total_amount),
+        },
+    }
+
+
+def render_document(invoice):
+    return render_to_string(DOCUMENT_TEMPLATE, document_context(invoice))
+
+
+def get_document_html(invoice):
+    """Готовый HTML документа (безопасная строка для {{ document_html }})."""
+    if invoice.is_draft:
+        return mark_safe(render_document(invoice))
+
+    storage = _storage()
+    path = _document_path(invoice)
+    try:
+        with storage.open(path, 'rb') as f:
+            return mark_safe(f.read().decode('utf-8'))
+    except FileNotFoundError:
+        pass
+
+    html = render_document(invoice)
+    _write_document(storage, path, html.encode('utf-8'))
+    _delete_other_versions(storage, invoice.id, keep=os.path.basename(path))
+    return mark_safe(html)
+
+
+def _write_document(storage, path, content):
+    """Атомарная запись: временный файл рядом + os.replace.
+
+    storage.save() при занятом имени сохранил бы копию под другим именем,
+    а удаление перед записью открывает окно, в котором файла нет.
+    """
+    full_path = storage.path(path)
+    directory = os.path.dirname(full_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, full_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _delete_other_versions(storage, invoice_id, keep):
+    # Только готовые версии: .tmp — чужая запись, которая ещё идёт
+    try:
+        _, files = storage.listdir(str(invoice_id))
+    except FileNotFoundError:
+        return
+    for name in files:
+        if name != keep and name.endswith('.html'):
+            storage.delete(f'{invoice_id}/{name}')
+
+
+def delete_documents(invoice_id):
+    storage = _storage()
+    try:
+        _, files = storage.listdir(str(invoice_id))
+    except FileNotFoundError:
+        return
+    for name in files:
+        storage.delete(f'{invoice_id}/{name}')
+
+
+def archive_name(invoice):
+    return f'invoice_{invoice.year}_{invoice.number:05d}.html'
+
+
+def build_archive(invoices):
+    """ZIP со standalone-HTML каждого счёта. invoices — подтверждённые.
+
+    Возвращает временный файл (открыт, в начале) — для FileResponse, который
+    его и закроет. Строки счёта грузятся одним запросом и только для тех
+    счетов, у которых документ ещё не сохранён.
+    """
+    invoices = list(invoices)
+    storage = _storage()
+    prefetch_related_objects(
+        [invoice for invoice in invoices if not storage.exists(_document_path(invoice))],
+        'items',
+    )
+
+    archive_file = tempfile.TemporaryFile()
+    with zipfile.ZipFile(archive_file, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for invoice in invoices:
+            page = render_to_string(STANDALONE_TEMPLATE, {
+                'number': str(invoice.number),
+                'year': str(invoice.year),
+                'document_html': get_document_html(invoice),
+            })
+            archive.writestr(archive_name(invoice), page)
+    archive_file.seek(0)
+    return archive_file
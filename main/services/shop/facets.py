@@ -0,0 +1,110 @@
+# main/services/shop/facets.py
+"""Фасеты фильтр-бара магазина: грузовики и типы с количеством запчастей.
+
+Один GROUP BY (truck, type) по активным запчастям с учётом поиска, дальше
+в Python сворачиваем в два списка:
+  - грузовики считаются с учётом выбранного типа (но не грузовика),
+  - типы — с учётом выбранного грузовика (но не типа).
+Так в селекте видно, сколько найдётся, если переключить значение.
+
+Без поиска группировка одна и та же для всех дилеров — кешируем её,
+сбрасываем на изменениях SparePart / SparePartType / Product (main/signals.py).
+"""
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils.translation import get_language
+
+from main.models import SparePart
+
+FACETS_CACHE_TTL = 60 * 10
+_CACHE_LANGS = ('ru', 'uz', 'en')
+
+
+def _cache_key(lang):
+    return f'shop_facets_{lang}'
+
+
+def _current_lang():
+    lang = (get_language() or 'ru').split('-')[0]
+    return lang if lang in _CACHE_LANGS else 'ru'
+
+
+def invalidate_facets_cache():
+    cache.delete_many([_cache_key(lang) for lang in _CACHE_LANGS])
+
+
+def _grouped_rows(queryset, lang):
+    rows = (
+        queryset
+        .order_by()  # иначе ORDER BY (search_rank и т.п.) попадёт в GROUP BY
+        .values(
+            'truck_id', 'truck__title', f'truck__title_{lang}',
+            'type_id', 'type__name', 'type__name_ru',
+        )
+        .annotate(n=Count('id'))
+    )
+    return [
+        {
+            'truck_id': r['truck_id'],
+            'truck_title': r[f'truck__title_{lang}'] or r['truck__title'] or '',
+            'type_id': r['type_id'],
+            'type_name': r['type__name_ru'] or r['type__name'] or '',
+            'n': r['n'],
+        }
+        for r in rows
+    ]
+
+
+def _cached_rows(lang):
+    key = _cache_key(lang)
+    rows = cache.get(key)
+    if rows is None:
+        rows = _grouped_rows(SparePart.objects.filter(is_active=True), lang)
+        cache.set(key, rows, FACETS_CACHE_TTL)
+    return rows
+
+
+def get_facets(search_queryset=None, truck_id=None, type_id=None):
+    """search_queryset — активные запчасти, уже отфильтрованные поиском
+    (None = без поиска, берём кеш). truck_id/type_id — выбранные значения.
+
+    Возвращает {'trucks': [...], 'types': [...]} — элементы
+    {'id', 'title'|'name', 'count', 'selected'}, отсортированы по названию.
+    """
+    lang = _current_lang()
+    if search_queryset is None:
+        rows = _cached_rows(lang)
+    else:
+        rows = _grouped_rows(search_queryset, lang)
+
+    trucks, types = {}, {}
+    for r in rows:
+        if r['truck_id'] and (not type_id or r['type_id'] == type_id):
+            t = trucks.setdefault(r['truck_id'], {'id': r['truck_id'], 'title': r['truck_title'], 'count': 0})
+            t['count'] += r['n']
+        if not truck_id or r['truck_id'] == truck_id:
+            t = types.setdefault(r['type_id'], {'id': r['type_id'], 'name': r['type_name'], 'count': 0})
+            t['count'] += r['n']
+
+    # Выбранное значение показываем всегда, даже если под фильтром 0 —
+    # иначе селект «потеряет» текущий выбор. Название берём из общего кеша.
+    if (truck_id and truck_id not in trucks) or (type_id and type_id not in types):
+        label_rows = rows if search_queryset is None else _cached_rows(lang)
+    else:
+        label_rows = []
+    for r in label_rows:
+        if truck_id and r['truck_id'] == truck_id and truck_id not in trucks:
+            trucks[truck_id] = {'id': truck_id, 'title': r['truck_title'], 'count': 0}
+        if type_id and r['type_id'] == type_id and type_id not in types:
+            types[type_id] = {'id': type_id, 'name': r['type_name'], 'count': 0}
+
+    for t in trucks.values():
+        t['selected'] = t['id'] == truck_id
+    for t in types.values():
+        t['selected'] = t['id'] == type_id
+
+    return {
+        'trucks': sorted(trucks.values(), key=lambda t: t['title'].lower()),
+        'types': sorted(types.values(), key=lambda t: t['name'].lower()),
+    }
@@ -0,0 +1,111 @@
+# main/services/shop/search.py
+"""Поиск запчастей: pg_trgm + tsvector.
+
+Что ищем:
+  - артикул — по нормализованной колонке part_number_normalized
+    (без дефисов/пробелов, UPPER), подстрока + trigram-похожесть;
+  - название на ru/uz/en — UPPER(name_xx) LIKE и word-similarity (опечатки);
+  - search_vector — префиксный tsquery по словам ('simple', без стемминга).
+
+Ранжирование: точный артикул > префикс артикула > похожесть.
+Все условия покрыты GIN-индексами из SparePart.Meta.indexes.
+"""
+
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector,
+    TrigramSimilarity, TrigramWordSimilarity,
+)
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Greatest, Upper
+
+from main.models import SparePart, normalize_part_number
+
+NAME_FIELDS = ('name_ru', 'name_uz', 'name_en')
+
+MIN_QUERY_LENGTH = 2
+AUTOCOMPLETE_LIMIT = 10
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_search_vector():
+    return (
+        SearchVector('part_number', weight='A', config='simple')
+        + SearchVector('part_number_normalized', weight='A', config='simple')
+        + SearchVector(*NAME_FIELDS, weight='B', config='simple')
+    )
+
+
+def refresh_search_vector(queryset):
+    """Пересчитать tsvector для выборки. Вызывается после save() и массовых импортов."""
+    return queryset.update(search_vector=build_search_vector())
+
+
+def _prefix_tsquery(q):
+    words = _WORD_RE.findall(q.lower())
+    if not words:
+        return None
+    raw = ' & '.join(f'{w}:*' for w in words)
+    return SearchQuery(raw, search_type='raw', config='simple')
+
+
+def search_parts(queryset, q):
+    """Фильтр + ранжирование. Возвращает queryset с аннотацией search_rank,
+    отсортированный по релевантности (order_by можно переопределить снаружи).
+    """
+    q = (q or '').strip()
+    if not q:
+        return queryset
+    norm = normalize_part_number(q)
+    if len(q) < MIN_QUERY_LENGTH:
+        # 1 символ — триграммам не хватает данных, ищем только по началу артикула
+        return queryset.filter(part_number_normalized__startswith=norm) if norm else queryset.none()
+
+    q_upper = q.upper()
+
+    annotations = {
+        f'_{f}_upper': Upper(f) for f in NAME_FIELDS
+    }
+    qs = queryset.annotate(**annotations)
+
+    condition = Q()
+    if norm:
+        condition |= Q(part_number_normalized__contains=norm)
+    for f in NAME_FIELDS:
+        condition |= Q(**{f'_{f}_upper__contains': q_upper})
+        condition |= Q(**{f'_{f}_upper__trigram_word_similar': q_upper})
+    tsquery = _prefix_tsquery(q)
+    if tsquery is not None:
+        condition |= Q(search_vector=tsquery)
+
+    similarities = [
+        TrigramWordSimilarity(Value(q_upper), F(f'_{f}_upper')) for f in NAME_FIELDS
+    ]
+    if norm:
+        similarities.append(TrigramSimilarity('part_number_normalized', Value(norm)))
+    if tsquery is not None:
+        similarities.append(SearchRank(F('search_vector'), tsquery))
+
+    boost = Value(0.0)
+    if norm:
+        boost = Case(
+            When(part_number_normalized=norm, then=Value(3.0)),
+            When(part_number_normalized__startswith=norm, then=Value(2.0)),
+            When(part_number_normalized__contains=norm, then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+
+    return (
+        qs.filter(condition)
+        .annotate(search_rank=Greatest(*similarities, output_field=FloatField()) + boost)
+        .order_by('-search_rank', 'id')
+    )
+
+
+def autocomplete(q, limit=AUTOCOMPLETE_LIMIT):
+    """Короткий список для выпадашки поиска — только активные запчасти."""
+    qs = SparePart.objects.filter(is_active=True).select_related('type', 'truck')
+    return list(search_parts(qs, q)[:limit])
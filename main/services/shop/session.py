@@ -0,0 +1,89 @@
+# main/services/shop/session.py
+"""Сессия кабинета дилера/сотрудника (signed cookie 'dealer_sid').
+
+Подпись cookie проверяется на каждом запросе (это дёшево), а вот
+DealerProfile + User раньше читались из БД каждый раз — включая частые
+опросы корзины. Здесь профиль кешируется по id на короткий TTL.
+
+В кеше — не модели целиком (там был бы и хеш пароля), а словарь полей,
+которые нужны кабинету (_PROFILE_FIELDS + логин). Из него собираются
+DealerProfile и User через from_db: остальные поля отложены и, если
+какой-то view до них дотянется (смена пароля), дочитаются из БД.
+
+В ключ входит версия DEALER_SESSIONS (main/utils/cache_versions.py).
+Её меняет сохранение/удаление DealerProfile и смена is_active/логина у
+User (main/signals.py) — деактивация или смена роли доходят до всех
+воркеров не позже чем через CHECK_INTERVAL секунд.
+"""
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from main.models import DealerProfile
+from main.utils.cache_versions import DEALER_SESSIONS, bump_version, get_version
+
+DEALER_COOKIE_NAME    = 'dealer_sid'
+DEALER_COOKIE_MAX_AGE = 60 * 60 * 8  # 8 часов
+DEALER_COOKIE_SALT    = 'main.dealer-auth.v1'
+
+SESSION_CACHE_TTL = 60
+# «Профиля нет / неактивен» тоже кешируем — чтобы протухший cookie не долбил БД
+_MISSING = 0
+
+_PROFILE_FIELDS = (
+    'id', 'user_id', 'role', 'name', 'avatar', 'company_name', 'inn', 'contract_number', 'is_active',
+)
+
+
+def _cache_key(profile_id):
+    return f'dealer_session_{get_version(DEALER_SESSIONS)}_{profile_id}'
+
+
+def profile_id_from_cookie(raw):
+    """Проверяет подпись и срок cookie. Возвращает id профиля или None."""
+    if not raw:
+        return None
+    try:
+        data = signing.loads(raw, salt=DEALER_COOKIE_SALT, max_age=DEALER_COOKIE_MAX_AGE)
+    except signing.BadSignature:
+        # подделка или испорченный cookie
+        return None
+    profile_id = data.get('pid') if isinstance(data, dict) else None
+    return profile_id or None
+
+
+def _build(row):
+    profile = DealerProfile.from_db(DEFAULT_DB_ALIAS, _PROFILE_FIELDS, [row[f] for f in _PROFILE_FIELDS])
+    profile.user = User.from_db(
+        DEFAULT_DB_ALIAS, ('id', 'username', 'is_active'), (row['user_id'], row['user__username'], True),
+    )
+    return profile
+
+
+def get_active_profile(profile_id):
+    """Активный DealerProfile (с user) из кеша или БД; None — если нет/неактивен."""
+    key = _cache_key(profile_id)
+    row = cache.get(key)
+    if row is None:
+        row = (
+            DealerProfile.objects
+            .filter(id=profile_id, is_active=True, user__is_active=True)
+            .values(*_PROFILE_FIELDS, 'user__username')
+            .first()
+        )
+        cache.set(key, row or _MISSING, SESSION_CACHE_TTL)
+    return _build(row) if row else None
+
+
+def resolve_request(request):
+    profile_id = profile_id_from_cookie(request.COOKIES.get(DEALER_COOKIE_NAME))
+    if not profile_id:
+        return None
+    return get_active_profile(profile_id)
+
+
+def invalidate():
+    """Сбросить кеш сессий во всех воркерах. Вызывать после коммита."""
+    bump_version(DEALER_SESSIONS)
@@ -0,0 +1,207 @@
+# main/services/shop/stock.py
+"""Остатки склада: журнал движений (StockMovement) + материализованный quantity.
+
+Любое изменение SparePart.quantity пишет движение в той же транзакции:
+  - корректировки сервиса/админки — adjust_stock() (ниже; SparePartAdmin тоже);
+  - продажа при подтверждении     — checkout.reserve_stock();
+  - возврат при отмене счёта      — return_stock();
+  - импорт из 1С                  — catalog_import;
+  - создание запчасти             — record_movement() из сигнала.
+Сверка журнала с quantity — find_discrepancies() (manage.py reconcile_stock),
+остаток на дату — balances_at().
+
+adjust_stock() применяет пачку строк {part_id, quantity | delta} в ОДНОЙ
+транзакции: запчасти блокируются одним SELECT ... FOR UPDATE в порядке id,
+остатки пишутся одним bulk_update, журнал (StockMovement) — одним bulk_create.
+Раньше инвентаризация = сотни AJAX-запросов по одной запчасти.
+
+Плохая строка (нет запчасти, минус, мусор в числах) не валит всю пачку —
+в результате по ней будет ошибка, остальные применятся.
+"""
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from main.models import SparePart, StockMovement
+
+MAX_ADJUST_LINES = 1000
+ERROR_NOT_FOUND = 'Запчасть не найдена'
+
+
+def _parse_line(raw):
+    """{part_id, quantity | delta} → (part_id, 'quantity'|'delta', int). ValueError с текстом."""
+    if not isinstance(raw, dict):
+        raise ValueError('Некорректная строка')
+    try:
+        part_id = int(raw.get('part_id'))
+    except (TypeError, ValueError):
+        raise ValueError('Нужен part_id')
+
+    if raw.get('quantity') is not None:
+        try:
+            quantity = int(raw['quantity'])
+        except (TypeError, ValueError):
+            quantity = -1
+        if quantity < 0:
+            raise ValueError('quantity должен быть ≥ 0')
+        return part_id, 'quantity', quantity
+    if raw.get('delta') is not None:
+        try:
+            return part_id, 'delta', int(raw['delta'])
+        except (TypeError, ValueError):
+            raise ValueError('delta должен быть числом')
+    raise ValueError('Нужен quantity или delta')
+
+
+def adjust_stock(lines, author=None, comment=''):
+    """Применяет корректировки. Возвращает результат по каждой строке в том же порядке:
+    {'part_id', 'ok': True, 'quantity'} или {'part_id', 'ok': False, 'error'}.
+    Одна запчасть может встречаться несколько раз — строки применяются по порядку.
+    """
+    parsed, results = [], []
+    for raw in lines:
+        try:
+            parsed.append(_parse_line(raw))
+            results.append(None)
+        except ValueError as e:
+            parsed.append(None)
+            part_id = raw.get('part_id') if isinstance(raw, dict) else None
+            results.append({'part_id': part_id, 'ok': False, 'error': str(e)})
+
+    part_ids = sorted({line[0] for line in parsed if line})
+    if not part_ids:
+        return results
+
+    with transaction.atomic():
+        # Порядок id одинаковый у всех транзакций — без взаимных блокировок
+        parts = {
+            p.id: p
+            for p in SparePart.objects
+            .select_for_update()
+            .filter(id__in=part_ids)
+            .order_by('id')
+            .only('id', 'quantity', 'part_number')
+        }
+
+        now = timezone.now()
+        changed, movements = {}, []
+        for index, line in enumerate(parsed):
+            if not line:
+                continue
+            part_id, mode, value = line
+            part = parts.get(part_id)
+            if not part:
+                results[index] = {'part_id': part_id, 'ok': False, 'error': ERROR_NOT_FOUND}
+                continue
+
+            new_quantity = value if mode == 'quantity' else part.quantity + value
+            if new_quantity < 0:
+                results[index] = {
+                    'part_id': part_id, 'ok': False,
+                    'error': f'Нельзя уйти в минус (текущий остаток: {part.quantity})',
+                }
+                continue
+
+            delta = new_quantity - part.quantity
+            part.quantity = new_quantity
+            results[index] = {'part_id': part_id, 'ok': True, 'quantity': new_quantity}
+            if delta:
+                part.updated_at = now  # версия корзины (main/services/shop/cart.py)
+                changed[part_id] = part
+                movements.append(StockMovement(
+                    part_id=part_id,
+                    kind=StockMovement.KIND_ADJUSTMENT,
+                    delta=delta,
+                    quantity_after=new_quantity,
+                    author=author,
+                    comment=comment[:255],
+                ))
+
+        if changed:
+            SparePart.objects.bulk_update(changed.values(), ['quantity', 'updated_at'])
+            StockMovement.objects.bulk_create(movements)
+    return results
+
+
+def record_movement(part, delta, kind, author=None, comment='', invoice=None):
+    """Одно движение для уже сохранённого остатка part.quantity."""
+    if not delta:
+        return None
+    return StockMovement.objects.create(
+        part=part, kind=kind, delta=delta, quantity_after=part.quantity,
+        author=author, comment=comment[:255], invoice=invoice,
+    )
+
+
+def return_stock(invoice, author=None, comment=''):
+    """Отмена подтверждённого счёта: вернуть товар на склад.
+
+    Возвращаются ровно те количества, что были списаны при подтверждении
+    (движения «продажа» этого счёта); повторный вызов ничего не делает.
+    """
+    with transaction.atomic():
+        sold = dict(
+            StockMovement.objects
+            .filter(invoice=invoice, kind=StockMovement.KIND_SALE)
+            .values_list('part_id')
+            .annotate(qty=Sum('delta'))
+        )
+        if not sold or StockMovement.objects.filter(invoice=invoice, kind=StockMovement.KIND_CANCEL).exists():
+            return []
+        parts = list(
+            SparePart.objects.select_for_update()
+            .filter(id__in=sold).order_by('id').only('id', 'quantity')
+        )
+        now = timezone.now()
+        movements = []
+        for part in parts:
+            returned = -sold[part.id]  # продажа записана с минусом
+            part.quantity += returned
+            part.updated_at = now
+            movements.append(StockMovement(
+                part_id=part.id, kind=StockMovement.KIND_CANCEL, delta=returned,
+                quantity_after=part.quantity, author=author, comment=comment[:255], invoice=invoice,
+            ))
+        SparePart.objects.bulk_update(parts, ['quantity', 'updated_at'])
+        return StockMovement.objects.bulk_create(movements)
+
+
+def balances_at(moment, part_ids=None):
+    """{part_id: остаток} на момент moment — последнее движение до него по каждой запчасти.
+    DISTINCT ON (part_id) идёт по индексу (part, -created_at, -id) в его порядке.
+    Запчастей без движений нет в ответе (= 0).
+    """
+    qs = StockMovement.objects.filter(created_at__lte=moment)
+    if part_ids is not None:
+        qs = qs.filter(part_id__in=part_ids)
+    return dict(
+        qs.order_by('part_id', '-created_at', '-id')
+        .distinct('part_id')
+        .values_list('part_id', 'quantity_after')
+    )
+
+
+def find_discrepancies():
+    """Запчасти, у которых quantity ≠ сумме движений. Один GROUP BY ... HAVING."""
+    return list(
+        SparePart.objects
+        .annotate(ledger=Coalesce(Sum('stock_movements__delta'), 0))
+        .exclude(quantity=F('ledger'))
+        .order_by('id')
+        .values('id', 'part_number', 'quantity', 'ledger')
+    )
+
+
+def fix_discrepancies(rows, comment='Сверка журнала'):
+    """Дописывает корректирующие движения: журнал догоняет фактический quantity
+    (журнал не переписываем — только добавляем)."""
+    return StockMovement.objects.bulk_create([
+        StockMovement(
+            part_id=row['id'], kind=StockMovement.KIND_ADJUSTMENT,
+            delta=row['quantity'] - row['ledger'], quantity_after=row['quantity'],
+            comment=comment,
+        )
+        for row in rows
+    ])
@@ -1,6 +1,12 @@
-from django.db.models.signals import post_save
+from django.contrib.auth.models import Group, Permission, User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_init, post_save, post_delete
 from django.dispatch import receiver
-from .models import News, Product, PageMeta
+from .services.media.derivatives import derivatives_generated
+from .models import (
+    News, Product, PageMeta, SparePart, SparePartType, DealerProfile, Invoice, StockMovement,
+    ContactForm, ProductCardSpec, FeatureIcon,
+)
 
 
 
@@ -111,4 +117,160 @@ def create_seo_for_product(sender, instance, created, **kwargs):
                 'keywords': '',
                 'og_type': 'product',
             }
-        )
\ No newline at end of file
+        )
+
+
+@receiver(post_save, sender=Product)
+def sync_product_category_links(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.sync_category_links()
+
+
+# Кеш списка карточек /api/products/ (main/services/catalog/product_cards.py):
+# версию меняем после коммита, чтобы параллельный запрос не закешировал
+# старые данные под новой версией
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductCardSpec)
+@receiver(post_delete, sender=ProductCardSpec)
+@receiver(post_save, sender=FeatureIcon)
+@receiver(post_delete, sender=FeatureIcon)
+def clear_product_cards_cache(sender, instance, **kwargs):
+    from main.services.catalog.product_cards import bump_cards_version
+    transaction.on_commit(bump_cards_version)
+
+
+# В карточках srcset картинок — производные появляются в фоне уже после
+# коммита, и закешированный до них список остался бы без srcset
+@receiver(derivatives_generated, sender=Product)
+def clear_product_cards_after_derivatives(sender, instance, **kwargs):
+    from main.services.catalog.product_cards import bump_cards_version
+    bump_cards_version()
+
+
+# Поля, от которых зависит search_vector запчасти
+_PART_SEARCH_FIELDS = {'part_number', 'name', 'name_ru', 'name_uz', 'name_en'}
+
+
+@receiver(post_save, sender=SparePart)
+def refresh_part_search_vector(sender, instance, update_fields=None, raw=False, **kwargs):
+    # save(update_fields=['quantity']) и т.п. — поиск не затронут, лишний UPDATE не нужен
+    if raw or (update_fields is not None and not _PART_SEARCH_FIELDS & set(update_fields)):
+        return
+    from main.services.shop.search import refresh_search_vector
+    refresh_search_vector(SparePart.objects.filter(pk=instance.pk))
+
+
+# Фасеты фильтр-бара магазина (грузовики/типы с количеством) — кеш без поиска.
+# Product — из-за названий грузовиков в селекте.
+@receiver(post_save, sender=SparePart)
+@receiver(post_delete, sender=SparePart)
+@receiver(post_save, sender=SparePartType)
+@receiver(post_delete, sender=SparePartType)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def clear_shop_facets_cache(sender, instance, update_fields=None, **kwargs):
+    # Смена остатка (update_fields=['quantity']) на фасеты не влияет
+    if sender is SparePart and update_fields is not None \
+            and not {'is_active', 'truck', 'type'} & set(update_fields):
+        return
+    from main.services.shop.facets import invalidate_facets_cache
+    invalidate_facets_cache()
+
+
+# Кеш профиля кабинета дилера (cookie 'dealer_sid') — деактивация и смена
+# роли должны применяться сразу, а не через TTL. Версия — после коммита,
+# иначе параллельный запрос закеширует старый профиль под новой версией.
+@receiver(post_save, sender=DealerProfile)
+@receiver(post_delete, sender=DealerProfile)
+def clear_dealer_session_cache(sender, instance, **kwargs):
+    from main.services.shop import session as dealer_session
+    transaction.on_commit(dealer_session.invalidate)
+
+
+# У User в кеше сессии только логин и активность. Остальные сохранения
+# (last_login, пароль, имя) кеш не трогают — и лишнего запроса не делают.
+# __dict__ — чтобы не дёргать отложенное (.only/.defer) поле отдельным запросом.
+def _user_session_fields(user):
+    return user.__dict__.get('is_active'), user.__dict__.get('username')
+
+
+@receiver(post_init, sender=User)
+def remember_user_session_fields(sender, instance, **kwargs):
+    instance._saved_session_fields = _user_session_fields(instance)
+
+
+@receiver(post_save, sender=User)
+def clear_dealer_session_cache_for_user(sender, instance, created, raw=False, **kwargs):
+    changed = _user_session_fields(instance) != instance._saved_session_fields
+    instance._saved_session_fields = _user_session_fields(instance)
+    if created or raw or not changed:
+        return
+    from main.services.shop import session as dealer_session
+    transaction.on_commit(dealer_session.invalidate)
+
+
+# Кеш групп/прав пользователей (main/utils/roles.py) — новая версия на любую
+# правку, чтобы выданные/отозванные права применялись со следующего запроса.
+# После коммита: иначе параллельный запрос закеширует ещё старые права
+# под уже новой версией.
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def bump_permissions_on_m2m(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        from main.utils.roles import bump_permissions_version
+        transaction.on_commit(bump_permissions_version)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def bump_permissions_on_change(sender, instance, update_fields=None, **kwargs):
+    # Вход в систему пишет только last_login — права не меняются
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    from main.utils.roles import bump_permissions_version
+    transaction.on_commit(bump_permissions_version)
+
+
+# Справочник моделей техники из заявок (main/services/dashboard/products.py).
+# Запоминаем модель при загрузке: в post_save в БД уже новое значение.
+# __dict__ — чтобы не дёргать отложенное (.only/.defer) поле отдельным запросом.
+@receiver(post_init, sender=ContactForm)
+def remember_contactform_product(sender, instance, **kwargs):
+    instance._saved_product = instance.__dict__.get('product')
+
+
+@receiver(post_save, sender=ContactForm)
+def track_contactform_product(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'product' not in update_fields):
+        return
+    from main.services.dashboard.products import track_product_change
+    track_product_change(None if created else instance._saved_product, instance.product)
+    instance._saved_product = instance.product
+
+
+@receiver(post_delete, sender=ContactForm)
+def untrack_contactform_product(sender, instance, **kwargs):
+    from main.services.dashboard.products import track_product_change
+    track_product_change(instance.__dict__.get('product'), None)
+
+
+# Сохранённые документы счёта (main/services/shop/documents.py) — удаляем вместе со счётом
+@receiver(post_delete, sender=Invoice)
+def delete_invoice_documents(sender, instance, **kwargs):
+    from main.services.shop.documents import delete_documents
+    delete_documents(instance.id)
+
+
+# Журнал склада: созданная запчасть с ненулевым остатком — начальное движение.
+# bulk_create (импорт) сюда не попадает — там движения пишутся явно.
+@receiver(post_save, sender=SparePart)
+def record_initial_stock(sender, instance, created, raw=False, **kwargs):
+    if not created or raw or not instance.quantity:
+        return
+    from main.services.shop.stock import record_movement
+    record_movement(instance, instance.quantity, StockMovement.KIND_OPENING)
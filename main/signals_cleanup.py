@@ -5,14 +5,18 @@ Django по дефолту не удаляет файл из storage, когда
 2. Объект удаляют целиком — все файлы остаются.
 
 Этот модуль регистрирует pre_save и post_delete сигналы для всех моделей
-с ImageField, чтобы старые файлы убирались сами.
+с ImageField, чтобы старые файлы убирались сами — вместе с их WebP-производными
+(main/services/media/derivatives.py). На post_save для новых/заменённых картинок
+ставится генерация производных в фоне.
 
 Старые orphan-файлы, накопившиеся до этого, тут НЕ трогаем — для них
-можно сделать management-команду отдельно.
+есть management-команда cleanup_orphan_media.
 """
 
 from django.db.models import ImageField
-from django.db.models.signals import pre_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from main.services.media import derivatives
 
 
 def _get_image_field_names(model):
@@ -29,6 +33,7 @@ def _safe_delete(file_field):
     storage.delete() сам справится если файла уже нет на диске.
     """
     if file_field and file_field.name:
+        derivatives.delete(file_field.storage, file_field.name)
         file_field.delete(save=False)
 
 
@@ -39,21 +44,35 @@ def register_image_cleanup(model):
         return
 
     def on_pre_save(sender, instance, **kwargs):
-        # Новый объект — нечего удалять
+        # Новый объект — нечего удалять, но производные нужны для всех картинок
         if not instance.pk:
+            instance._changed_image_fields = list(image_fields)
             return
         # Старая версия из БД для сравнения
         try:
             old = sender.objects.only(*image_fields).get(pk=instance.pk)
         except sender.DoesNotExist:
+            instance._changed_image_fields = list(image_fields)
             return
+        changed = []
         for fname in image_fields:
             old_file = getattr(old, fname, None)
             new_file = getattr(instance, fname, None)
             old_name = old_file.name if old_file else ''
             new_name = new_file.name if new_file else ''
+            if old_name != new_name:
+                changed.append(fname)
             if old_name and old_name != new_name:
                 _safe_delete(old_file)
+        instance._changed_image_fields = changed
+
+    def on_post_save(sender, instance, raw=False, **kwargs):
+        # raw=True — loaddata, файлов на диске может не быть
+        changed = getattr(instance, '_changed_image_fields', None)
+        instance._changed_image_fields = None
+        if raw or not changed:
+            return
+        derivatives.schedule(instance, changed)
 
     def on_post_delete(sender, instance, **kwargs):
         for fname in image_fields:
@@ -62,6 +81,8 @@ def register_image_cleanup(model):
     # weak=False — иначе локальные closure-функции соберёт GC и сигнал отвалится
     pre_save.connect(on_pre_save, sender=model, weak=False,
                      dispatch_uid=f'image_cleanup_pre_save_{model.__name__}')
+    post_save.connect(on_post_save, sender=model, weak=False,
+                      dispatch_uid=f'image_derivatives_post_save_{model.__name__}')
     post_delete.connect(on_post_delete, sender=model, weak=False,
                         dispatch_uid=f'image_cleanup_post_delete_{model.__name__}')
 
@@ -0,0 +1,47 @@
+# main/templatetags/image_tags.py
+
+from django import template
+from django.utils.html import format_html
+
+from main.services.media import derivatives
+
+register = template.Library()
+
+
+@register.simple_tag
+def prefetch_srcsets(objects):
+    """Перед циклом по карточкам: производные всех картинок списка (и уже
+    загруженных связей — prefetch_related('images')) одним cache.get_many.
+
+    {% prefetch_srcsets parts %}
+    """
+    derivatives.prefetch(derivatives.loaded_image_files(objects or []))
+    return ''
+
+
+@register.filter(name='srcset')
+def srcset(field_file):
+    """srcset из WebP-производных: <img srcset="{{ obj.image|srcset }}">"""
+    if not field_file or not getattr(field_file, 'name', None):
+        return ''
+    return derivatives.build_srcset(field_file)
+
+
+@register.simple_tag
+def responsive_img(field_file, alt='', sizes='100vw', css_class='', loading='lazy'):
+    """<img> с srcset/sizes. Если производных ещё нет — обычный <img> на оригинал.
+
+    {% responsive_img product.main_image alt=product.title sizes="(max-width: 768px) 100vw, 50vw" %}
+    """
+    if not field_file or not getattr(field_file, 'name', None):
+        return ''
+    candidates = derivatives.build_srcset(field_file)
+    if not candidates:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}">',
+            field_file.url, alt, css_class, loading,
+        )
+    return format_html(
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="{}">',
+        field_file.url, candidates, sizes, alt, css_class, loading,
+    )
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from main.admin import ContactFormAdmin
+from main.models import ContactForm
+
+
+class EstimatedCountTest(TestCase):
+    """Большие списки админки: оценка вместо COUNT(*), точное число по кнопке"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            ContactForm.objects.create(name=f'Лид {i}', region='tashkent_city', phone='+998',
+                                       status='done' if i else 'new')
+        cls.admin = User.objects.create_superuser('admin', password='x')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        # таблица «большая» при любом числе строк, reltuples подменяем
+        patches = [
+            mock.patch.object(ContactFormAdmin, 'estimate_threshold', 0),
+            mock.patch.object(ContactFormAdmin, 'count_cap', 2),
+            mock.patch('main.utils.admin_paginator.table_row_estimate', return_value=120_000),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _changelist(self, params=None):
+        response = self.client.get('/admin/main/contactform/', params or {})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_unfiltered_list_uses_table_estimate(self):
+        response = self._changelist()
+        cl = response.context['cl']
+        self.assertEqual(cl.paginator.estimate_kind, 'approx')
+        self.assertEqual(cl.result_count, 120_000)
+        self.assertContains(response, 'exact_count=1')
+
+    def test_filtered_count_is_capped(self):
+        cl = self._changelist({'status': 'done'}).context['cl']
+        self.assertEqual((cl.paginator.estimate_kind, cl.result_count), ('capped', 2))
+
+        cl = self._changelist({'status': 'new'}).context['cl']
+        self.assertEqual((cl.paginator.estimate_kind, cl.result_count), ('', 1))
+
+    def test_exact_count_on_request(self):
+        response = self._changelist({'status': 'done', 'exact_count': '1'})
+        cl = response.context['cl']
+        self.assertEqual((cl.paginator.estimate_kind, cl.result_count), ('', 4))
+        self.assertNotIn('exact_count', cl.get_query_string())
+
+    def test_overestimated_count_serves_last_real_page(self):
+        with mock.patch.object(ContactFormAdmin, 'list_per_page', 2):
+            response = self._changelist({'p': '50'})
+        cl = response.context['cl']
+        self.assertEqual((cl.page_num, cl.result_count, cl.paginator.estimate_kind), (3, 5, ''))
+        self.assertEqual(len(cl.result_list), 1)
+
+    def test_pages_past_cap_are_reachable(self):
+        with mock.patch.object(ContactFormAdmin, 'list_per_page', 1):
+            response = self._changelist({'status': 'done', 'p': '4'})
+        cl = response.context['cl']
+        self.assertEqual((cl.page_num, len(cl.result_list)), (4, 1))
+        # конец неизвестен — без ссылок на «последние» страницы
+        self.assertEqual(list(cl.paginator.get_elided_page_range(cl.page_num)),
+                         [1, 2, 3, 4, 5, 6, 7, cl.paginator.ELLIPSIS])
@@ -0,0 +1,88 @@
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from main.tests.utils import in_another_worker, versions_rechecked
+from main.utils.roles import get_roles
+
+
+class AdminRolesTest(TestCase):
+    """Права миксинов админки — из ролей, загруженных один раз на запрос и закешированных по версии прав"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lead = User.objects.create_user('lead', password='x', is_staff=True)
+        leads = Group.objects.create(name='Лид-менеджеры')
+        leads.permissions.add(Permission.objects.get(codename='view_contactform'))
+        cls.lead.groups.add(leads)
+        cls.editor = User.objects.create_user('editor', password='x', is_staff=True)
+        cls.editor.user_permissions.add(Permission.objects.get(codename='view_kgvehicle'))
+
+    def setUp(self):
+        cache.clear()
+
+    def _group_queries(self, ctx):
+        return [q for q in ctx.captured_queries if '"auth_group"."name"' in q['sql']]
+
+    def _permission_queries(self, ctx):
+        return [q for q in ctx.captured_queries if 'auth_permission' in q['sql'] or 'auth_group' in q['sql']]
+
+    def test_admin_index_loads_groups_once(self):
+        self.client.force_login(self.lead)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/admin/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self._group_queries(ctx)), 1)
+        # сессия, пользователь, 2× права, группы, меню сайта, журнал админки, singleton-проверки
+        # BotContacts (+ сохранение сессии) — не зависит от числа моделей в админке
+        self.assertLessEqual(len(ctx.captured_queries), 14)
+
+        models = {m['object_name'] for app in response.context['app_list'] for m in app['models']}
+        self.assertIn('ContactForm', models)
+        self.assertIn('Dashboard', models)
+        self.assertNotIn('News', models)
+        self.assertNotIn('KGVehicle', models)
+
+    def test_steady_state_requests_skip_permission_tables_until_edit(self):
+        self.client.force_login(self.editor)
+        self.client.get('/admin/')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/admin/kg/kgvehicle/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._permission_queries(ctx), [])
+
+        # Отозванное право действует со следующего запроса
+        with self.captureOnCommitCallbacks(execute=True):
+            self.editor.user_permissions.clear()
+        self.assertEqual(self.client.get('/admin/kg/kgvehicle/').status_code, 403)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.editor.groups.add(Group.objects.get(name='Лид-менеджеры'))
+        self.assertEqual(self.client.get('/admin/main/contactform/').status_code, 200)
+
+    def test_revocation_reaches_worker_that_did_not_make_it(self):
+        self.client.force_login(self.editor)
+        self.assertEqual(self.client.get('/admin/kg/kgvehicle/').status_code, 200)
+
+        with in_another_worker(), self.captureOnCommitCallbacks(execute=True):
+            self.editor.user_permissions.clear()
+        # версию прав этот воркер перечитывает из БД раз в CHECK_INTERVAL
+        with versions_rechecked():
+            self.assertEqual(self.client.get('/admin/kg/kgvehicle/').status_code, 403)
+
+    def test_individual_permission_grants_module(self):
+        self.client.force_login(self.editor)
+        response = self.client.get('/admin/')
+        models = {m['object_name'] for app in response.context['app_list'] for m in app['models']}
+        self.assertIn('KGVehicle', models)
+        self.assertNotIn('KGFeedback', models)
+
+    def test_roles_are_memoized_on_request(self):
+        request = RequestFactory().get('/')
+        request.user = self.lead
+        roles = get_roles(request)
+        with self.assertNumQueries(0):
+            self.assertIs(get_roles(request), roles)
+            self.assertTrue(roles.in_groups('Главные админы', 'Лид-менеджеры'))
+            self.assertFalse(roles.has_perm('main.delete_contactform'))
@@ -0,0 +1,115 @@
+import io
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from main.models import DealerProfile, SparePart, SparePartImage, SparePartType
+from main.services.media import derivatives
+from main.services.shop import cart as cart_service
+
+
+@override_settings(IMAGE_DERIVATIVES_ASYNC=False, IMAGE_DERIVATIVE_WIDTHS=(320,))
+class CartPricingTest(TestCase):
+    """Корзина: фиксированное число запросов, ETag/304, дельты по версии"""
+
+    @classmethod
+    def setUpTestData(cls):
+        part_type = SparePartType.objects.create(name='Фильтры', name_ru='Фильтры')
+        cls.parts = [
+            SparePart.objects.create(part_number=f'C-{i}', name_ru=f'Деталь {i}', type=part_type,
+                                     price=Decimal('100'), quantity=5)
+            for i in range(6)
+        ]
+        user = User.objects.create_user('dealer1', password='x')
+        cls.profile = DealerProfile.objects.create(user=user, company_name='ООО Тест')
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        cache.clear()
+        self.client.cookies['dealer_sid'] = signing.dumps({'pid': self.profile.id}, salt='main.dealer-auth.v1')
+        self.url = reverse('dealer_cart_api')
+        self.ids = ','.join(str(p.id) for p in self.parts)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _add_image(self, part, order):
+        buf = io.BytesIO()
+        Image.new('RGB', (640, 480), (40, 90, 160)).save(buf, 'JPEG')
+        with self.captureOnCommitCallbacks(execute=True):
+            return SparePartImage.objects.create(
+                part=part, order=order,
+                image=SimpleUploadedFile(f'p{part.id}_{order}.jpg', buf.getvalue(), 'image/jpeg'),
+            )
+
+    def test_query_count_does_not_depend_on_cart_size(self):
+        for p in self.parts:
+            self._add_image(p, 1)
+        primary = self._add_image(self.parts[0], 0)
+
+        with CaptureQueriesContext(connection) as ctx:
+            small = cart_service.price_lines([self.parts[0].id])
+        with CaptureQueriesContext(connection) as ctx_all:
+            full = cart_service.price_lines([p.id for p in self.parts])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(len(ctx_all.captured_queries), 1)
+        self.assertEqual(len(full['items']), 6)
+        self.assertEqual(small['items'][0]['image_url'], primary.image.url)
+
+    def test_thumbnails_resolved_with_one_cache_read(self):
+        for p in self.parts:
+            self._add_image(p, 0)
+
+        with mock.patch.object(derivatives, 'cache', wraps=cache) as derivatives_cache:
+            items = cart_service.price_lines([p.id for p in self.parts])['items']
+        self.assertEqual(derivatives_cache.get_many.call_count, 1)
+        self.assertEqual(derivatives_cache.get.call_count, 0)
+        self.assertTrue(all(item['thumb_url'].endswith('_w320.webp') for item in items))
+
+    def test_since_returns_lines_added_to_cart(self):
+        ids = [p.id for p in self.parts[1:4]]
+        version = self.client.get(self.url, {'ids': ','.join(map(str, ids))}).json()['version']
+
+        # Строка добавлена в корзину, но сама менялась раньше version
+        ids.append(self.parts[0].id)
+        data = self.client.get(self.url, {'ids': ','.join(map(str, ids)), 'since': version}).json()
+        self.assertIn(self.parts[0].id, [i['id'] for i in data['items']])
+
+        version = data['version']
+        data = self.client.get(self.url, {'ids': ','.join(map(str, ids)), 'since': version}).json()
+        self.assertEqual(data['items'], [])
+
+    def test_etag_not_modified_until_stock_changes(self):
+        response = self.client.get(self.url, {'ids': self.ids})
+        etag = response['ETag']
+        version = response.json()['version']
+
+        response = self.client.get(self.url, {'ids': self.ids}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        part = self.parts[2]
+        part.quantity = 1
+        part.save()
+        self.parts[3].is_active = False
+        self.parts[3].save()
+
+        response = self.client.get(self.url, {'ids': self.ids, 'since': version}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([i['id'] for i in data['items']], [part.id])
+        self.assertEqual(data['items'][0]['quantity_available'], 1)
+        self.assertEqual(data['removed'], [self.parts[3].id])
@@ -0,0 +1,94 @@
+import io
+from decimal import Decimal
+from unittest import mock
+
+import openpyxl
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from main.models import SparePart, SparePartType, StockMovement
+from main.services.shop.catalog_import import import_parts, read_rows
+from main.services.shop.search import search_parts
+
+
+def _csv(text):
+    return io.BytesIO(text.encode('utf-8'))
+
+
+class CatalogImportTest(TestCase):
+    """Импорт каталога: upsert по артикулу, dry-run, ошибки по строкам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.filters = SparePartType.objects.create(name='Фильтры', name_ru='Фильтры')
+        SparePart.objects.create(part_number='FL-1', name_ru='Фильтр масляный', type=cls.filters,
+                                 price=Decimal('100'), quantity=5)
+        SparePart.objects.create(part_number='FL-2', name_ru='Фильтр воздушный', type=cls.filters,
+                                 price=Decimal('200'), quantity=1)
+
+    def setUp(self):
+        cache.clear()
+
+    FILE = (
+        'Артикул;Наименование;Тип;Цена;Количество\n'
+        'FL-1;Фильтр масляный;фильтры;100;7\n'          # остаток изменился
+        'FL-2;Фильтр воздушный;Фильтры;200,00;1\n'      # без изменений
+        'BR-1;Колодка тормозная;Тормоза;1 500,50;10\n'  # новая + новый тип
+        'BR-2;;;;3\n'                                   # новая без названия/типа/цены
+        'BR-3;Диск;Тормоза;abc;1\n'                     # ошибка цены
+        'FL-1;Дубль;Фильтры;1;1\n'                      # дубль артикула
+    )
+
+    def test_dry_run_reports_without_writing(self):
+        report = import_parts(read_rows(_csv(self.FILE), 'stock.csv'), dry_run=True)
+        self.assertEqual((report.created, report.updated, report.unchanged), (1, 1, 1))
+        self.assertEqual([e[0] for e in report.errors], [5, 6, 7])
+        self.assertEqual(report.types_created, ['Тормоза'])
+        self.assertIn(('FL-1', {'quantity': (5, 7)}), report.changes)
+
+        self.assertEqual(SparePart.objects.get(part_number='FL-1').quantity, 5)
+        self.assertFalse(SparePart.objects.filter(part_number='BR-1').exists())
+        self.assertFalse(SparePartType.objects.filter(name_ru='Тормоза').exists())
+
+    def test_import_upserts_in_batches(self):
+        with CaptureQueriesContext(connection) as ctx:
+            report = import_parts(read_rows(_csv(self.FILE), 'stock.csv'), batch_size=1000)
+        self.assertEqual((report.created, report.updated), (1, 1))
+        # карта типов + новый тип + выборка пачки + upsert + search_vector (+ savepoint'ы)
+        self.assertLessEqual(len(ctx.captured_queries), 8)
+
+        self.assertEqual(SparePart.objects.get(part_number='FL-1').quantity, 7)
+        receipt = StockMovement.objects.get(part__part_number='FL-1', kind=StockMovement.KIND_RECEIPT)
+        self.assertEqual((receipt.delta, receipt.quantity_after), (2, 7))
+        part = SparePart.objects.get(part_number='BR-1')
+        self.assertEqual(part.stock_movements.get().kind, StockMovement.KIND_OPENING)
+        self.assertEqual(part.price, Decimal('1500.50'))
+        self.assertEqual(part.part_number_normalized, 'BR1')
+        self.assertEqual(part.type.name_ru, 'Тормоза')
+        # search_vector обновлён, хоть сигналы и не сработали
+        self.assertEqual(list(search_parts(SparePart.objects.all(), 'колодка')), [part])
+
+    def test_failed_batch_keeps_previous_batches(self):
+        # Каждая пачка — своя транзакция: блокировки не держатся весь файл
+        with mock.patch('main.services.shop.catalog_import.refresh_search_vector',
+                        side_effect=[None, RuntimeError('boom')]):
+            with self.assertRaises(RuntimeError):
+                import_parts(read_rows(_csv(self.FILE), 'stock.csv'), batch_size=1)
+        self.assertEqual(SparePart.objects.get(part_number='FL-1').quantity, 7)
+        self.assertFalse(SparePart.objects.filter(part_number='BR-1').exists())
+
+    def test_xlsx_partial_columns_update_only_given_fields(self):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(['part_number', 'quantity', 'is_active'])
+        ws.append(['FL-2', 0, 'нет'])
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        buffer.seek(0)
+
+        report = import_parts(read_rows(buffer, 'stock.xlsx'))
+        self.assertEqual(report.updated, 1)
+        part = SparePart.objects.get(part_number='FL-2')
+        self.assertEqual((part.quantity, part.is_active, part.name_ru), (0, False, 'Фильтр воздушный'))
@@ -0,0 +1,71 @@
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from main.models import DealerProfile, Invoice, SparePart, SparePartType
+
+
+class CheckoutStockTest(TestCase):
+    """Черновик одним bulk_create, списание склада одним UPDATE с проверкой остатка"""
+
+    @classmethod
+    def setUpTestData(cls):
+        part_type = SparePartType.objects.create(name='Фильтры', name_ru='Фильтры')
+        cls.parts = [
+            SparePart.objects.create(part_number=f'S-{i}', name_ru=f'Деталь {i}', type=part_type,
+                                     price=Decimal('10.50'), quantity=10)
+            for i in range(30)
+        ]
+        user = User.objects.create_user('dealer1', password='x')
+        cls.profile = DealerProfile.objects.create(
+            user=user, company_name='ООО Тест', inn='123456789', contract_number='D-1',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.cookies['dealer_sid'] = signing.dumps({'pid': self.profile.id}, salt='main.dealer-auth.v1')
+
+    def _checkout(self, items):
+        response = self.client.post(reverse('dealer_cart_checkout'), json.dumps({'items': items}),
+                                    content_type='application/json')
+        return response.json()['invoice_id']
+
+    def _confirm(self, invoice_id):
+        return self.client.post(reverse('dealer_invoice_confirm', args=[invoice_id]))
+
+    def test_confirm_decrements_stock_with_fixed_query_count(self):
+        small = self._checkout([{'id': self.parts[0].id, 'qty': 2}])
+        with CaptureQueriesContext(connection) as ctx_small:
+            self.assertEqual(self._confirm(small).status_code, 200)
+
+        big = self._checkout([{'id': p.id, 'qty': 3} for p in self.parts[1:]])
+        self.assertEqual(Invoice.objects.get(pk=big).items.count(), 29)
+        with CaptureQueriesContext(connection) as ctx_big:
+            self.assertEqual(self._confirm(big).status_code, 200)
+
+        self.assertEqual(len(ctx_big.captured_queries), len(ctx_small.captured_queries))
+        self.assertEqual(SparePart.objects.get(pk=self.parts[0].id).quantity, 8)
+        self.assertEqual(SparePart.objects.get(pk=self.parts[5].id).quantity, 7)
+
+    def test_insufficient_stock_rolls_back_everything(self):
+        invoice_id = self._checkout([{'id': p.id, 'qty': 5} for p in self.parts[:3]])
+        # Пока черновик лежал, часть остатка ушла
+        SparePart.objects.filter(pk=self.parts[2].id).update(quantity=4)
+
+        response = self._confirm(invoice_id)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Доступно: 4', response.json()['error'])
+        # Первые две позиции не списались — весь UPDATE откатился
+        self.assertEqual(SparePart.objects.get(pk=self.parts[0].id).quantity, 10)
+        self.assertIsNone(Invoice.objects.get(pk=invoice_id).number)
+
+        SparePart.objects.filter(pk=self.parts[1].id).update(is_active=False)
+        response = self._confirm(invoice_id)
+        self.assertIn('больше не доступна', response.json()['error'])
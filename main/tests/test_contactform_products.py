@@ -0,0 +1,58 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from main.models import ContactForm, ContactFormProduct
+from main.services.dashboard.products import product_labels
+
+
+class ContactFormProductsTest(TestCase):
+    """Справочник моделей из заявок: ведётся сигналами, фильтры читают его без DISTINCT"""
+
+    def setUp(self):
+        cache.clear()
+
+    def _lead(self, product):
+        return ContactForm.objects.create(name='Тест', region='tashkent_city', phone='+998', product=product)
+
+    def _counts(self):
+        return dict(ContactFormProduct.objects.filter(lead_count__gt=0).values_list('label', 'lead_count'))
+
+    def test_counts_follow_create_change_and_delete(self):
+        first = self._lead('FAW J6')
+        self._lead('FAW J6')
+        self._lead('')
+        self.assertEqual(self._counts(), {'FAW J6': 2})
+
+        first.product = 'FAW Tiger'
+        first.save()
+        first.status = 'done'
+        first.save(update_fields=['status'])
+        self.assertEqual(self._counts(), {'FAW J6': 1, 'FAW Tiger': 1})
+
+        ContactForm.objects.get(pk=first.pk).delete()
+        self.assertEqual(self._counts(), {'FAW J6': 1})
+
+    def test_labels_cached_until_label_set_changes(self):
+        self._lead('FAW J6')
+        self.assertEqual(product_labels(), ['FAW J6'])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self._lead('FAW J6')
+        self.assertEqual(callbacks, [])  # метка не новая — кеш не трогаем
+        with self.assertNumQueries(0):
+            self.assertEqual(product_labels(), ['FAW J6'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._lead('FAW CA3250')
+        self.assertEqual(product_labels(), ['FAW CA3250', 'FAW J6'])
+
+    def test_lead_list_has_no_distinct_scan(self):
+        self._lead('FAW J6')
+        admin = User.objects.create_superuser('admin', password='x')
+        self.client.force_login(admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/admin/main/contactform/')
+        self.assertEqual(response.context['products'], ['FAW J6'])
+        self.assertFalse([q for q in ctx.captured_queries if 'DISTINCT' in q['sql'] and 'product' in q['sql']])
@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from main.management.commands.explain_leads import explain, lead_list_queries
+from main.models import ContactForm
+
+
+class ContactFormSearchTest(TestCase):
+    """Поиск и фильтры списка заявок идут по индексам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lead = ContactForm.objects.create(name='Иван Петров', region='tashkent_city',
+                                              phone='+998 (90) 123-45-67', product='FAW J6')
+        ContactForm.objects.create(name='Анна', region='andijan', phone='+998 91 000 00 00', status='done')
+        cls.admin = User.objects.create_superuser('admin', password='x')
+
+    def _search(self, q):
+        self.client.force_login(self.admin)
+        response = self.client.get('/admin/main/contactform/', {'q': q})
+        return [obj.pk for obj in response.context['cl'].result_list]
+
+    def test_phone_normalized_and_prefix_search(self):
+        self.assertEqual(self.lead.phone_normalized, '998901234567')
+        self.lead.phone = '+998 93 555 55 55'
+        self.lead.save(update_fields=['phone'])
+        self.assertEqual(ContactForm.objects.get(pk=self.lead.pk).phone_normalized, '998935555555')
+
+        self.assertEqual(self._search('93 555'), [self.lead.pk])
+        self.assertEqual(self._search('+998935'), [self.lead.pk])
+        self.assertEqual(self._search('иван'), [self.lead.pk])
+        self.assertEqual(self._search('555 55 55'), [self.lead.pk])  # не префикс — по trigram-индексу
+
+    def test_phone_search_is_one_filter(self):
+        # Префикс и «в любом месте» — одним OR, без пробного запроса до фильтров
+        with self.assertNumQueries(0):
+            lead_list_queries({'q': '45 67', 'region': 'tashkent_city'})
+
+    def test_typical_queries_can_use_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plans = {
+            'status': explain(lead_list_queries({'status': 'new'})['page']),
+            'phone': explain(lead_list_queries({'q': '90 123'})['count']),
+            'phone_middle': explain(lead_list_queries({'q': '45 67'})['count']),
+            'product': explain(lead_list_queries({'product': 'J6'})['count']),
+        }
+        self.assertIn('contactform_status_created', plans['status']['indexes'])
+        self.assertIn('contactform_phone_norm', plans['phone']['indexes'])
+        self.assertIn('contactform_phone_trgm', plans['phone_middle']['indexes'])
+        self.assertIn('contactform_product_trgm', plans['product']['indexes'])
+        self.assertFalse(any(plan['seq_scans'] for plan in plans.values()))
+
+    def test_explain_command_reports(self):
+        out = StringIO()
+        call_command('explain_leads', stdout=out)
+        self.assertIn('Поиск по телефону [count]', out.getvalue())
+        self.assertIn('регрессий нет', out.getvalue())
@@ -0,0 +1,83 @@
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from main.models import CacheVersion, DealerProfile
+from main.services.shop import session as dealer_session
+from main.tests.utils import in_another_worker, versions_rechecked
+
+
+class DealerSessionCacheTest(TestCase):
+    """Кеш профиля кабинета по cookie 'dealer_sid' и его сброс"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('dealer1', password='x')
+        self.profile = DealerProfile.objects.create(user=self.user, company_name='ООО Тест')
+        self.client.cookies['dealer_sid'] = signing.dumps(
+            {'pid': self.profile.id}, salt=dealer_session.DEALER_COOKIE_SALT,
+        )
+
+    def test_profile_cached_between_requests(self):
+        self.assertEqual(self.client.get(reverse('dealer_cart')).status_code, 200)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(reverse('dealer_cart')).status_code, 200)
+        tables = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('main_dealerprofile', tables)
+        self.assertNotIn('auth_user', tables)
+
+    def test_cache_holds_no_password(self):
+        self.assertEqual(self.client.get(reverse('dealer_cart')).status_code, 200)
+        profile = dealer_session.get_active_profile(self.profile.id)
+        self.assertEqual((profile.company_name, profile.user.username), ('ООО Тест', 'dealer1'))
+        self.assertNotIn('password', profile.user.__dict__)
+
+    def test_deactivation_applies_immediately(self):
+        self.assertEqual(self.client.get(reverse('dealer_cart')).status_code, 200)
+        self.profile.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.save()
+        self.assertRedirects(self.client.get(reverse('dealer_cart')), reverse('dealer_login'),
+                             fetch_redirect_response=False)
+
+    def test_user_deactivation_applies_immediately(self):
+        self.assertEqual(self.client.get(reverse('dealer_cart')).status_code, 200)
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertRedirects(self.client.get(reverse('dealer_cart')), reverse('dealer_login'),
+                             fetch_redirect_response=False)
+
+    def test_forged_cookie_rejected(self):
+        self.client.cookies['dealer_sid'] = signing.dumps({'pid': self.profile.id}, salt='other')
+        self.assertIsNone(dealer_session.profile_id_from_cookie(self.client.cookies['dealer_sid'].value))
+        response = self.client.get(reverse('dealer_cart'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_deactivation_in_another_worker_applies_after_recheck(self):
+        self.assertEqual(self.client.get(reverse('dealer_cart')).status_code, 200)
+        with in_another_worker(), self.captureOnCommitCallbacks(execute=True):
+            DealerProfile.objects.get(pk=self.profile.pk).delete()
+        with versions_rechecked():
+            self.assertRedirects(self.client.get(reverse('dealer_cart')), reverse('dealer_login'),
+                                 fetch_redirect_response=False)
+
+    def test_login_does_not_reset_sessions(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.user.last_login = self.user.date_joined
+            self.user.save(update_fields=['last_login'])
+            self.user.set_password('y')
+            self.user.save()
+        self.assertNotIn(dealer_session.invalidate, callbacks)
+        self.assertFalse(CacheVersion.objects.filter(key='dealer_sessions').exists())
+
+    def test_post_does_not_recheck_profile(self):
+        self.assertEqual(self.client.get(reverse('dealer_cart')).status_code, 200)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse('dealer_cart_checkout'), '{"items": []}', content_type='application/json')
+        tables = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('main_dealerprofile', tables)
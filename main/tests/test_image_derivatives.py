@@ -0,0 +1,142 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from main.models import Promotion
+from main.services.media import derivatives
+
+
+def _jpeg(width, height, name='promo.jpg'):
+    buf = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(buf, 'JPEG')
+    return SimpleUploadedFile(name, buf.getvalue(), content_type='image/jpeg')
+
+
+class ImageDerivativesTest(TestCase):
+    """WebP-производные: генерация на загрузке, srcset, удаление вместе с оригиналом"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            IMAGE_DERIVATIVES_ASYNC=False,
+            IMAGE_DERIVATIVE_WIDTHS=(320, 640, 1440),
+        )
+        self.override.enable()
+        cache.clear()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _create_promo(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Promotion.objects.create(title='Акция', description='-', image=_jpeg(1000, 500))
+
+    def _path(self, name):
+        return os.path.join(self.media_root, name)
+
+    def test_derivatives_created_on_upload(self):
+        promo = self._create_promo()
+        # 1440 больше оригинала — апскейла нет
+        self.assertEqual(derivatives.available_widths(promo.image), [320, 640])
+        self.assertTrue(os.path.exists(self._path(derivatives.derivative_name(promo.image.name, 320))))
+        self.assertFalse(os.path.exists(self._path(derivatives.derivative_name(promo.image.name, 1440))))
+
+        with Image.open(self._path(derivatives.derivative_name(promo.image.name, 640))) as img:
+            self.assertEqual(img.format, 'WEBP')
+            self.assertEqual(img.size, (640, 320))
+
+    def test_srcset_and_template_tag(self):
+        promo = self._create_promo()
+        srcset = derivatives.build_srcset(promo.image)
+        self.assertIn('_w320.webp 320w', srcset)
+        self.assertTrue(srcset.endswith(f'{promo.image.url} 1000w'))
+
+        html = Template(
+            '{% load image_tags %}{% responsive_img promo.image alt="x" sizes="50vw" %}'
+        ).render(Context({'promo': promo}))
+        self.assertIn('srcset="', html)
+        self.assertIn('sizes="50vw"', html)
+
+    def test_derivatives_removed_with_original(self):
+        promo = self._create_promo()
+        d320 = self._path(derivatives.derivative_name(promo.image.name, 320))
+        self.assertTrue(os.path.exists(d320))
+
+        promo.delete()
+        self.assertFalse(os.path.exists(d320))
+
+    def test_derivatives_removed_when_image_replaced(self):
+        promo = self._create_promo()
+        old_d320 = self._path(derivatives.derivative_name(promo.image.name, 320))
+
+        promo.image = _jpeg(800, 400, name='promo_new.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            promo.save()
+
+        self.assertFalse(os.path.exists(old_d320))
+        self.assertEqual(derivatives.available_widths(promo.image), [320, 640])
+
+    def test_missing_derivatives_are_rechecked_soon(self):
+        with self.captureOnCommitCallbacks(execute=False):  # фоновая генерация ещё не дошла
+            promo = Promotion.objects.create(title='Акция', description='-', image=_jpeg(1000, 500))
+        # рендер без производных — _PENDING_TTL с лишним секунд назад
+        earlier = time.time() - derivatives._PENDING_TTL - 1
+        with mock.patch('time.time', return_value=earlier):
+            self.assertEqual(derivatives.available_widths(promo.image), [])
+
+        # генерация закончилась, но её запись в кеш проиграла гонку рендеру
+        with mock.patch.object(derivatives.cache, 'set'):
+            derivatives.generate(promo.image.storage, promo.image.name)
+        self.assertEqual(derivatives.available_widths(promo.image), [320, 640])
+
+    def test_palette_png_keeps_transparency(self):
+        buf = io.BytesIO()
+        img = Image.new('P', (1000, 500), 0)
+        img.putpalette([255, 255, 255, 200, 30, 30] + [0] * 762)
+        img.paste(1, (0, 0, 500, 500))
+        img.save(buf, 'PNG', transparency=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            promo = Promotion.objects.create(
+                title='Акция', description='-',
+                image=SimpleUploadedFile('logo.png', buf.getvalue(), content_type='image/png'),
+            )
+
+        with Image.open(self._path(derivatives.derivative_name(promo.image.name, 640))) as derivative:
+            self.assertEqual(derivative.mode, 'RGBA')
+            self.assertEqual(derivative.getpixel((600, 10))[3], 0)
+
+    def test_api_list_fetches_derivatives_in_one_batch(self):
+        for _ in range(3):
+            self._create_promo()
+        cache.clear()
+
+        with mock.patch.object(derivatives, 'cache', wraps=cache) as spy:
+            response = self.client.get('/api/promotions/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertEqual(spy.get_many.call_count, 1)
+        spy.get.assert_not_called()
+
+    def test_template_tag_prefetches_srcsets(self):
+        promos = [self._create_promo() for _ in range(3)]
+        cache.clear()
+
+        with mock.patch.object(derivatives, 'cache', wraps=cache) as spy:
+            html = Template(
+                '{% load image_tags %}{% prefetch_srcsets promos %}'
+                '{% for p in promos %}{% responsive_img p.image %}{% endfor %}'
+            ).render(Context({'promos': promos}))
+        self.assertEqual(html.count('_w320.webp 320w'), 3)
+        self.assertEqual(spy.get_many.call_count, 1)
+        spy.get.assert_not_called()
@@ -0,0 +1,104 @@
+import io
+import shutil
+import tempfile
+import zipfile
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from main.models import DealerProfile, Invoice, InvoiceItem
+from main.services.shop import documents
+
+
+class InvoiceDocumentsTest(TestCase):
+    """Документ счёта рендерится один раз, архив за период для бухгалтера"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('dealer1', password='x')
+        cls.dealer = DealerProfile.objects.create(user=user, company_name='ООО Тест', inn='123456789')
+        acc_user = User.objects.create_user('acc', password='x')
+        cls.accountant = DealerProfile.objects.create(user=acc_user, role=DealerProfile.ROLE_ACCOUNTANT)
+
+        cls.invoices = []
+        for number in (1, 2):
+            invoice = Invoice.objects.create(
+                dealer=cls.dealer, year=2026, number=number, confirmed_at=timezone.now(),
+                buyer_company_name='ООО Тест', total_amount=Decimal('1200000'),
+            )
+            InvoiceItem.objects.create(invoice=invoice, name='Фильтр', quantity=2, unit='шт',
+                                       price=Decimal('600000'), sum=Decimal('1200000'))
+            cls.invoices.append(invoice)
+
+    def setUp(self):
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.override = override_settings(INVOICE_DOCUMENTS_ROOT=self.root)
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _login(self, profile):
+        self.client.cookies['dealer_sid'] = signing.dumps({'pid': profile.id}, salt='main.dealer-auth.v1')
+
+    def test_confirmed_invoice_rendered_once(self):
+        self._login(self.dealer)
+        url = reverse('dealer_invoice', args=[self.invoices[0].id])
+        with mock.patch('main.services.shop.documents.amount_in_words_uzs',
+                        wraps=documents.amount_in_words_uzs) as words:
+            first = self.client.get(url)
+            second = self.client.get(url)
+        self.assertEqual(words.call_count, 1)
+        self.assertContains(second, '1 200 000,00')
+        self.assertEqual(first.content, second.content)
+
+        # Шапка поменялась → новая версия, старый файл удалён
+        invoice = self.invoices[0]
+        invoice.buyer_company_name = 'ООО Новое'
+        invoice.save()
+        self.assertContains(self.client.get(url), 'ООО Новое')
+        _, files = documents._storage().listdir(str(invoice.id))
+        self.assertEqual(files, [f'v{documents.document_version(invoice)}.html'])
+
+    def test_accountant_archive_by_period(self):
+        self._login(self.accountant)
+        today = timezone.localdate().isoformat()
+        response = self.client.get(reverse('staff_invoices_archive'), {'date_from': today, 'date_to': today})
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertTrue(response.streaming)
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(archive.namelist(), ['invoice_2026_00001.html', 'invoice_2026_00002.html'])
+            self.assertIn('ООО Тест', archive.read('invoice_2026_00002.html').decode())
+
+        # Дилеру архив недоступен
+        self._login(self.dealer)
+        self.assertEqual(self.client.get(reverse('staff_invoices_archive')).status_code, 302)
+
+    def test_archive_loads_items_only_for_unrendered(self):
+        documents.get_document_html(self.invoices[0])
+        invoices = Invoice.objects.filter(id__in=[i.id for i in self.invoices]).order_by('number')
+        # счета + строки только второго (первый уже сохранён)
+        with self.assertNumQueries(2), mock.patch(
+            'main.services.shop.documents.amount_in_words_uzs', wraps=documents.amount_in_words_uzs,
+        ) as words:
+            with documents.build_archive(invoices) as archive_file, zipfile.ZipFile(archive_file) as archive:
+                self.assertEqual(len(archive.namelist()), 2)
+        self.assertEqual(words.call_count, 1)
+
+    def test_archive_period_capped(self):
+        self._login(self.accountant)
+        today = timezone.localdate()
+        too_long = today - timezone.timedelta(days=documents.ARCHIVE_MAX_DAYS)
+        response = self.client.get(reverse('staff_invoices_archive'), {
+            'date_from': too_long.isoformat(), 'date_to': today.isoformat(),
+        })
+        self.assertEqual(response.status_code, 400)
+
@@ -0,0 +1,83 @@
+import threading
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from main.models import (
+    DealerProfile, Invoice, InvoiceCounter, InvoiceItem, SparePart, SparePartType,
+)
+
+
+class InvoiceNumberingConcurrencyTest(TransactionTestCase):
+    """Параллельные подтверждения: номера 1..N без дыр и дублей"""
+
+    CONFIRMATIONS = 12
+
+    def setUp(self):
+        cache.clear()
+        part_type = SparePartType.objects.create(name='Фильтры', name_ru='Фильтры')
+        self.parts = [
+            SparePart.objects.create(part_number=f'N-{i}', name_ru=f'Деталь {i}', type=part_type,
+                                     price=Decimal('10'), quantity=1000)
+            for i in range(3)
+        ]
+        self.drafts = []
+        for i in range(self.CONFIRMATIONS):
+            user = User.objects.create_user(f'dealer{i}', password='x')
+            profile = DealerProfile.objects.create(
+                user=user, company_name=f'ООО {i}', inn='123456789', contract_number=f'D-{i}',
+            )
+            invoice = Invoice.objects.create(dealer=profile, total_amount=Decimal('30'))
+            InvoiceItem.objects.bulk_create([
+                # разный порядок строк у разных счетов — блокировки всё равно по id
+                InvoiceItem(invoice=invoice, part=p, name=p.name_ru, quantity=1,
+                            unit='шт', price=p.price, sum=p.price)
+                for p in (self.parts if i % 2 else self.parts[::-1])
+            ])
+            self.drafts.append((profile, invoice))
+
+    def _confirm(self, profile, invoice, results):
+        client = Client()
+        client.cookies['dealer_sid'] = signing.dumps({'pid': profile.id}, salt='main.dealer-auth.v1')
+        self.barrier.wait()
+        try:
+            results.append(client.post(reverse('dealer_invoice_confirm', args=[invoice.id])).status_code)
+        finally:
+            connection.close()
+
+    def test_parallel_confirmations_are_gap_free(self):
+        self.barrier = threading.Barrier(self.CONFIRMATIONS)
+        results = []
+        threads = [
+            threading.Thread(target=self._confirm, args=(profile, invoice, results))
+            for profile, invoice in self.drafts
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, [200] * self.CONFIRMATIONS)
+        year = timezone.now().year
+        numbers = sorted(Invoice.objects.filter(year=year).values_list('number', flat=True))
+        self.assertEqual(numbers, list(range(1, self.CONFIRMATIONS + 1)))
+        self.assertEqual(InvoiceCounter.objects.get(year=year).last_number, self.CONFIRMATIONS)
+        self.assertEqual(SparePart.objects.get(pk=self.parts[0].id).quantity, 1000 - self.CONFIRMATIONS)
+
+    def test_failed_confirmation_does_not_burn_a_number(self):
+        SparePart.objects.filter(pk=self.parts[0].id).update(quantity=0)
+        profile, invoice = self.drafts[0]
+        client = Client()
+        client.cookies['dealer_sid'] = signing.dumps({'pid': profile.id}, salt='main.dealer-auth.v1')
+        self.assertEqual(client.post(reverse('dealer_invoice_confirm', args=[invoice.id])).status_code, 400)
+
+        SparePart.objects.filter(pk=self.parts[0].id).update(quantity=10)
+        self.assertEqual(client.post(reverse('dealer_invoice_confirm', args=[invoice.id])).status_code, 200)
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.number, 1)
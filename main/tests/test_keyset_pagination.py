@@ -0,0 +1,75 @@
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from main.models import DealerProfile, SparePart, SparePartType
+from main.services.shop.search import search_parts
+from main.utils.keyset import decode_cursor, paginate
+
+
+class KeysetPaginationTest(TestCase):
+    """Keyset-пагинация: без пропусков/дублей, курсор переносит фильтры"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.type_a = SparePartType.objects.create(name='A', name_ru='A')
+        cls.type_b = SparePartType.objects.create(name='B', name_ru='B')
+        for i in range(60):
+            SparePart.objects.create(
+                part_number=f'P-{i:03d}', name_ru=f'Деталь {i}',
+                type=cls.type_a if i % 2 else cls.type_b,
+                price=Decimal('1000'), quantity=1,
+            )
+        # Одинаковый updated_at у всех — проверяем разрешение «ничьих» по id
+        SparePart.objects.update(updated_at=timezone.now())
+
+    def _walk(self, qs, ordering, page_size):
+        seen, cursor = [], None
+        while True:
+            page = paginate(qs, ordering, cursor, page_size)
+            seen.extend(p.id for p in page.items)
+            if not page.has_next:
+                return seen
+            cursor = page.next_cursor
+
+    def test_walk_covers_all_rows_once(self):
+        qs = SparePart.objects.all()
+        ids = self._walk(qs, ['-updated_at', 'id'], 7)
+        self.assertEqual(len(ids), 60)
+        self.assertEqual(len(set(ids)), 60)
+        self.assertEqual(ids, sorted(ids))
+
+        ids = self._walk(qs, ['part_number', 'id'], 8)
+        self.assertEqual(
+            [SparePart.objects.get(pk=i).part_number for i in ids],
+            [f'P-{i:03d}' for i in range(60)],
+        )
+
+    def test_walk_ranked_search_results(self):
+        qs = search_parts(SparePart.objects.all(), 'Деталь')
+        ids = self._walk(qs, ['-search_rank', 'id'], 7)
+        self.assertEqual(len(set(ids)), 60)
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        self.assertIsNone(decode_cursor('%%%not-base64', SparePart, ['id']))
+        page = paginate(SparePart.objects.all(), ['id'], 'garbage', 5)
+        self.assertEqual(len(page.items), 5)
+
+    def test_shop_json_variant_keeps_filters(self):
+        user = User.objects.create_user('dealer1', password='x')
+        profile = DealerProfile.objects.create(user=user, company_name='ООО Тест')
+        self.client.cookies['dealer_sid'] = signing.dumps({'pid': profile.id}, salt='main.dealer-auth.v1')
+
+        response = self.client.get(reverse('dealer_shop'), {'type': self.type_a.id, 'format': 'json'})
+        data = response.json()
+        self.assertTrue(data['has_next'])
+        self.assertEqual(data['html'].count('class="part-card"'), 24)
+
+        params = parse_qs(urlparse(data['next_json_url']).query)
+        self.assertEqual(params['type'], [str(self.type_a.id)])
+        self.assertIn('cursor', params)
@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from kg.models import KGHeroSlide, KGVehicle
+from main.tests.utils import in_another_worker, versions_rechecked
+
+
+class KGPublicApiCacheTest(TestCase):
+    """Публичный API KG: ответы из кеша, ETag/304, сброс по версии контента"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vehicle = KGVehicle.objects.create(title_ru='Самосвал VH', title_en='Dump truck')
+        KGHeroSlide.objects.create(vehicle=cls.vehicle, description_ru='Слайд', description_en='Slide')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_repeat_requests_skip_database_and_revalidate(self):
+        for url in ('/api/kg/vehicles/', f'/api/kg/vehicles/{self.vehicle.slug_ru}/', '/api/kg/hero/'):
+            first = self.client.get(url, {'lang': 'en'})
+            self.assertEqual(first.status_code, 200)
+            self.assertIn('public', first['Cache-Control'])
+            etag = first['ETag']
+
+            with self.assertNumQueries(0):
+                again = self.client.get(url, {'lang': 'en'})
+                not_modified = self.client.get(url, {'lang': 'en'}, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(again.json(), first.json())
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(not_modified['ETag'], etag)
+
+        self.assertNotEqual(
+            self.client.get('/api/kg/vehicles/', {'lang': 'ky'})['ETag'],
+            self.client.get('/api/kg/vehicles/', {'lang': 'en'})['ETag'],
+        )
+
+    def test_content_change_invalidates_after_commit(self):
+        url = f'/api/kg/vehicles/{self.vehicle.slug_ru}/'
+        etag = self.client.get(url, {'lang': 'en'})['ETag']
+
+        self.vehicle.title_en = 'Tipper'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vehicle.save()
+
+        response = self.client.get(url, {'lang': 'en'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], 'Tipper')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_content_change_in_another_worker_invalidates(self):
+        url = f'/api/kg/vehicles/{self.vehicle.slug_ru}/'
+        self.client.get(url, {'lang': 'en'})
+
+        self.vehicle.title_en = 'Tipper'
+        with in_another_worker(), self.captureOnCommitCallbacks(execute=True):
+            self.vehicle.save()
+
+        with versions_rechecked():
+            self.assertEqual(self.client.get(url, {'lang': 'en'}).json()['title'], 'Tipper')
+
+    def test_unknown_params_share_cache_entry(self):
+        first = self.client.get('/api/kg/vehicles/', {'lang': 'en'})
+        self.client.get('/api/kg/vehicles/')
+        with self.assertNumQueries(0):
+            junk = self.client.get('/api/kg/vehicles/', {'lang': 'en', 'utm_source': 'x', '_': '123'})
+            # неизвестный язык отдаётся как русский — и кешируется вместе с ним
+            ru = self.client.get('/api/kg/vehicles/', {'lang': 'xx'})
+        self.assertEqual(junk['ETag'], first['ETag'])
+        self.assertEqual(ru.json()['results'][0]['title'], 'Самосвал VH')
+
+    def test_response_is_always_json(self):
+        response = self.client.get('/api/kg/hero/', HTTP_ACCEPT='text/html')
+        self.assertEqual(response['Content-Type'], 'application/json')
@@ -0,0 +1,64 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from kg import spec_translation
+from kg.models import KGVehicle, SpecTranslation, VehicleCardSpec
+from kg.spec_translation import bump_dictionary_version, get_translator, translate
+from main.tests.utils import in_another_worker, versions_rechecked
+
+
+class SpecTranslationTest(TestCase):
+    """Автоперевод характеристик KG: словарь из таблицы, один проход регулярки"""
+
+    def setUp(self):
+        cache.clear()
+        bump_dictionary_version()  # словарь, собранный прошлым тестом, пережил бы откат его транзакции
+
+    def test_longest_term_wins_and_words_are_not_split(self):
+        self.assertEqual(translate('380 л.с.', 'en'), '380 hp')
+        self.assertEqual(translate('Бензин + Газ', 'en'), 'Gasoline + GAS')
+        self.assertEqual(translate('5000кг, 150л', 'en'), '5000kg 150L')
+        self.assertEqual(translate('Полный привод', 'en'), 'Полный привод')
+        self.assertEqual(translate('Дизель', 'ru'), 'Дизель')
+
+    def test_dictionary_edit_applies_without_restart(self):
+        translator = get_translator()
+        with self.assertNumQueries(0):
+            self.assertIs(get_translator(), translator)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SpecTranslation.objects.create(source='Полный привод', text_ky='Толук айдоо', text_en='AWD')
+        self.assertEqual(translate('Полный привод', 'en'), 'AWD')
+
+    def test_dictionary_edit_in_another_worker_applies_after_check_interval(self):
+        self.assertEqual(translate('Полный привод', 'en'), 'Полный привод')
+        local = dict(spec_translation._compiled)
+        with in_another_worker(), self.captureOnCommitCallbacks(execute=True):
+            SpecTranslation.objects.create(source='Полный привод', text_ky='Толук айдоо', text_en='AWD')
+        spec_translation._compiled.update(local)
+
+        self.assertEqual(translate('Полный привод', 'en'), 'Полный привод')
+        with versions_rechecked():
+            self.assertEqual(translate('Полный привод', 'en'), 'AWD')
+
+    def test_command_retranslates_changed_specs(self):
+        vehicle = KGVehicle.objects.create(title_ru='Тягач VH')
+        spec = VehicleCardSpec.objects.create(vehicle=vehicle, value_ru='Полный привод')
+        untouched = VehicleCardSpec.objects.create(vehicle=vehicle, value_ru='Дизель')
+        self.assertEqual(spec.value_en, 'Полный привод')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SpecTranslation.objects.create(source='Полный привод', text_ky='Толук айдоо', text_en='AWD')
+        out = StringIO()
+        # словарь изменился → перечитать версии и словарь, SELECT характеристик,
+        # bulk UPDATE, updated_at машины
+        with self.assertNumQueries(5):
+            call_command('retranslate_specs', stdout=out)
+        self.assertIn('Обновлено характеристик: 1', out.getvalue())
+
+        spec.refresh_from_db()
+        self.assertEqual((spec.value_ky, spec.value_en), ('Толук айдоо', 'AWD'))
+        self.assertEqual(VehicleCardSpec.objects.get(pk=untouched.pk).value_en, 'Diesel')
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from kg.models import KGFeedback
+
+URL = '/api/kg/feedback/statistics/'
+
+
+class KGStatisticsTest(TestCase):
+    """Статистика заявок KG: счётчики одним запросом, разбивки из кеша, fields="""
+
+    @classmethod
+    def setUpTestData(cls):
+        for status_, region in [('new', 'Osh'), ('new', 'Osh'), ('in_process', 'Bishkek'), ('done', 'Osh')]:
+            KGFeedback.objects.create(name='Тест', phone='+996', region=region, status=status_)
+        old = KGFeedback.objects.create(name='Старая', phone='+996', region='Naryn', status='done')
+        KGFeedback.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=40))
+        cls.admin = User.objects.create_user('admin', password='x', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def test_dashboard_sections_in_single_query_when_warm(self):
+        params = {'fields': 'by_status,time_periods,by_region,by_vehicle'}
+        self.client.get(URL, params)
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(URL, params).json()
+        queries = [q['sql'] for q in ctx.captured_queries if 'kg_kgfeedback' in q['sql']]
+        self.assertEqual(len(queries), 1)
+
+        self.assertEqual(data['by_status'], {'new': 2, 'in_process': 1, 'processed': 2})
+        self.assertEqual(data['time_periods'], {'today': 4, 'this_week': 4, 'this_month': 4})
+        self.assertEqual(data['by_region'][0], {'region': 'Osh', 'count': 3})
+        self.assertNotIn('feedbacks_list', data)
+        self.assertNotIn('by_manager', data)
+
+    def test_filters_and_default_sections(self):
+        data = self.client.get(URL, {'region': 'Osh'}).json()
+        self.assertEqual(data['by_status'], {'new': 2, 'in_process': 0, 'processed': 1})
+        self.assertEqual(len(data['feedbacks_list']), 3)
+        # Разбивки кешируются по набору фильтров — другой регион не получает чужие цифры
+        data = self.client.get(URL, {'region': 'Bishkek'}).json()
+        self.assertEqual(data['by_region'], [{'region': 'Bishkek', 'count': 1}])
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(URL, {'fields': 'by_status,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.json()['error'])
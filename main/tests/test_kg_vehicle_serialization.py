@@ -0,0 +1,76 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from kg.models import KGVehicle, VehicleCardSpec
+from kg.serializers import KGVehicleListSerializer
+from kg.specs import project_specs
+
+
+class KGVehicleSerializationTest(TestCase):
+    """JSON машины KG: характеристики по карте полей, готовый ответ из кеша API"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vehicle = KGVehicle.objects.create(
+            title_ru='Самосвал VH', title_en='Dump truck', wheel_formula='6x4',
+            fuel_type_ru='Дизель', fuel_type_en='Diesel', body_type_ru='Самосвальный',
+            engine_power='380 л.с.',
+        )
+        VehicleCardSpec.objects.create(vehicle=cls.vehicle, value_ru='Дизель')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_specs_fall_back_to_russian(self):
+        specs = project_specs(self.vehicle, 'en')
+        self.assertEqual(specs['general'], {'wheelFormula': '6x4', 'fuelType': 'Diesel'})
+        self.assertEqual(specs['body'], {'type': 'Самосвальный'})
+        self.assertEqual(specs['engine'], {'power': '380 л.с.'})
+        self.assertIsNone(specs['cabin'])
+        self.assertEqual(project_specs(self.vehicle, 'ky')['general']['fuelType'], 'Дизель')
+
+    def test_served_from_api_cache_until_vehicle_changes(self):
+        url = f'/api/kg/vehicles/{self.vehicle.slug_ru}/'
+        first = self.client.get(url, {'lang': 'en'}).json()
+        self.assertEqual(first['detailed_specs']['general']['fuelType'], 'Diesel')
+        self.assertEqual(first['card_specs'][0]['value'], 'Diesel')
+        self.client.get('/api/kg/vehicles/', {'lang': 'en'})
+
+        with mock.patch.object(KGVehicleListSerializer, 'get_title') as get_title, \
+                mock.patch('kg.serializers.project_specs') as projection:
+            self.assertEqual(self.client.get(url, {'lang': 'en'}).json(), first)
+            self.client.get('/api/kg/vehicles/', {'lang': 'en'})
+        projection.assert_not_called()
+        get_title.assert_not_called()
+
+        spec = self.vehicle.card_specs.get()
+        spec.value_ru = 'Бензин'
+        with self.captureOnCommitCallbacks(execute=True):
+            spec.save()
+        self.assertEqual(self.client.get(url, {'lang': 'en'}).json()['card_specs'][0]['value'], 'Gasoline')
+
+    def test_cached_json_refreshed_when_derivatives_are_ready(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        buf = io.BytesIO()
+        Image.new('RGB', (1000, 500), (200, 30, 30)).save(buf, 'JPEG')
+        url = f'/api/kg/vehicles/{self.vehicle.slug_ru}/'
+
+        with override_settings(MEDIA_ROOT=media_root, IMAGE_DERIVATIVES_ASYNC=False,
+                               IMAGE_DERIVATIVE_WIDTHS=(320, 640)):
+            self.vehicle.main_image = SimpleUploadedFile('main.jpg', buf.getvalue(), content_type='image/jpeg')
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.vehicle.save()
+            # ответ собран до фоновой генерации — srcset пустой
+            self.assertEqual(self.client.get(url).json()['main_image_responsive']['srcset'], '')
+
+            for callback in callbacks:  # коммит: сброс версии API и генерация производных
+                callback()
+            self.assertIn('_w320.webp 320w', self.client.get(url).json()['main_image_responsive']['srcset'])
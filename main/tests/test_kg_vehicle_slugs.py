@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from kg.models import KGVehicle, KGVehicleSlug
+
+
+class KGVehicleSlugTest(TestCase):
+    """Детальная машины KG: поиск по таблице адресов, 301 со старого slug"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vehicle = KGVehicle.objects.create(title_ru='Самосвал VH', title_ky='Самосвал', title_en='Dump truck')
+
+    def setUp(self):
+        cache.clear()  # ответы API кешируются (kg/api_cache.py)
+
+    def test_every_language_slug_resolves_with_single_lookup(self):
+        self.assertEqual(
+            dict(self.vehicle.slug_aliases.values_list('slug', 'lang')),
+            {'samosval-vh': 'ru', 'samosval': 'ky', 'dump-truck': 'en'},
+        )
+        for slug in ('samosval-vh', 'samosval', 'dump-truck'):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(f'/api/kg/vehicles/{slug}/', {'lang': 'en'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['id'], self.vehicle.id)
+            lookups = [q['sql'] for q in ctx.captured_queries if 'kg_kgvehicleslug' in q['sql']]
+            self.assertEqual(len(lookups), 1)
+            self.assertNotIn('" OR "', lookups[0])
+
+        self.assertEqual(self.client.get('/api/kg/vehicles/nope/').status_code, 404)
+
+    def test_renamed_slug_redirects_permanently(self):
+        self.vehicle.slug_en = 'tipper'
+        self.vehicle.save()
+
+        response = self.client.get('/api/kg/vehicles/dump-truck/', {'lang': 'en'})
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response['Location'], '/api/kg/vehicles/tipper/?lang=en')
+        self.assertFalse(KGVehicleSlug.objects.get(slug='dump-truck').is_current)
+
+        # Старый адрес может занять другая машина — тогда он уже её
+        other = KGVehicle.objects.create(title_ru='Тягач', slug_en='dump-truck')
+        self.assertEqual(KGVehicleSlug.objects.get(slug='dump-truck').vehicle, other)
+        self.assertEqual(self.client.get('/api/kg/vehicles/dump-truck/').json()['id'], other.id)
@@ -0,0 +1,55 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.utils import translation
+
+from myproject.middleware import (
+    AutoLanguageMiddleware, ForceRussianMiddleware, browser_language, is_bot_user_agent,
+)
+
+
+class LanguageMiddlewareTest(TestCase):
+    """Языковые middleware: скомпилированные таблицы и кеши решений"""
+
+    def test_bot_and_accept_language_lookups(self):
+        self.assertTrue(is_bot_user_agent('Mozilla/5.0 (compatible; YandexBot/3.0)'))
+        self.assertTrue(is_bot_user_agent(''))
+        self.assertFalse(is_bot_user_agent('Mozilla/5.0 (Windows NT 10.0) Chrome/124.0'))
+
+        browser_language.cache_clear()
+        self.assertEqual(browser_language('de-DE,en;q=0.8,ru;q=0.9'), 'ru')
+        self.assertIsNone(browser_language('de-DE,*;q=0.5,en;q=0.1'))
+        self.assertEqual(browser_language('de-DE,en;q=0.8,ru;q=0.9'), 'ru')
+        self.assertEqual(browser_language.cache_info().hits, 1)
+
+    def test_prefix_tables(self):
+        middleware = AutoLanguageMiddleware(lambda request: HttpResponse())
+        self.assertEqual(middleware._url_prefix_lang('/ru'), 'ru')
+        self.assertEqual(middleware._url_prefix_lang('/en/about/'), 'en')
+        self.assertIsNone(middleware._url_prefix_lang('/rules/'))
+        self.assertEqual(middleware._strip_lang_prefix('/en/about/'), '/about/')
+        self.assertEqual(middleware._strip_lang_prefix('/ru'), '/')
+        self.assertEqual(middleware._strip_lang_prefix('/rules/'), '/rules/')
+
+        factory = RequestFactory()
+        self.assertTrue(middleware._should_skip(factory.get('/sitemap-products.xml')))
+        self.assertFalse(middleware._should_skip(factory.get('/products/')))
+
+    def test_api_language_from_prefix(self):
+        self.addCleanup(translation.deactivate)
+        middleware = ForceRussianMiddleware(lambda request: HttpResponse())
+        factory = RequestFactory()
+        for path, expected in (('/api/ru/news/', 'ru'), ('/api/products/', 'uz'), ('/admin/', 'ru')):
+            request = factory.get(path)
+            self.assertEqual(middleware(request)['Content-Language'], expected)
+
+        request = factory.get('/api/kg/vehicles/')
+        request.session = {}
+        self.assertEqual(middleware(request)['Content-Language'], 'ky')
+
+    def test_benchmark_command_runs(self):
+        out = StringIO()
+        call_command('bench_middleware', iterations=5, repeat=1, stdout=out)
+        self.assertIn('цепочка', out.getvalue())
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from main.models import Promotion
+
+
+class CleanupOrphanMediaTest(TestCase):
+    """cleanup_orphan_media: удаляет только файлы без ссылок в БД"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+
+        for rel in ('promotions/live.jpg', 'promotions/dead.jpg',
+                    'derivatives/promotions/live_w320.webp',
+                    'derivatives/promotions/dead_w320.webp',
+                    'uploads/from_ckeditor.png'):
+            path = os.path.join(self.media_root, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as fh:
+                fh.write(b'x' * 10)
+
+        # update() — без сигналов, файл уже лежит на диске
+        promo = Promotion.objects.create(title='Акция', description='-')
+        Promotion.objects.filter(pk=promo.pk).update(image='promotions/live.jpg')
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _exists(self, rel):
+        return os.path.exists(os.path.join(self.media_root, rel))
+
+    def test_dry_run_keeps_files(self):
+        out = StringIO()
+        call_command('cleanup_orphan_media', '--dry-run', '--min-age-hours=0', stdout=out)
+        self.assertIn('orphan-файлов: 2', out.getvalue())
+        self.assertTrue(self._exists('promotions/dead.jpg'))
+
+    def test_deletes_only_orphans(self):
+        call_command('cleanup_orphan_media', '--min-age-hours=0', '--batch-size=1', stdout=StringIO())
+        self.assertTrue(self._exists('promotions/live.jpg'))
+        self.assertTrue(self._exists('derivatives/promotions/live_w320.webp'))
+        self.assertTrue(self._exists('uploads/from_ckeditor.png'))
+        self.assertFalse(self._exists('promotions/dead.jpg'))
+        self.assertFalse(self._exists('derivatives/promotions/dead_w320.webp'))
+
+    def test_fresh_files_are_skipped(self):
+        call_command('cleanup_orphan_media', stdout=StringIO())
+        self.assertTrue(self._exists('promotions/dead.jpg'))
@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.test import TestCase
+from django.urls import reverse
+
+from main.models import DealerProfile, SparePart, SparePartType, normalize_part_number
+from main.services.shop.search import search_parts
+
+
+class PartsSearchTest(TestCase):
+    """Поиск запчастей: нормализованный артикул, опечатки, ранжирование, автокомплит"""
+
+    @classmethod
+    def setUpTestData(cls):
+        brakes = SparePartType.objects.create(name='Тормоза', name_ru='Тормоза')
+        engine = SparePartType.objects.create(name='Двигатель', name_ru='Двигатель')
+        cls.pads = SparePart.objects.create(
+            part_number='3501-AKB-FAW', name_ru='Колодка тормозная передняя',
+            type=brakes, price=Decimal('150000'), quantity=5,
+        )
+        cls.pads_rear = SparePart.objects.create(
+            part_number='3502-AKB-FAW', name_ru='Колодка тормозная задняя',
+            type=brakes, price=Decimal('140000'), quantity=5,
+        )
+        cls.filter = SparePart.objects.create(
+            part_number='1012-OIL', name_ru='Фильтр масляный',
+            type=engine, price=Decimal('50000'), quantity=5,
+        )
+
+    def _search(self, q):
+        return list(search_parts(SparePart.objects.all(), q))
+
+    def test_normalize_part_number(self):
+        self.assertEqual(normalize_part_number(' 3501-akb faw '), '3501AKBFAW')
+        self.assertEqual(SparePart.objects.get(pk=self.pads.pk).part_number_normalized, '3501AKBFAW')
+
+    def test_part_number_without_dashes(self):
+        self.assertEqual(self._search('3501akb')[0], self.pads)
+        self.assertEqual(self._search('3501 AKB FAW')[0], self.pads)
+
+    def test_exact_part_number_ranked_first(self):
+        results = self._search('3502-AKB-FAW')
+        self.assertEqual(results[0], self.pads_rear)
+
+    def test_name_search_and_typo(self):
+        self.assertIn(self.filter, self._search('масляный'))
+        # опечатка в одном символе
+        self.assertIn(self.filter, self._search('фильтр масляныи'))
+
+    def test_search_vector_updated_on_rename(self):
+        self.filter.name_ru = 'Фильтр топливный'
+        self.filter.save()
+        self.assertIn(self.filter, self._search('топлив'))
+
+    def test_autocomplete_endpoint(self):
+        user = User.objects.create_user('dealer1', password='x')
+        profile = DealerProfile.objects.create(user=user, company_name='ООО Тест')
+        self.client.cookies['dealer_sid'] = signing.dumps({'pid': profile.id}, salt='main.dealer-auth.v1')
+
+        response = self.client.get(reverse('dealer_parts_autocomplete'), {'q': '3501'})
+        self.assertEqual(response.status_code, 200)
+        items = response.json()['items']
+        self.assertEqual(items[0]['part_number'], '3501-AKB-FAW')
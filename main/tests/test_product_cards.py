@@ -0,0 +1,77 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import PageNumberPagination
+
+from main.models import Product, ProductCategoryLink
+from main.tests.utils import in_another_worker, versions_rechecked
+
+
+class ProductCardsTest(TestCase):
+    """Каталог грузовиков: категории отдельной таблицей, список карточек из кеша"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tiger_v = Product.objects.create(title='Tiger V', slug='tiger-v', category='furgon', categories='tiger_v')
+        cls.tiger_vh = Product.objects.create(title='Tiger VH', slug='tiger-vh', category='tiger_vh',
+                                              categories='samosval, tiger_vh')
+
+    def setUp(self):
+        cache.clear()
+
+    def _slugs(self, category):
+        response = self.client.get('/api/products/', {'category': category})
+        self.assertEqual(response.status_code, 200)
+        return [item['slug'] for item in response.json()['results']]
+
+    def test_links_follow_category_fields(self):
+        self.assertEqual(
+            set(self.tiger_vh.category_links.values_list('category', flat=True)), {'tiger_vh', 'samosval'},
+        )
+        self.tiger_vh.categories = 'maxsus'
+        self.tiger_vh.save()
+        self.assertEqual(
+            set(ProductCategoryLink.objects.filter(product=self.tiger_vh).values_list('category', flat=True)),
+            {'tiger_vh', 'maxsus'},
+        )
+
+    def test_category_filter_is_exact(self):
+        # раньше categories__icontains='tiger_v' находил и tiger_vh
+        self.assertEqual(self._slugs('tiger_v'), ['tiger-v'])
+        self.assertEqual(self._slugs('samosval'), ['tiger-vh'])
+
+    def test_card_list_cached_per_category_until_product_saved(self):
+        self.assertEqual(self._slugs('furgon'), ['tiger-v'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self._slugs('furgon'), ['tiger-v'])
+
+        self.tiger_vh.categories = 'furgon'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tiger_vh.save()
+        self.assertEqual(self._slugs('furgon'), ['tiger-v', 'tiger-vh'])
+
+    def test_product_saved_in_another_worker_invalidates(self):
+        self.assertEqual(self._slugs('furgon'), ['tiger-v'])
+
+        self.tiger_vh.categories = 'furgon'
+        with in_another_worker(), self.captureOnCommitCallbacks(execute=True):
+            self.tiger_vh.save()
+        with versions_rechecked():
+            self.assertEqual(self._slugs('furgon'), ['tiger-v', 'tiger-vh'])
+
+    def test_pages_and_unknown_params_share_category_list(self):
+        with mock.patch.object(PageNumberPagination, 'page_size', 1):
+            with CaptureQueriesContext(connection) as ctx:
+                first = self.client.get('/api/products/').json()
+            with self.assertNumQueries(0):
+                second = self.client.get('/api/products/', {'page': 2, 'utm_source': 'x'}).json()
+                self.assertEqual(self.client.get('/api/products/', {'category': 'nope'}).json()['results'], [])
+        self.assertEqual([first['count'], second['count']], [2, 2])
+        self.assertEqual([item['slug'] for item in first['results'] + second['results']], ['tiger-v', 'tiger-vh'])
+        # список не тянет параметры, фичи и галерею — карточке они не нужны
+        tables = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('productgallery', tables)
+        self.assertNotIn('productparameter', tables)
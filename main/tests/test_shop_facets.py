@@ -0,0 +1,63 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import translation
+
+from main.models import SparePart, SparePartType
+from main.services.shop.facets import get_facets
+from main.services.shop.search import search_parts
+
+
+class ShopFacetsTest(TestCase):
+    """Фасеты магазина: количество, перекрёстная фильтрация, кеш"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.brakes = SparePartType.objects.create(name='Тормоза', name_ru='Тормоза')
+        cls.filters = SparePartType.objects.create(name='Фильтры', name_ru='Фильтры')
+        for i in range(3):
+            SparePart.objects.create(part_number=f'BR-{i}', name_ru=f'Колодка {i}',
+                                     type=cls.brakes, price=Decimal('1'))
+        SparePart.objects.create(part_number='FL-1', name_ru='Фильтр масляный',
+                                 type=cls.filters, price=Decimal('1'))
+        SparePart.objects.create(part_number='FL-2', name_ru='Фильтр снятый',
+                                 type=cls.filters, price=Decimal('1'), is_active=False)
+
+    def setUp(self):
+        cache.clear()
+        translation.activate('ru')
+
+    def _counts(self, facets, key='types'):
+        label = 'name' if key == 'types' else 'title'
+        return {f[label]: f['count'] for f in facets[key]}
+
+    def test_counts_only_active_parts(self):
+        facets = get_facets()
+        self.assertEqual(self._counts(facets), {'Тормоза': 3, 'Фильтры': 1})
+
+    def test_counts_follow_search(self):
+        qs = search_parts(SparePart.objects.filter(is_active=True), 'Колодка')
+        self.assertEqual(self._counts(get_facets(qs)), {'Тормоза': 3})
+
+    def test_selected_type_kept_with_zero(self):
+        qs = search_parts(SparePart.objects.filter(is_active=True), 'Колодка')
+        facets = get_facets(qs, type_id=self.filters.id)
+        # под выбранным типом поиск ничего не находит, но тип остаётся в селекте
+        self.assertEqual(self._counts(facets), {'Тормоза': 3, 'Фильтры': 0})
+        self.assertTrue(next(t for t in facets['types'] if t['id'] == self.filters.id)['selected'])
+
+    def test_unfiltered_facets_cached_and_invalidated(self):
+        with CaptureQueriesContext(connection) as ctx:
+            get_facets()
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            get_facets()
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        SparePart.objects.create(part_number='FL-3', name_ru='Фильтр воздушный',
+                                 type=self.filters, price=Decimal('1'))
+        self.assertEqual(self._counts(get_facets())['Фильтры'], 2)
@@ -0,0 +1,71 @@
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from main.models import DealerProfile, SparePart, SparePartType, StockMovement
+
+
+class BulkStockAdjustmentTest(TestCase):
+    """Пакетная корректировка остатков сервисом: одна транзакция, журнал по строкам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        part_type = SparePartType.objects.create(name='Фильтры', name_ru='Фильтры')
+        cls.parts = [
+            SparePart.objects.create(part_number=f'A-{i}', name_ru=f'Деталь {i}', type=part_type,
+                                     price=Decimal('10'), quantity=5)
+            for i in range(40)
+        ]
+        user = User.objects.create_user('service', password='x')
+        cls.service = DealerProfile.objects.create(user=user, role=DealerProfile.ROLE_SERVICE)
+
+    def setUp(self):
+        cache.clear()
+        self.client.cookies['dealer_sid'] = signing.dumps({'pid': self.service.id}, salt='main.dealer-auth.v1')
+
+    def _post(self, payload):
+        return self.client.post(reverse('staff_parts_bulk_quantity'), json.dumps(payload),
+                                content_type='application/json')
+
+    def test_batch_applies_in_fixed_queries_with_per_line_results(self):
+        items = [{'part_id': p.id, 'quantity': 9} for p in self.parts]
+        items += [
+            {'part_id': self.parts[0].id, 'delta': -2},   # 9 → 7
+            {'part_id': self.parts[1].id, 'delta': -100},  # в минус — ошибка
+            {'part_id': 999999, 'quantity': 1},
+            {'part_id': self.parts[2].id, 'quantity': 'abc'},
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._post({'items': items, 'comment': 'Инвентаризация'})
+        data = response.json()
+        self.assertEqual(data['applied'], 41)
+        self.assertEqual(data['results'][40], {'part_id': self.parts[0].id, 'ok': True, 'quantity': 7})
+        self.assertIn('минус', data['results'][41]['error'])
+        self.assertEqual(data['results'][42]['error'], 'Запчасть не найдена')
+        self.assertFalse(data['results'][43]['ok'])
+        # lock + bulk_update + bulk_create (+ savepoint/сессия кабинета) — не зависит от числа строк
+        self.assertLess(len(ctx.captured_queries), 10)
+
+        self.assertEqual(SparePart.objects.get(pk=self.parts[0].id).quantity, 7)
+        self.assertEqual(SparePart.objects.get(pk=self.parts[1].id).quantity, 9)
+        movements = StockMovement.objects.filter(part=self.parts[0], kind=StockMovement.KIND_ADJUSTMENT)
+        self.assertEqual(sorted(m.delta for m in movements), [-2, 4])
+        self.assertEqual({m.comment for m in movements}, {'Инвентаризация'})
+        self.assertEqual(movements.first().author, self.service)
+
+    def test_single_part_endpoint_is_audited(self):
+        url = reverse('staff_part_update_quantity', args=[self.parts[3].id])
+        response = self.client.post(url, json.dumps({'delta': 3}), content_type='application/json')
+        self.assertEqual(response.json(), {'ok': True, 'quantity': 8})
+        self.assertEqual(StockMovement.objects.get(part=self.parts[3], kind=StockMovement.KIND_ADJUSTMENT).quantity_after, 8)
+
+        url = reverse('staff_part_update_quantity', args=[999999])
+        response = self.client.post(url, json.dumps({'quantity': 1}), content_type='application/json')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,36 @@
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from django.core.cache.backends import locmem
+
+from main.utils.cache_versions import CHECK_INTERVAL
+
+
+@contextmanager
+def in_another_worker():
+    """Изменения внутри блока делает «другой воркер».
+
+    Память процесса (LocMemCache) после блока возвращается к снимку,
+    снятому до него: что бы блок ни записал в кеш процесса, текущий
+    «воркер» этого не увидит. Видно только то, что легло в БД.
+    """
+    snapshot = {
+        name: (dict(data), dict(locmem._expire_info[name])) for name, data in locmem._caches.items()
+    }
+    try:
+        yield
+    finally:
+        for name, (data, expire_info) in snapshot.items():
+            locmem._caches[name].clear()
+            locmem._caches[name].update(data)
+            locmem._expire_info[name].clear()
+            locmem._expire_info[name].update(expire_info)
+
+
+@contextmanager
+def versions_rechecked():
+    """Внутри блока прошло CHECK_INTERVAL секунд — процесс перечитает версии кешей."""
+    later = time.time() + CHECK_INTERVAL + 1
+    with mock.patch('time.time', return_value=later):
+        yield
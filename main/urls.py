@@ -27,6 +27,7 @@ urlpatterns = [
     path('dealer/part/<int:part_id>/', views.dealer_part_detail, name='dealer_part_detail'),
     path('dealer/cart/', views.dealer_cart_view, name='dealer_cart'),
     path('dealer/api/cart-parts/', views.dealer_cart_api, name='dealer_cart_api'),
+    path('dealer/api/parts/autocomplete/', views.dealer_parts_autocomplete, name='dealer_parts_autocomplete'),
     path('dealer/cart/checkout/', views.dealer_cart_checkout, name='dealer_cart_checkout'),
     path('dealer/invoices/', views.dealer_invoices_list, name='dealer_invoices_list'),
     path('dealer/invoice/<int:invoice_id>/', views.dealer_invoice, name='dealer_invoice'),
@@ -37,11 +38,13 @@ urlpatterns = [
 
     # ========== STAFF (СЕРВИС + БУХГАЛТЕР) ==========
     path('staff/orders/', views.staff_orders_list, name='staff_orders_list'),
+    path('staff/orders/archive/', views.staff_invoices_archive, name='staff_invoices_archive'),
     path('staff/orders/<int:invoice_id>/', views.staff_order_detail, name='staff_order_detail'),
     path('staff/orders/<int:invoice_id>/document/', views.staff_invoice_view, name='staff_invoice_view'),
     path('staff/orders/<int:invoice_id>/status/', views.staff_change_status, name='staff_change_status'),
     path('staff/parts/', views.staff_parts_list, name='staff_parts_list'),
     path('staff/parts/<int:part_id>/quantity/', views.staff_part_update_quantity, name='staff_part_update_quantity'),
+    path('staff/parts/bulk-quantity/', views.staff_parts_bulk_quantity, name='staff_parts_bulk_quantity'),
 
     # ========== DASHBOARD ==========
     path('admin/dashboard/', views.dashboard_view, name='admin_dashboard'),
@@ -0,0 +1,134 @@
+"""Пагинация больших списков админки без точного COUNT(*) на каждый клик.
+
+Каждая страница changelist'а считала SELECT COUNT(*) с текущими фильтрами —
+на сотнях тысяч заявок это самая медленная часть открытия списка.
+EstimatedCountPaginator:
+  - таблица меньше estimate_threshold строк — точный COUNT, как раньше;
+  - без фильтров — оценка pg_class.reltuples (обновляется autovacuum/ANALYZE);
+  - с фильтрами — COUNT с потолком: SELECT COUNT(*) FROM (... LIMIT cap + 1).
+    Узкий фильтр (≤ cap) — точное число, широкий — «более cap».
+«Точное число» в подвале списка (?exact_count=1) — обычный COUNT(*).
+
+Пока число — оценка, номер страницы не проверяется по num_pages: за
+«потолком» страницы есть, а reltuples бывает завышен. Страница за реальным
+концом списка → точный COUNT и последняя настоящая страница (а не редирект
+админки на ?e=1). Ссылок на последние страницы при оценке нет — только
+окрестность текущей.
+
+    class ContactFormAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
+        ...
+"""
+
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+
+EXACT_COUNT_PARAM = 'exact_count'
+
+ESTIMATE_APPROX = 'approx'
+ESTIMATE_CAPPED = 'capped'
+
+
+def table_row_estimate(model):
+    """Оценка числа строк таблицы из статистики планировщика. -1 — статистики ещё нет."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else -1
+
+
+class EstimatedCountPaginator(Paginator):
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True,
+                 exact=False, estimate_threshold=50_000, count_cap=10_000):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.exact = exact
+        self.estimate_threshold = estimate_threshold
+        self.count_cap = count_cap
+        # '' — число точное, иначе ESTIMATE_APPROX / ESTIMATE_CAPPED (для шаблона)
+        self.estimate_kind = ''
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if self.exact:
+            return qs.count()
+        estimate = table_row_estimate(qs.model)
+        if estimate < self.estimate_threshold:
+            return qs.count()
+        if not qs.query.where:
+            self.estimate_kind = ESTIMATE_APPROX
+            return estimate
+        capped = qs.order_by()[:self.count_cap + 1].count()
+        if capped > self.count_cap:
+            self.estimate_kind = ESTIMATE_CAPPED
+            return self.count_cap
+        return capped
+
+    def page(self, number):
+        if not self.count or not self.estimate_kind:
+            return super().page(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        bottom = (number - 1) * self.per_page
+        object_list = self.object_list[bottom:bottom + self.per_page]
+        if object_list or number == 1:  # bool() выполняет срез — второго запроса не будет
+            return self._get_page(object_list, number, self)
+        # Оценка завышена: считаем точно и отдаём последнюю настоящую страницу
+        self.__dict__['count'] = self.object_list.count()
+        self.__dict__.pop('num_pages', None)
+        self.estimate_kind = ''
+        return super().page(min(number, self.num_pages))
+
+    def get_elided_page_range(self, number=1, *, on_each_side=3, on_ends=2):
+        if not self.estimate_kind:
+            yield from super().get_elided_page_range(number, on_each_side=on_each_side, on_ends=on_ends)
+            return
+        # Где конец — неизвестно: начало, окрестность текущей и «…»
+        number = int(number)
+        if number > (1 + on_each_side + on_ends) + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + on_each_side + 1)
+        else:
+            yield from range(1, number + on_each_side + 1)
+        yield self.ELLIPSIS
+
+
+class EstimatedCountAdminMixin:
+    """ModelAdmin: EstimatedCountPaginator + переключатель «точное число»."""
+    show_full_result_count = False
+    estimate_threshold = 50_000
+    count_cap = 10_000
+
+    def get_changelist_instance(self, request):
+        # ChangeList считает любой неизвестный GET-параметр фильтром — убираем свой
+        request.exact_count = request.GET.get(EXACT_COUNT_PARAM) == '1'
+        if EXACT_COUNT_PARAM in request.GET:
+            request.GET = request.GET.copy()
+            request.GET.pop(EXACT_COUNT_PARAM)
+        cl = super().get_changelist_instance(request)
+        if cl.result_count != cl.paginator.count:
+            # page() ушёл за реальный конец и пересчитал точно — показана последняя страница
+            cl.result_count = cl.paginator.count
+            cl.page_num = cl.paginator.num_pages
+            cl.multi_page = cl.result_count > cl.list_per_page
+            cl.can_show_all = cl.result_count <= cl.list_max_show_all
+        if cl.paginator.estimate_kind:
+            cl.exact_count_url = cl.get_query_string({EXACT_COUNT_PARAM: '1'})
+        return cl
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return EstimatedCountPaginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            exact=getattr(request, 'exact_count', False),
+            estimate_threshold=self.estimate_threshold,
+            count_cap=self.count_cap,
+        )
@@ -0,0 +1,49 @@
+"""Версии кешей, общие для всех воркеров gunicorn.
+
+Сами данные лежат в кеше процесса (LocMemCache — чтение без похода в БД),
+а в ключ входит версия группы:
+
+    key = f'user_access_{get_version(PERMISSIONS)}_{user.pk}'
+
+Версии — строки таблицы CacheVersion. Процесс читает таблицу целиком
+(несколько строк, один запрос) и держит копию в своём кеше CHECK_INTERVAL
+секунд. Правка меняет версию после коммита — bump_version() через
+transaction.on_commit: процесс, сделавший правку, видит её сразу,
+остальные — не позже чем через CHECK_INTERVAL.
+
+Версия — случайный токен, а не счётчик: откат транзакции или очистка
+кеша не вернут старое значение, под которым ещё лежат записи.
+"""
+
+import uuid
+
+from django.core.cache import cache
+
+CHECK_INTERVAL = 5
+_LOCAL_KEY = 'cache_versions'
+
+# Группы
+PERMISSIONS = 'permissions'
+KG_API_CONTENT = 'kg_api_content'
+KG_SPEC_DICTIONARY = 'kg_spec_dictionary'
+PRODUCT_CARDS = 'product_cards'
+DEALER_SESSIONS = 'dealer_sessions'
+
+
+def get_version(name):
+    versions = cache.get(_LOCAL_KEY)
+    if versions is None:
+        from main.models import CacheVersion
+        versions = dict(CacheVersion.objects.values_list('key', 'version'))
+        cache.set(_LOCAL_KEY, versions, CHECK_INTERVAL)
+    # Строки ещё нет — группу никто не менял
+    return versions.get(name, '-')
+
+
+def bump_version(name):
+    from main.models import CacheVersion
+    CacheVersion.objects.bulk_create(
+        [CacheVersion(key=name, version=uuid.uuid4().hex)],
+        update_conflicts=True, unique_fields=['key'], update_fields=['version'],
+    )
+    cache.delete(_LOCAL_KEY)
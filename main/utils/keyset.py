@@ -0,0 +1,112 @@
+"""Keyset (cursor) пагинация.
+
+OFFSET на глубоких страницах заставляет БД прочитать и выбросить все
+предыдущие строки. Здесь следующая страница начинается строго «после»
+последней строки предыдущей: WHERE (a, b) > (last_a, last_b) — цена
+страницы не зависит от глубины.
+
+- ordering — список полей как в order_by(): ['-updated_at', 'id'].
+  Последнее поле обязано быть уникальным (id) — иначе возможны пропуски.
+- cursor — непрозрачная строка (urlsafe base64 JSON значений последней строки).
+
+    page = paginate(qs, ['-updated_at', 'id'], request.GET.get('cursor'), 24)
+    page.items, page.next_cursor, page.has_next
+"""
+
+import base64
+import binascii
+import datetime
+import decimal
+import json
+import uuid
+from dataclasses import dataclass, field
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+@dataclass
+class KeysetPage:
+    items: list = field(default_factory=list)
+    next_cursor: str = ''
+    has_next: bool = False
+
+
+def _json_default(value):
+    # DjangoJSONEncoder режет микросекунды у datetime — для keyset это
+    # означает пропуск/дубли строк на границе страницы, поэтому свой вариант
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} не сериализуется в cursor')
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, ordering):
+    """Строка → список значений с нужными типами. Битый cursor → None (первая страница)."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(ordering):
+        return None
+
+    result = []
+    for name, value in zip(_field_names(ordering), values):
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # аннотация (например search_rank) — JSON-значение как есть
+            result.append(value)
+            continue
+        try:
+            result.append(model_field.to_python(value))
+        except ValidationError:
+            return None
+    return result
+
+
+def _field_names(ordering):
+    return [o.lstrip('-') for o in ordering]
+
+
+def _after_filter(ordering, values):
+    """(a, b, c) «после» (va, vb, vc) с учётом направления каждого поля:
+    a > va OR (a = va AND b > vb) OR (a = va AND b = vb AND c > vc)
+    """
+    condition = Q()
+    equal_prefix = {}
+    for order, value in zip(ordering, values):
+        name = order.lstrip('-')
+        lookup = 'lt' if order.startswith('-') else 'gt'
+        condition |= Q(**equal_prefix, **{f'{name}__{lookup}': value})
+        equal_prefix[name] = value
+    return condition
+
+
+def paginate(queryset, ordering, cursor=None, page_size=50):
+    ordering = list(ordering)
+    qs = queryset.order_by(*ordering)
+
+    values = decode_cursor(cursor, queryset.model, ordering)
+    if values is not None:
+        qs = qs.filter(_after_filter(ordering, values))
+
+    # +1 строка — узнаём, есть ли следующая страница, без COUNT(*)
+    rows = list(qs[:page_size + 1])
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+
+    next_cursor = ''
+    if has_next and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, name) for name in _field_names(ordering)])
+    return KeysetPage(items=rows, next_cursor=next_cursor, has_next=has_next)
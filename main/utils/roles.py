@@ -0,0 +1,84 @@
+"""Роли пользователя админки — один раз на запрос, из кеша.
+
+Админка вызывает has_module_permission / has_change_permission / ... по разу
+на каждую зарегистрированную модель (сайдбар, главная), и каждый вызов
+миксинов делал свой groups.filter(...).exists(). Теперь имена групп и набор
+прав грузятся один раз и живут на request:
+
+    roles = get_roles(request)
+    roles.in_groups('Главные админы', 'Лид-менеджеры')
+    roles.has_perm('kg.view_kgfeedback')
+    roles.has_any_perm('main.view_news', 'main.view_product')
+
+Группы и права пользователя (get_user_access) лежат в кеше под ключом
+с глобальной версией прав. Любая правка групп/прав/пользователя после
+коммита меняет версию (main/signals.py) — старые записи просто перестают
+читаться. Версия общая для всех воркеров (main/utils/cache_versions.py):
+в процессе, сделавшем правку, она действует сразу, в остальных — не позже
+чем через CHECK_INTERVAL секунд. Тот же кеш использует бэкенд авторизации
+(myproject/auth_backends.py), поэтому user.has_perm() в обычном запросе
+таблицы прав не читает.
+"""
+
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from main.utils.cache_versions import PERMISSIONS, bump_version, get_version
+
+USER_ACCESS_TTL = 60 * 5
+
+_REQUEST_ATTR = '_user_roles'
+
+
+def permissions_version():
+    return get_version(PERMISSIONS)
+
+
+def bump_permissions_version():
+    bump_version(PERMISSIONS)
+
+
+def get_user_access(user):
+    """{'groups': [...], 'perms': [...]} активного пользователя (кеш по id + версии прав)."""
+    key = f'user_access_{permissions_version()}_{user.pk}'
+    access = cache.get(key)
+    if access is None:
+        access = {
+            'groups': sorted(user.groups.values_list('name', flat=True)),
+            'perms': sorted(ModelBackend().get_all_permissions(user)),
+        }
+        cache.set(key, access, USER_ACCESS_TTL)
+    return access
+
+
+class UserRoles:
+    """Группы и права пользователя. Суперпользователю разрешено всё."""
+
+    def __init__(self, user):
+        self.is_authenticated = bool(user and user.is_authenticated)
+        self.is_superuser = self.is_authenticated and user.is_superuser
+        if self.is_authenticated and user.is_active and not self.is_superuser:
+            access = get_user_access(user)
+            self.groups = frozenset(access['groups'])
+            self.perms = frozenset(access['perms'])
+        else:
+            self.groups = frozenset()
+            self.perms = frozenset()
+
+    def in_groups(self, *names):
+        return self.is_superuser or not self.groups.isdisjoint(names)
+
+    def has_perm(self, perm):
+        return self.is_superuser or perm in self.perms
+
+    def has_any_perm(self, *perms):
+        return self.is_superuser or not self.perms.isdisjoint(perms)
+
+
+def get_roles(request):
+    """UserRoles для request.user, мемоизировано на самом request."""
+    roles = getattr(request, _REQUEST_ATTR, None)
+    if roles is None:
+        roles = UserRoles(getattr(request, 'user', None))
+        setattr(request, _REQUEST_ATTR, roles)
+    return roles
@@ -12,12 +12,15 @@ from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import authenticate
 from django.core import signing
-from django.db.models import Count, Q, Avg, F
+from django.db.models import Count, Q, Avg
 from django.db.models.functions import TruncHour, TruncDate
-from django.http import HttpResponseRedirect, HttpResponseForbidden, JsonResponse
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, HttpResponseForbidden, HttpResponseNotModified, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import translation, timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
 from django.views.decorators.cache import never_cache
 from django.views.decorators.debug import sensitive_post_parameters
 from django.views.decorators.http import require_http_methods
@@ -30,6 +33,7 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from main.utils.recaptcha import verify_recaptcha, get_client_ip
+from main.utils.roles import get_roles
 # ========== ЛОКАЛЬНЫЕ ИМПОРТЫ ==========
 from .models import (
     News,
@@ -47,12 +51,25 @@ from .models import (
     TeamDepartment,
     TeamMember,
     DealerProfile,
-    SparePart, SparePartType,
-    Invoice, InvoiceItem,
+    SparePart,
+    Invoice,
 )
 from django.db import transaction, IntegrityError
 from decimal import Decimal
 from main.utils.invoice_format import format_uzs, format_date_ru, amount_in_words_uzs
+from main.services.catalog.product_cards import cached_category_cards
+from main.services.dashboard.products import product_labels
+from main.services.shop.search import search_parts, autocomplete as autocomplete_parts
+from main.services.shop.facets import get_facets
+from main.services.shop import cart as cart_service
+from main.services.shop import checkout as checkout_service
+from main.services.shop import documents as documents_service
+from main.services.shop import session as dealer_session
+from main.services.shop import stock as stock_service
+from main.services.shop.session import (
+    DEALER_COOKIE_NAME, DEALER_COOKIE_MAX_AGE, DEALER_COOKIE_SALT,
+)
+from main.utils.keyset import paginate
 from .forms import DealerLoginForm, DealerPasswordChangeForm
 from .serializers import (
     NewsSerializer, 
@@ -161,10 +178,7 @@ def team(request):
 # Сознательно НЕ используем Django session/auth_login — иначе дилер и
 # админ делили бы один cookie `sessionid` и затирали друг друга.
 # Здесь свой подписанный cookie 'dealer_sid' — параллельно с админской сессией.
-
-DEALER_COOKIE_NAME    = 'dealer_sid'
-DEALER_COOKIE_MAX_AGE = 60 * 60 * 8  # 8 часов
-DEALER_COOKIE_SALT    = 'main.dealer-auth.v1'
+# Проверка cookie + кеш профиля — main/services/shop/session.py.
 
 
 def _set_dealer_cookie(response, profile_id):
@@ -184,27 +198,12 @@ def _clear_dealer_cookie(response):
 
 
 def _get_dealer_profile_from_request(request):
-    """Читает cookie, проверяет подпись, возвращает активный DealerProfile или None."""
-    raw = request.COOKIES.get(DEALER_COOKIE_NAME)
-    if not raw:
-        return None
-    try:
-        data = signing.loads(raw, salt=DEALER_COOKIE_SALT, max_age=DEALER_COOKIE_MAX_AGE)
-    except signing.BadSignature:
-        # подделка или испорченный cookie
-        return None
-    profile_id = data.get('pid')
-    if not profile_id:
-        return None
-    profile = (
-        DealerProfile.objects
-        .filter(id=profile_id, is_active=True)
-        .select_related('user')
-        .first()
-    )
-    if profile and profile.user.is_active:
-        return profile
-    return None
+    """Активный DealerProfile по cookie или None.
+    Обычно уже резолвлен DealerSessionMiddleware (с кешем) — берём оттуда.
+    """
+    if hasattr(request, 'dealer_profile'):
+        return request.dealer_profile
+    return dealer_session.resolve_request(request)
 
 
 def _role_required(role_check, view_func):
@@ -256,6 +255,27 @@ def accountant_required(view_func):
     return _role_required(lambda p: p.is_accountant, view_func)
 
 
+# ========== KEYSET-ПАГИНАЦИЯ КАБИНЕТА ==========
+# Размеры страниц. Курсор (?cursor=) — см. main/utils/keyset.py.
+SHOP_PAGE_SIZE         = 24
+STAFF_PARTS_PAGE_SIZE  = 50
+STAFF_ORDERS_PAGE_SIZE = 50
+
+
+def _page_url(request, cursor, as_json=False):
+    """URL следующей страницы: те же фильтры/поиск + новый cursor."""
+    params = request.GET.copy()
+    params.pop('format', None)
+    params['cursor'] = cursor
+    if as_json:
+        params['format'] = 'json'
+    return f'{request.path}?{params.urlencode()}'
+
+
+def _wants_json(request):
+    return request.GET.get('format') == 'json'
+
+
 @sensitive_post_parameters('password')
 @never_cache
 @require_http_methods(['GET', 'POST'])
@@ -330,41 +350,51 @@ def dealer_shop(request):
         .prefetch_related('images')
     )
 
-    # Поиск по артикулу ИЛИ названию (RU и base). icontains — case-insensitive.
-    if q:
-        parts = parts.filter(
-            Q(part_number__icontains=q)
-            | Q(name__icontains=q)
-            | Q(name_ru__icontains=q)
-        )
-
     # Фильтры по селектам — только если значение валидное число
     if truck_id.isdigit():
         parts = parts.filter(truck_id=int(truck_id))
     if type_id.isdigit():
         parts = parts.filter(type_id=int(type_id))
 
-    parts = parts.order_by('-updated_at')
+    # Поиск: артикул (без дефисов/пробелов) + названия ru/uz/en, с опечатками.
+    # С запросом — сортировка по релевантности, без — свежие сверху.
+    if q:
+        parts = search_parts(parts, q)
+        ordering = ['-search_rank', 'id']
+    else:
+        ordering = ['-updated_at', 'id']
 
-    # Списки для селектов в фильтр-баре — только сущности, у которых есть запчасти
-    trucks_with_parts = (
-        Product.objects
-        .filter(spare_parts__is_active=True)
-        .distinct()
-        .order_by('title')
-    )
-    types_with_parts = (
-        SparePartType.objects
-        .filter(parts__is_active=True)
-        .distinct()
-        .order_by('name')
+    page = paginate(parts, ordering, request.GET.get('cursor'), SHOP_PAGE_SIZE)
+    next_url = _page_url(request, page.next_cursor) if page.has_next else ''
+    next_json_url = _page_url(request, page.next_cursor, as_json=True) if page.has_next else ''
+
+    # JSON-вариант для «Показать ещё» — карточки рендерим тем же partial'ом
+    if _wants_json(request):
+        return JsonResponse({
+            'html': render_to_string('main/dealer/_part_cards.html', {'parts': page.items}, request=request),
+            'count': len(page.items),
+            'has_next': page.has_next,
+            'next_cursor': page.next_cursor,
+            'next_url': next_url,
+            'next_json_url': next_json_url,
+        })
+
+    # Селекты фильтр-бара: грузовики/типы с количеством под текущий поиск.
+    # Без поиска — из кеша (см. main/services/shop/facets.py).
+    facets = get_facets(
+        search_parts(SparePart.objects.filter(is_active=True), q) if q else None,
+        truck_id=int(truck_id) if truck_id.isdigit() else None,
+        type_id=int(type_id) if type_id.isdigit() else None,
     )
 
     return render(request, 'main/dealer/shop.html', {
         'profile': profile,
-        'parts': parts,
-        'trucks_with_parts': trucks_with_parts,
-        'types_with_parts': types_with_parts,
+        'parts': page.items,
+        'has_next': page.has_next,
+        'next_page_url': next_url,
+        'next_page_json_url': next_json_url,
+        'truck_facets': facets['trucks'],
+        'type_facets': facets['types'],
         'selected_truck': truck_id,
         'selected_type': type_id,
         'search_query': q,
@@ -448,36 +478,46 @@ def dealer_change_password(request):
 def dealer_cart_api(request):
     """Возвращает данные по запчастям из ?ids=1,2,3 — для рендера корзины на клиенте.
     Только активные запчасти. Если ID нет в БД — клиент молча отбросит.
-    """
-    raw = (request.GET.get('ids') or '').strip()
-    ids = []
-    for token in raw.split(','):
-        token = token.strip()
-        if token.isdigit():
-            ids.append(int(token))
-    ids = ids[:100]  # защита от слишком больших запросов
 
+    ETag по версии корзины: повторный запрос без изменений → 304 (1 запрос в БД).
+    ?since=<version> — только изменившиеся строки + 'removed' (версия выдана
+    для другого набора ids — все строки).
+    """
+    ids = cart_service.parse_ids(request.GET.get('ids'))
     if not ids:
-        return JsonResponse({'items': []})
+        return JsonResponse({'items': [], 'version': 0})
+
+    version, etag = cart_service.cart_version(ids)
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+    else:
+        data = cart_service.price_lines(ids, since=request.GET.get('since'))
+        data['version'] = version
+        response = JsonResponse(data)
+    response['ETag'] = etag
+    # Браузер перепроверяет ответ каждый раз (If-None-Match), но тело не качает
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
-    parts = (
-        SparePart.objects
-        .filter(id__in=ids, is_active=True)
-        .select_related('type')
-        .prefetch_related('images')
-    )
-    items = []
-    for p in parts:
-        first_image = p.images.first()
-        items.append({
+
+@dealer_required
+@require_http_methods(['GET'])
+def dealer_parts_autocomplete(request):
+    """GET ?q= — подсказки для поиска (до 10 запчастей, по релевантности)."""
+    q = (request.GET.get('q') or '').strip()
+    if not q:
+        return JsonResponse({'items': []})
+    items = [
+        {
             'id': p.id,
             'part_number': p.part_number,
             'name': p.name_ru or p.name,
             'type': (p.type.name_ru or p.type.name) if p.type_id else None,
-            'price': float(p.price),
-            'quantity_available': p.quantity,
-            'image_url': first_image.image.url if first_image else None,
-        })
+            'truck': p.truck.title if p.truck_id else None,
+            'url': reverse('dealer_part_detail', args=[p.id]),
+        }
+        for p in autocomplete_parts(q)
+    ]
     return JsonResponse({'items': items})
 
 
@@ -546,25 +586,7 @@ def dealer_cart_checkout(request):
                 total_amount=Decimal('0'),
             )
 
-            total = Decimal('0')
-            for pid, qty in requested.items():
-                part = parts_by_id.get(pid)
-                if not part:
-                    continue
-                actual_qty = min(qty, part.quantity)
-                if actual_qty < 1:
-                    continue
-                line_sum = (part.price * actual_qty).quantize(Decimal('0.01'))
-                InvoiceItem.objects.create(
-                    invoice=invoice,
-                    part=part,
-                    name=part.name_ru or part.name,
-                    quantity=actual_qty,
-                    unit='шт',
-                    price=part.price,
-                    sum=line_sum,
-                )
-                total += line_sum
+            total = checkout_service.build_invoice_items(invoice, requested, parts_by_id)
 
             if total == 0:
                 raise ValueError('Ни одной позиции не оказалось в наличии')
@@ -609,56 +631,41 @@ def dealer_invoice_confirm(request, invoice_id):
             if not items:
                 return JsonResponse({'ok': False, 'error': 'Черновик пустой'}, status=400)
 
-            # Блокируем все запчасти которые надо списать
-            part_ids = [it.part_id for it in items if it.part_id]
-            parts_locked = {
-                p.id: p
-                for p in SparePart.objects.select_for_update().filter(id__in=part_ids)
-            }
-
-            # Проверяем остатки на момент подтверждения (мог истощиться)
             for it in items:
                 if not it.part_id:
                     return JsonResponse({
                         'ok': False,
                         'error': f'Запчасть «{it.name}» удалена из каталога',
                     }, status=400)
-                part = parts_locked.get(it.part_id)
-                if not part or not part.is_active:
-                    return JsonResponse({
-                        'ok': False,
-                        'error': f'Запчасть «{it.name}» больше не доступна',
-                    }, status=400)
-                if part.quantity < it.quantity:
-                    return JsonResponse({
-                        'ok': False,
-                        'error': f'Недостаточно «{it.name}» на складе. Доступно: {part.quantity}, требуется: {it.quantity}',
-                    }, status=400)
 
-            # Списываем со склада через F() — атомарно
+            # Списываем склад одним запросом: блокировка в порядке id +
+            # проверка остатка в том же UPDATE (мог истощиться после черновика)
+            quantities, names = {}, {}
             for it in items:
-                SparePart.objects.filter(id=it.part_id).update(
-                    quantity=F('quantity') - it.quantity
-                )
+                quantities[it.part_id] = quantities.get(it.part_id, 0) + it.quantity
+                names.setdefault(it.part_id, it.name)
+            checkout_service.reserve_stock(quantities, invoice=invoice)
 
-            # Присваиваем номер: блокируем последнюю строку года
+            # Номер — последним шагом: строка счётчика года блокируется
+            # только на время коммита, а не всей проверки остатков
             year = timezone.now().year
-            last = (
-                Invoice.objects
-                .select_for_update()
-                .filter(year=year, number__isnull=False)
-                .order_by('-number')
-                .first()
-            )
-            next_number = (last.number + 1) if last else 1
+            next_number = checkout_service.allocate_invoice_number(year)
 
             invoice.year = year
             invoice.number = next_number
             invoice.confirmed_at = timezone.now()
             invoice.save(update_fields=['year', 'number', 'confirmed_at'])
+    except checkout_service.StockError as e:
+        # Исключение вышло из atomic() — частичное списание откатилось
+        name = names.get(e.part_id, '')
+        if e.available is None:
+            error = f'Запчасть «{name}» больше не доступна'
+        else:
+            error = f'Недостаточно «{name}» на складе. Доступно: {e.available}, требуется: {e.requested}'
+        return JsonResponse({'ok': False, 'error': error}, status=400)
     except IntegrityError:
-        # Гонка на UniqueConstraint(year, number) — крайне маловероятна,
-        # но если случится — клиент перезагрузит и повторит
+        # UniqueConstraint(year, number) — возможно, только если номер
+        # проставили руками мимо счётчика; клиент перезагрузит и повторит
         return JsonResponse({'ok': False, 'error': 'Попробуйте ещё раз'}, status=409)
 
     logger.info('Invoice confirmed: №%d/%d dealer=%s',
@@ -764,27 +771,11 @@ def dealer_invoices_list(request):
 def dealer_invoice(request, invoice_id):
     """Рендер счёта (черновик или подтверждённый) для своего дилера."""
     profile = request.dealer_profile
-    invoice = (
-        Invoice.objects
-        .filter(id=invoice_id, dealer=profile)
-        .prefetch_related('items')
-        .first()
-    )
+    invoice = Invoice.objects.filter(id=invoice_id, dealer=profile).first()
     if not invoice:
         messages.warning(request, 'Счёт не найден.')
         return redirect('dealer_shop')
 
-    items_ctx = [
-        {
-            'name': it.name,
-            'quantity': it.quantity,
-            'unit': it.unit,
-            'price_formatted': format_uzs(it.price),
-            'sum_formatted': format_uzs(it.sum),
-        }
-        for it in invoice.items.all()
-    ]
-
     is_draft = invoice.is_draft
     # Для черновика дата = момент создания; для подтверждённого = confirmed_at
     invoice_date = invoice.created_at if is_draft else (invoice.confirmed_at or invoice.created_at)
@@ -804,17 +795,8 @@ def dealer_invoice(request, invoice_id):
             'status_label': invoice.get_status_display(),
             'can_mark_received': can_mark_received,
         },
-        'buyer': {
-            'name': invoice.buyer_company_name,
-            'inn': invoice.buyer_inn,
-            'contract_number': invoice.buyer_contract_number,
-        },
-        'items': items_ctx,
-        'totals': {
-            'amount_formatted': format_uzs(invoice.total_amount),
-            'currency': 'UZS',
-            'amount_in_words': amount_in_words_uzs(invoice.total_amount),
-        },
+        # Подтверждённый — готовый HTML из хранилища, без перерендера строк
+        'document_html': documents_service.get_document_html(invoice),
     })
 
 
@@ -848,11 +830,11 @@ def staff_orders_list(request):
     Фильтры: ?status=, ?q= (по номеру / имени дилера / ИНН)
     """
     profile = request.dealer_profile
+    # confirmed_at ставится вместе с номером — для keyset по нему NULL не бывает
     qs = (
         Invoice.objects
-        .filter(number__isnull=False)
+        .filter(number__isnull=False, confirmed_at__isnull=False)
         .select_related('dealer')
-        .order_by('-confirmed_at')
     )
 
     status_filter = (request.GET.get('status') or '').strip()
@@ -872,6 +854,9 @@ def staff_orders_list(request):
                 | Q(dealer__name__icontains=q)
             )
 
+    page = paginate(qs, ['-confirmed_at', '-id'], request.GET.get('cursor'), STAFF_ORDERS_PAGE_SIZE)
+    next_url = _page_url(request, page.next_cursor) if page.has_next else ''
+
     items_ctx = [
         {
             'id': inv.id,
@@ -884,12 +869,21 @@ def staff_orders_list(request):
             'status': inv.status,
             'status_label': inv.get_status_display(),
         }
-        for inv in qs[:200]   # ограничиваем — пагинация будет позже
+        for inv in page.items
     ]
 
+    if _wants_json(request):
+        return JsonResponse({
+            'items': items_ctx,
+            'has_next': page.has_next,
+            'next_cursor': page.next_cursor,
+            'next_url': next_url,
+        })
+
     return render(request, 'main/dealer/staff_orders.html', {
         'profile': profile,
         'invoices': items_ctx,
+        'next_page_url': next_url,
         'status_filter': status_filter,
         'search_query': q,
         'status_choices': Invoice.STATUS_CHOICES,
@@ -1007,26 +1001,11 @@ def staff_invoice_view(request, invoice_id):
     Никаких действий: ни «Получил», ни смены статуса — только просмотр и печать.
     """
     profile = request.dealer_profile
-    invoice = (
-        Invoice.objects
-        .filter(id=invoice_id, number__isnull=False)
-        .prefetch_related('items')
-        .first()
-    )
+    invoice = Invoice.objects.filter(id=invoice_id, number__isnull=False).first()
     if not invoice:
         messages.warning(request, 'Счёт не найден.')
         return redirect('staff_orders_list')
 
-    items_ctx = [
-        {
-            'name': it.name,
-            'quantity': it.quantity,
-            'unit': it.unit,
-            'price_formatted': format_uzs(it.price),
-            'sum_formatted': format_uzs(it.sum),
-        }
-        for it in invoice.items.all()
-    ]
     invoice_date = invoice.confirmed_at or invoice.created_at
 
     return render(request, 'main/dealer/invoice.html', {
@@ -1043,20 +1022,47 @@ def staff_invoice_view(request, invoice_id):
             'back_url': reverse('staff_order_detail', args=[invoice.id]),
             'back_label': '← К управлению заказом',
         },
-        'buyer': {
-            'name': invoice.buyer_company_name,
-            'inn': invoice.buyer_inn,
-            'contract_number': invoice.buyer_contract_number,
-        },
-        'items': items_ctx,
-        'totals': {
-            'amount_formatted': format_uzs(invoice.total_amount),
-            'currency': 'UZS',
-            'amount_in_words': amount_in_words_uzs(invoice.total_amount),
-        },
+        'document_html': documents_service.get_document_html(invoice),
     })
 
 
+@never_cache
+@accountant_required
+@require_http_methods(['GET'])
+def staff_invoices_archive(request):
+    """ZIP всех подтверждённых счетов за период — для бухгалтера.
+    ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD (по дате подтверждения, включительно).
+    По умолчанию — текущий месяц. Период — не длиннее ARCHIVE_MAX_DAYS.
+    """
+    today = timezone.localdate()
+    date_from = parse_date(request.GET.get('date_from') or '') or today.replace(day=1)
+    date_to = parse_date(request.GET.get('date_to') or '') or today
+    if date_from > date_to:
+        return JsonResponse({'ok': False, 'error': 'Некорректный период'}, status=400)
+    if (date_to - date_from).days >= documents_service.ARCHIVE_MAX_DAYS:
+        return JsonResponse({
+            'ok': False,
+            'error': f'Период не длиннее {documents_service.ARCHIVE_MAX_DAYS} дней',
+        }, status=400)
+
+    invoices = (
+        Invoice.objects
+        .filter(
+            number__isnull=False,
+            confirmed_at__date__gte=date_from,
+            confirmed_at__date__lte=date_to,
+        )
+        .order_by('year', 'number')
+    )
+    archive_file = documents_service.build_archive(invoices)
+
+    logger.info('Invoices archive: %s..%s by=%s', date_from, date_to, request.dealer_profile.user.username)
+    return FileResponse(
+        archive_file, as_attachment=True,
+        filename=f'invoices_{date_from}_{date_to}.zip', content_type='application/zip',
+    )
+
+
 @never_cache
 @service_required
 def staff_parts_list(request):
@@ -1064,13 +1070,15 @@ def staff_parts_list(request):
     profile = request.dealer_profile
     q = (request.GET.get('q') or '').strip()
 
-    parts = SparePart.objects.select_related('type', 'truck').order_by('part_number')
+    parts = SparePart.objects.select_related('type', 'truck')
     if q:
-        parts = parts.filter(
-            Q(part_number__icontains=q)
-            | Q(name__icontains=q)
-            | Q(name_ru__icontains=q)
-        )
+        parts = search_parts(parts, q)
+        ordering = ['-search_rank', 'id']
+    else:
+        ordering = ['part_number', 'id']
+
+    page = paginate(parts, ordering, request.GET.get('cursor'), STAFF_PARTS_PAGE_SIZE)
+    next_url = _page_url(request, page.next_cursor) if page.has_next else ''
 
     items_ctx = [
         {
@@ -1083,12 +1091,21 @@ def staff_parts_list(request):
             'price_formatted': format_uzs(p.price),
             'is_active': p.is_active,
         }
-        for p in parts[:500]
+        for p in page.items
     ]
 
+    if _wants_json(request):
+        return JsonResponse({
+            'items': items_ctx,
+            'has_next': page.has_next,
+            'next_cursor': page.next_cursor,
+            'next_url': next_url,
+        })
+
     return render(request, 'main/dealer/staff_parts.html', {
         'profile': profile,
         'parts': items_ctx,
+        'next_page_url': next_url,
         'search_query': q,
     })
 
@@ -1107,42 +1124,52 @@ def staff_part_update_quantity(request, part_id):
     except (json.JSONDecodeError, UnicodeDecodeError):
         return JsonResponse({'ok': False, 'error': 'Некорректный JSON'}, status=400)
 
-    new_quantity = payload.get('quantity', None)
-    delta = payload.get('delta', None)
+    if not isinstance(payload, dict):
+        return JsonResponse({'ok': False, 'error': 'Некорректный JSON'}, status=400)
 
-    with transaction.atomic():
-        part = SparePart.objects.select_for_update().filter(id=part_id).first()
-        if not part:
-            return JsonResponse({'ok': False, 'error': 'Запчасть не найдена'}, status=404)
+    result = stock_service.adjust_stock(
+        [{**payload, 'part_id': part_id}], author=request.dealer_profile,
+    )[0]
+    if not result['ok']:
+        status = 404 if result['error'] == stock_service.ERROR_NOT_FOUND else 400
+        return JsonResponse({'ok': False, 'error': result['error']}, status=status)
 
-        if new_quantity is not None:
-            try:
-                new_quantity = int(new_quantity)
-                if new_quantity < 0:
-                    raise ValueError
-            except (TypeError, ValueError):
-                return JsonResponse({'ok': False, 'error': 'quantity должен быть ≥ 0'}, status=400)
-            part.quantity = new_quantity
-        elif delta is not None:
-            try:
-                delta = int(delta)
-            except (TypeError, ValueError):
-                return JsonResponse({'ok': False, 'error': 'delta должен быть числом'}, status=400)
-            new_val = part.quantity + delta
-            if new_val < 0:
-                return JsonResponse({
-                    'ok': False,
-                    'error': f'Нельзя уйти в минус (текущий остаток: {part.quantity})',
-                }, status=400)
-            part.quantity = new_val
-        else:
-            return JsonResponse({'ok': False, 'error': 'Нужен quantity или delta'}, status=400)
+    logger.info('Stock updated: part_id=%s qty=%d by=%s',
+                part_id, result['quantity'], request.dealer_profile.user.username)
+    return JsonResponse({'ok': True, 'quantity': result['quantity']})
 
-        part.save(update_fields=['quantity'])
 
-    logger.info('Stock updated: part=%s qty=%d by=%s',
-                part.part_number, part.quantity, request.dealer_profile.user.username)
-    return JsonResponse({'ok': True, 'quantity': part.quantity})
+@never_cache
+@service_required
+@require_http_methods(['POST'])
+def staff_parts_bulk_quantity(request):
+    """POST. Пачка корректировок остатков (инвентаризация) — одна транзакция.
+
+    Тело: {"items": [{"part_id": 1, "quantity": 5}, {"part_id": 2, "delta": -1}, ...],
+           "comment": "Инвентаризация 01.10"}
+    Ответ: {"ok": true, "applied": N, "results": [{part_id, ok, quantity | error}, ...]}
+    """
+    try:
+        payload = json.loads(request.body.decode('utf-8'))
+        items = payload.get('items') or []
+        assert isinstance(items, list)
+    except (json.JSONDecodeError, UnicodeDecodeError, AttributeError, AssertionError):
+        return JsonResponse({'ok': False, 'error': 'Некорректный JSON'}, status=400)
+
+    if not items:
+        return JsonResponse({'ok': False, 'error': 'Нет строк'}, status=400)
+    if len(items) > stock_service.MAX_ADJUST_LINES:
+        return JsonResponse({
+            'ok': False, 'error': f'Не больше {stock_service.MAX_ADJUST_LINES} строк за раз',
+        }, status=400)
+
+    comment = str(payload.get('comment') or '').strip()
+    results = stock_service.adjust_stock(items, author=request.dealer_profile, comment=comment)
+    applied = sum(1 for r in results if r['ok'])
+
+    logger.info('Stock bulk update: lines=%d applied=%d by=%s',
+                len(results), applied, request.dealer_profile.user.username)
+    return JsonResponse({'ok': True, 'applied': applied, 'results': results})
 
 
 def product_detail(request, product_id):
@@ -1429,28 +1456,35 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     """API для продуктов FAW"""
     permission_classes = [AllowAny]
     lookup_field = 'slug'
+    # Фильтр — только ?category= (get_queryset), порядок — order, title:
+    # список целиком кешируется на категорию и язык
+    filter_backends = []
     
     def get_queryset(self):
         try:
-            queryset = Product.objects.filter(is_active=True).prefetch_related(
-                'card_specs__icon',   
-                'parameters',          
-                'features__icon',     
-                'gallery'             
-            ).order_by('order', 'title')
+            queryset = Product.objects.filter(is_active=True).prefetch_related('card_specs__icon')
+            if self.action == 'retrieve':
+                queryset = queryset.prefetch_related('parameters', 'features__icon', 'gallery')
+            queryset = queryset.order_by('order', 'title')
             
             category = self.request.query_params.get('category', None)
             if category:
-                from django.db.models import Q
-                queryset = queryset.filter(
-                    Q(category=category) | Q(categories__icontains=category)
-                )
+                # category + categories — в ProductCategoryLink (индекс по category)
+                queryset = queryset.filter(category_links__category=category)
             
             return queryset
         except Exception as e:
             logger.error(f"Ошибка получения продуктов: {str(e)}", exc_info=True)
             return Product.objects.none()
     
+    def list(self, request, *args, **kwargs):
+        """Список карточек: вся категория — из кеша (services/catalog/product_cards.py), страница — срезом"""
+        cards = cached_category_cards(request, lambda: self.get_serializer(self.get_queryset(), many=True).data)
+        page = self.paginate_queryset(cards)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(cards)
+    
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return ProductDetailSerializer
@@ -1672,9 +1706,8 @@ def dashboard_view(request):
     """Главная страница Dashboard с аналитикой"""
     
     # Проверка прав доступа
-    if not request.user.is_superuser:
-        if not request.user.groups.filter(name__in=['Главные админы', 'Лид-менеджеры']).exists():
-            return HttpResponseForbidden('У вас нет доступа к этой странице')
+    if not get_roles(request).in_groups('Главные админы', 'Лид-менеджеры'):
+        return HttpResponseForbidden('У вас нет доступа к этой странице')
     
     # Получаем параметры фильтров
     date_from = request.GET.get('date_from', '')
@@ -1694,10 +1727,6 @@ def dashboard_view(request):
     # Формируем контекст
     from main.models import REGION_CHOICES
     
-    # Получаем список уникальных моделей
-    products = ContactForm.objects.exclude(
-        Q(product__isnull=True) | Q(product='')
-    ).values_list('product', flat=True).distinct().order_by('product')
     
     context = {
         'date_from': date_from,
@@ -1706,7 +1735,7 @@ def dashboard_view(request):
         'product': product,
         'source': source,
         'regions': REGION_CHOICES,
-        'products': list(products),
+        'products': product_labels(),
     }
     
     return render(request, 'main/dashboard/dashboard.html', context)
@@ -0,0 +1,19 @@
+from django.contrib.auth.backends import ModelBackend
+
+from main.utils.roles import get_user_access
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт права из кеша (main/utils/roles.py).
+
+    Кеш версионирован: правка групп/прав поднимает версию, так что изменения
+    применяются со следующего запроса — без сброса _perm_cache на каждом
+    запросе и без перечитывания таблиц прав.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            user_obj._perm_cache = set(get_user_access(user_obj)['perms'])
+        return user_obj._perm_cache
@@ -5,7 +5,9 @@ from django.utils.translation.trans_real import (
 )
 from django.conf import settings
 from django.http import HttpResponsePermanentRedirect, HttpResponseRedirect
+from functools import lru_cache
 import logging
+import re
 
 logger = logging.getLogger('django')
 
@@ -13,9 +15,11 @@ logger = logging.getLogger('django')
 class WWWRedirectMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        # settings не меняются на лету — читаем один раз при старте
+        self.enabled = not settings.DEBUG
 
     def __call__(self, request):
-        if settings.DEBUG:
+        if not self.enabled:
             return self.get_response(request)
 
         host = request.META.get('HTTP_HOST', '').lower()
@@ -42,24 +46,24 @@ class ForceRussianMiddleware:
     (выше в стеке) на основе URL-префикса (i18n_patterns), cookie и Accept-Language.
     """
 
+    # /api/uz/ | /api/ru/ | /api/en/ | /api/kg/ — одна регулярка вместо цепочки `in`
+    API_LANG_RE = re.compile(r'/api/(uz|ru|en|kg)/')
+
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
         try:
-            if request.path.startswith('/admin/'):
+            path = request.path
+            is_admin = path.startswith('/admin/')
+            if is_admin:
                 translation.activate('ru')
                 request.LANGUAGE_CODE = 'ru'
 
-            elif request.path.startswith('/api/'):
-                language = 'uz'
-                if '/api/uz/' in request.path:
-                    language = 'uz'
-                elif '/api/ru/' in request.path:
-                    language = 'ru'
-                elif '/api/en/' in request.path:
-                    language = 'en'
-                elif '/api/kg/' in request.path:
+            elif path.startswith('/api/'):
+                match = self.API_LANG_RE.match(path)
+                language = match.group(1) if match else 'uz'
+                if language == 'kg':
                     saved_language = request.session.get('_language')
                     cookie_language = request.COOKIES.get(settings.LANGUAGE_COOKIE_NAME)
                     language = saved_language or cookie_language or 'ky'
@@ -72,7 +76,7 @@ class ForceRussianMiddleware:
 
             response = self.get_response(request)
 
-            if request.path.startswith('/admin/'):
+            if is_admin:
                 response['Content-Language'] = 'ru'
             else:
                 response['Content-Language'] = getattr(request, 'LANGUAGE_CODE', 'uz')
@@ -84,6 +88,31 @@ class ForceRussianMiddleware:
             return self.get_response(request)
 
 
+@lru_cache(maxsize=1024)
+def is_bot_user_agent(user_agent):
+    """User-Agent → бот? Пустой UA считаем ботом. Кеш: UA у посетителей повторяются."""
+    if not user_agent:
+        return True
+    return AutoLanguageMiddleware.BOT_RE.search(user_agent) is not None
+
+
+@lru_cache(maxsize=512)
+def browser_language(accept_language):
+    """Accept-Language → 'uz' / 'ru' / 'en' или None. Кеш по строке заголовка."""
+    if not accept_language:
+        return None
+    for lang_code, _ in parse_accept_lang_header(accept_language):
+        if lang_code == '*':
+            break
+        try:
+            supported = get_supported_language_variant(lang_code).split('-')[0]
+        except LookupError:
+            continue
+        if supported in ('uz', 'ru', 'en'):
+            return supported
+    return None
+
+
 class AutoLanguageMiddleware:
     """Авто-определение языка и синхронизация cookie с URL-префиксом.
 
@@ -122,43 +151,31 @@ class AutoLanguageMiddleware:
         'telegrambot', 'whatsapp', 'applebot',
     )
 
+    # Таблицы выше, скомпилированные один раз при импорте
+    SKIP_RE = re.compile('|'.join(map(re.escape, SKIP_PATHS)))
+    BOT_RE = re.compile('|'.join(map(re.escape, BOT_PATTERNS)), re.IGNORECASE)
+    # /ru, /ru/..., /en, /en/... → язык и путь без префикса
+    LANG_PREFIX_RE = re.compile(r'/(%s)(?=/|$)' % '|'.join(NON_DEFAULT_LANGS))
+
     def __init__(self, get_response):
         self.get_response = get_response
 
     def _is_bot(self, request):
-        ua = request.META.get('HTTP_USER_AGENT', '').lower()
-        if not ua:
-            return True
-        return any(pattern in ua for pattern in self.BOT_PATTERNS)
+        return is_bot_user_agent(request.META.get('HTTP_USER_AGENT', ''))
 
     def _should_skip(self, request):
         if request.method != 'GET':
             return True
-        path = request.path
-        return any(path.startswith(p) for p in self.SKIP_PATHS)
+        return self.SKIP_RE.match(request.path) is not None
 
     def _url_prefix_lang(self, path):
         """Возвращает 'ru' или 'en' если URL начинается с /ru/ или /en/, иначе None."""
-        for lang in self.NON_DEFAULT_LANGS:
-            if path == f'/{lang}' or path.startswith(f'/{lang}/'):
-                return lang
-        return None
+        match = self.LANG_PREFIX_RE.match(path)
+        return match.group(1) if match else None
 
     def _detect_browser_lang(self, request):
         """Возвращает 'uz' / 'ru' / 'en' на основе Accept-Language. None если не определить."""
-        accept = request.META.get('HTTP_ACCEPT_LANGUAGE', '')
-        if not accept:
-            return None
-        for lang_code, _ in parse_accept_lang_header(accept):
-            if lang_code == '*':
-                break
-            try:
-                supported = get_supported_language_variant(lang_code).split('-')[0]
-            except LookupError:
-                continue
-            if supported in ('uz', 'ru', 'en'):
-                return supported
-        return None
+        return browser_language(request.META.get('HTTP_ACCEPT_LANGUAGE', ''))
 
     def _set_lang_cookie(self, response, lang):
         response.set_cookie(
@@ -181,12 +198,10 @@ class AutoLanguageMiddleware:
 
     def _strip_lang_prefix(self, path):
         """Убирает /ru/ или /en/ префикс если есть. Возвращает путь без префикса."""
-        for lang in self.NON_DEFAULT_LANGS:
-            if path.startswith(f'/{lang}/'):
-                return path[len(f'/{lang}'):]
-            if path == f'/{lang}':
-                return '/'
-        return path
+        match = self.LANG_PREFIX_RE.match(path)
+        if not match:
+            return path
+        return path[match.end():] or '/'
 
     def _build_url_for_lang(self, request, target_lang):
         """Строит URL для целевого языка из текущего пути (заменяя/убирая префикс)."""
@@ -247,24 +262,26 @@ class AutoLanguageMiddleware:
             return self.get_response(request)
 
 
-class RefreshUserPermissionsMiddleware:
-    """Сбрасывает кэш прав при каждом запросе"""
-    
+class DealerSessionMiddleware:
+    """Резолвит профиль кабинета дилера по cookie 'dealer_sid' один раз на запрос.
+
+    Профиль берётся из кеша (main/services/shop/session.py), так что частые
+    запросы кабинета не ходят в БД за DealerProfile/User.
+    request.dealer_profile — DealerProfile или None.
+    """
+
     def __init__(self, get_response):
         self.get_response = get_response
-    
+
     def __call__(self, request):
-        try:
-            if request.user.is_authenticated and not request.user.is_superuser:
-                if hasattr(request.user, '_perm_cache'):
-                    delattr(request.user, '_perm_cache')
-                if hasattr(request.user, '_user_perm_cache'):
-                    delattr(request.user, '_user_perm_cache')
-                if hasattr(request.user, '_group_perm_cache'):
-                    delattr(request.user, '_group_perm_cache')
-            
-            return self.get_response(request)
-        
-        except Exception as e:
-            logger.error(f"Ошибка в RefreshUserPermissionsMiddleware: {str(e)}", exc_info=True)
-            return self.get_response(request)
\ No newline at end of file
+        from main.services.shop import session as dealer_session
+
+        request.dealer_profile = None
+        # Без cookie (обычные посетители сайта) — ни кеша, ни БД
+        if request.COOKIES.get(dealer_session.DEALER_COOKIE_NAME):
+            try:
+                request.dealer_profile = dealer_session.resolve_request(request)
+            except Exception as e:
+                logger.error(f"Ошибка в DealerSessionMiddleware: {e}", exc_info=True)
+
+        return self.get_response(request)
@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sitemaps',
+    'django.contrib.postgres',
     'ckeditor',
     
     # Third party
@@ -170,13 +171,16 @@ MIDDLEWARE = [
     'myproject.middleware.ForceRussianMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'myproject.middleware.RefreshUserPermissionsMiddleware', 
+    'myproject.middleware.DealerSessionMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     # 'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'reversion.middleware.RevisionMiddleware',
 ]
 ROOT_URLCONF = 'myproject.urls'
 
+# Права пользователей — из версионированного кеша (main/utils/roles.py)
+AUTHENTICATION_BACKENDS = ['myproject.auth_backends.CachedModelBackend']
+
 # ============ TEMPLATES ============
 
 TEMPLATES = [
@@ -281,6 +285,9 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Отрендеренные счета дилеров — НЕ в MEDIA (не раздаются публично)
+INVOICE_DOCUMENTS_ROOT = BASE_DIR / 'private_media' / 'invoices'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # ============ БЕЗОПАСНОСТЬ ============